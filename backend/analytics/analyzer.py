@@ -1,6 +1,24 @@
 # backend/analytics/analyzer.py
 import pandas as pd
-import os
+
+from backend.analytics.data_logger import LOG_FILE
+from backend.analytics.segments import segment_files
+
+
+def load_log_frame(log_file, since=None, until=None):
+    """
+    DataFrame of every log segment overlapping [since, until)
+    ('YYYY-MM-DD HH:MM:SS' strings); segments outside the range are not read.
+    """
+    files = segment_files(log_file, since, until)
+    if not files:
+        raise FileNotFoundError("Log file not found. Run data_logger first.")
+    data = pd.concat([pd.read_csv(path) for path in files], ignore_index=True)
+    if since is not None:
+        data = data[data["timestamp"] >= since]
+    if until is not None:
+        data = data[data["timestamp"] < until]
+    return data.reset_index(drop=True)
 
 
 class Analyzer:
@@ -9,10 +27,8 @@ class Analyzer:
     emotion trends, posture consistency, and mood balance.
     """
 
-    def __init__(self, log_file="tests/logs/syntwin_log.csv"):
-        if not os.path.exists(log_file):
-            raise FileNotFoundError("Log file not found. Run data_logger first.")
-        self.data = pd.read_csv(log_file)
+    def __init__(self, log_file=LOG_FILE, since=None, until=None):
+        self.data = load_log_frame(log_file, since, until)
 
     def emotion_distribution(self):
         """Return count of each emotion detected."""
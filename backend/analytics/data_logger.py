@@ -1,52 +1,85 @@
 # backend/analytics/data_logger.py
-import csv
 import os
 from datetime import datetime
 
+from backend.analytics.segments import (
+    FLUSH_INTERVAL,
+    SEGMENT_MAX_AGE,
+    SEGMENT_MAX_BYTES,
+    get_segment_log,
+)
+from backend.database.writer import BatchWriter
+
+# Where every writer and reader of the CSV log looks (relative to the working directory)
+LOG_DIR = "logs"
+LOG_FILE = os.path.join(LOG_DIR, "syntwin_log.csv")
+
 
 class DataLogger:
     """
     Logs simulation and detection data for analysis.
     Saves data to CSV files in /logs folder.
+
+    The log is split into segments (see segments.py): the active
+    syntwin_log.csv is rotated at `max_segment_bytes` or
+    `max_segment_age` seconds and older segments are gzipped. Rows go
+    through one buffered handle flushed every `flush_interval` seconds.
+
+    With write_behind=True, log_entry() only queues the row and a
+    background writer appends queued rows in batches.
     """
 
-    def __init__(self, log_dir="logs"):
+    def __init__(self, log_dir=LOG_DIR, write_behind=False, max_segment_bytes=SEGMENT_MAX_BYTES,
+                 max_segment_age=SEGMENT_MAX_AGE, flush_interval=FLUSH_INTERVAL):
         self.log_dir = log_dir
         os.makedirs(self.log_dir, exist_ok=True)
         self.log_file = os.path.join(self.log_dir, "syntwin_log.csv")
 
-        # Initialize file with headers if not exists
-        if not os.path.exists(self.log_file):
-            with open(self.log_file, "w", newline="") as f:
-                writer = csv.writer(f)
-                writer.writerow([
-                    "timestamp", "emotion", "smile", "eyes", "posture",
-                    "cognitive_state", "mood", "sentiment", "environment_feedback"
-                ])
+        # Shared by every DataLogger on this file; creates it with headers
+        self.segments = get_segment_log(
+            self.log_file,
+            max_bytes=max_segment_bytes,
+            max_age=max_segment_age,
+            flush_interval=flush_interval,
+        )
+
+        self.writer = BatchWriter(f"csv:{self.log_file}", self.log_entries) if write_behind else None
 
     def log_entry(self, data: dict):
         """
         Log a single frame or simulation cycle data.
         Expected keys: emotion, smile, eyes, posture, cognitive_state, mood, sentiment, environment_feedback
         """
-        with open(self.log_file, "a", newline="") as f:
-            writer = csv.writer(f)
-            writer.writerow([
-                datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                data.get("emotion", ""),
-                data.get("smile", ""),
-                data.get("eyes", ""),
-                data.get("posture", ""),
-                data.get("cognitive_state", ""),
-                data.get("mood", ""),
-                data.get("sentiment", ""),
-                data.get("environment_feedback", "")
-            ])
+        row = self.format_row(dict(data, timestamp=None))
+        if self.writer is not None:
+            self.writer.enqueue(row)
+        else:
+            self.log_entries([row])
         # Reduced logging verbosity - only log errors
         pass  # print(f"Logged data at {datetime.now().strftime('%H:%M:%S')}")
 
+    @staticmethod
+    def format_row(data: dict) -> list:
+        """CSV row for an entry; uses its timestamp if it has one, else now."""
+        return [
+            data.get("timestamp") or datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            data.get("emotion", ""),
+            data.get("smile", ""),
+            data.get("eyes", ""),
+            data.get("posture", ""),
+            data.get("cognitive_state", ""),
+            data.get("mood", ""),
+            data.get("sentiment", ""),
+            data.get("environment_feedback", "")
+        ]
+
+    def log_entries(self, rows):
+        """Append already-formatted rows to the active segment."""
+        self.segments.write_rows(rows)
+
     def clear_logs(self):
-        """Deletes existing logs."""
-        if os.path.exists(self.log_file):
-            os.remove(self.log_file)
-            print(" Log file cleared.")
+        """Deletes existing logs, including rotated segments."""
+        if self.writer is not None:
+            self.writer.flush()
+        self.segments.clear()
+        print(" Log file cleared.")
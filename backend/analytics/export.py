@@ -0,0 +1,188 @@
+# backend/analytics/export.py
+"""
+Detection report export (Excel or CSV) with bounded memory.
+
+Rows are read from the detector_logs partitions with fetchmany() in
+chunks of FETCH_SIZE, inside one read transaction so the report is a
+consistent snapshot while new detections keep arriving (WAL).
+
+  - CSV is produced chunk by chunk, so a response can start sending
+    with the first chunk.
+  - Excel uses openpyxl's write-only mode, which streams rows to a
+    temporary file instead of keeping a cell object per value. Column
+    widths must be set before the first row, so they are estimated from
+    the first WIDTH_SAMPLE rows instead of a scan of every cell.
+"""
+import csv
+import io
+import os
+import sqlite3
+import tempfile
+from datetime import datetime
+from typing import Callable, Iterator, List, Optional
+
+from backend.database.partitions import iter_recent_rows
+from backend.database.rollups import rollup_summary
+
+try:
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, PatternFill
+    EXCEL_AVAILABLE = True
+except ImportError:
+    EXCEL_AVAILABLE = False
+
+EXCEL_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+CSV_MEDIA_TYPE = "text/csv"
+
+DETAIL_HEADERS = ["Timestamp", "Emotion", "Posture", "Sentiment"]
+DETAIL_COLUMNS = "timestamp, emotion, posture, sentiment"
+# Rows per fetchmany() call
+FETCH_SIZE = 5000
+# Rows used to estimate column widths
+WIDTH_SAMPLE = 1000
+MAX_COLUMN_WIDTH = 50
+# Bytes per chunk when streaming a finished file
+STREAM_BLOCK = 256 * 1024
+
+# progress(rows_written, total_rows)
+Progress = Optional[Callable[[int, int], None]]
+
+
+def report_filename(extension: str) -> str:
+    return f"syntwin_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+
+
+def _detail_chunks(conn: sqlite3.Connection, progress: Progress = None) -> Iterator[List[tuple]]:
+    total = conn.execute("SELECT COUNT(*) FROM detector_logs").fetchone()[0] if progress else 0
+    done = 0
+    for chunk in iter_recent_rows(conn, DETAIL_COLUMNS, FETCH_SIZE):
+        yield chunk
+        done += len(chunk)
+        if progress:
+            progress(done, total)
+
+
+def column_widths(headers: List[str], sample: List[tuple]) -> List[int]:
+    """Column widths from the headers and a sample of rows."""
+    widths = [len(header) for header in headers]
+    for row in sample:
+        for i, value in enumerate(row):
+            if value is not None:
+                widths[i] = max(widths[i], len(str(value)))
+    return [min(width + 2, MAX_COLUMN_WIDTH) for width in widths]
+
+
+def iter_csv_report(conn: sqlite3.Connection, progress: Progress = None) -> Iterator[bytes]:
+    """The detection report as CSV, one encoded chunk per fetched batch."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(DETAIL_HEADERS)
+    conn.execute("BEGIN")
+    try:
+        for chunk in _detail_chunks(conn, progress):
+            writer.writerows(chunk)
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
+    finally:
+        conn.rollback()
+
+
+def write_csv_report(conn: sqlite3.Connection, path, progress: Progress = None) -> str:
+    with open(path, "wb") as f:
+        for data in iter_csv_report(conn, progress):
+            f.write(data)
+    return str(path)
+
+
+def write_excel_report(conn: sqlite3.Connection, path, progress: Progress = None) -> str:
+    """Summary and detail sheets, written in openpyxl's write-only mode."""
+    if not EXCEL_AVAILABLE:
+        raise RuntimeError("openpyxl is not installed")
+
+    wb = Workbook(write_only=True)
+    header_fill = PatternFill(start_color="667EEA", end_color="667EEA", fill_type="solid")
+    header_font = Font(bold=True, color="FFFFFF")
+
+    def styled(ws, value, font=header_font, fill=None):
+        cell = WriteOnlyCell(ws, value=value)
+        cell.font = font
+        if fill is not None:
+            cell.fill = fill
+        return cell
+
+    conn.execute("BEGIN")
+    try:
+        summary = rollup_summary(conn)
+
+        # Summary Sheet
+        ws_summary = wb.create_sheet("Summary")
+        summary_rows = [
+            [styled(ws_summary, "SynTwin Detection Report", font=Font(bold=True, size=16))],
+            [f'Generated: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}'],
+            [],
+            ["Total Detections", summary["total"]],
+            [],
+            [styled(ws_summary, "Emotion Distribution", fill=header_fill)],
+            [styled(ws_summary, "Emotion"), styled(ws_summary, "Count")],
+            *[[emotion, count] for emotion, count in summary["emotions"].items()],
+            [],
+            [styled(ws_summary, "Posture Distribution", fill=header_fill)],
+            [styled(ws_summary, "Posture"), styled(ws_summary, "Count")],
+            *[[posture, count] for posture, count in summary["postures"].items()],
+        ]
+        plain = [row for row in summary_rows if row and not isinstance(row[0], WriteOnlyCell)]
+        for letter, width in zip("AB", column_widths(["", ""], plain)):
+            ws_summary.column_dimensions[letter].width = width
+        for row in summary_rows:
+            ws_summary.append(row)
+
+        # Detection Details Sheet
+        ws_details = wb.create_sheet("Detection Details")
+        chunks = _detail_chunks(conn, progress)
+        first = next(chunks, [])
+        for letter, width in zip("ABCD", column_widths(DETAIL_HEADERS, first[:WIDTH_SAMPLE])):
+            ws_details.column_dimensions[letter].width = width
+        ws_details.append([styled(ws_details, header, fill=header_fill) for header in DETAIL_HEADERS])
+        for row in first:
+            ws_details.append(row)
+        for chunk in chunks:
+            for row in chunk:
+                ws_details.append(row)
+    finally:
+        conn.rollback()
+
+    wb.save(str(path))
+    return str(path)
+
+
+def iter_file(path, remove: bool = False) -> Iterator[bytes]:
+    """Stream a file in blocks, optionally deleting it afterwards."""
+    try:
+        with open(path, "rb") as f:
+            while True:
+                data = f.read(STREAM_BLOCK)
+                if not data:
+                    break
+                yield data
+    finally:
+        if remove:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def iter_excel_report(conn: sqlite3.Connection) -> Iterator[bytes]:
+    """The Excel report, built in a temporary file and streamed from disk."""
+    fd, path = tempfile.mkstemp(prefix="syntwin_report_", suffix=".xlsx")
+    os.close(fd)
+    try:
+        write_excel_report(conn, path)
+    except Exception:
+        os.remove(path)
+        raise
+    yield from iter_file(path, remove=True)
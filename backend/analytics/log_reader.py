@@ -0,0 +1,294 @@
+# backend/analytics/log_reader.py
+"""
+Incremental reader for the CSV detection log.
+
+The analytics endpoints used to parse the whole file on every request.
+CsvLogReader instead remembers how far it has read and, each time it is
+asked something, parses only the bytes appended since. While doing so it
+keeps:
+  - running aggregates (entry count, emotion/posture counts, sentiment)
+  - per-hour emotion counts
+  - a sparse timestamp -> byte offset index (one mark every INDEX_EVERY rows)
+
+Tail queries seek backwards from the end of the file, and range queries
+seek to the nearest index mark, so response time follows the size of
+the answer rather than the size of the log. Rows are assumed to be one
+per line with non-decreasing timestamps, which is how DataLogger writes
+them.
+"""
+import bisect
+import csv
+import io
+import os
+import threading
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+# Rows between sparse index marks
+INDEX_EVERY = 1024
+# Bytes read per step when scanning backwards
+TAIL_BLOCK = 64 * 1024
+# Bytes parsed per step when catching up with appended rows
+CONSUME_BLOCK = 4 * 1024 * 1024
+
+
+class LogAggregates:
+    """
+    Running totals over a set of log rows. Mergeable and serializable, so
+    closed log segments can keep theirs in the segment manifest.
+    """
+
+    def __init__(self):
+        self.total_entries = 0
+        self.emotions = Counter()
+        self.postures = Counter()
+        self.sentiment_sum = 0.0
+        self.sentiment_count = 0
+        self.hourly_emotions: Dict[str, Counter] = defaultdict(Counter)
+        self.start: Optional[str] = None   # first / last row timestamp
+        self.end: Optional[str] = None
+
+    def add(self, row: dict):
+        self.total_entries += 1
+        timestamp = row.get("timestamp") or ""
+        if timestamp:
+            if self.start is None:
+                self.start = timestamp
+            self.end = timestamp
+        emotion = row.get("emotion")
+        if emotion:
+            self.emotions[emotion] += 1
+            if len(timestamp) >= 13:
+                self.hourly_emotions[timestamp[:13] + ":00"][emotion] += 1
+        if row.get("posture"):
+            self.postures[row["posture"]] += 1
+        if row.get("sentiment"):
+            try:
+                self.sentiment_sum += float(row["sentiment"])
+                self.sentiment_count += 1
+            except ValueError:
+                pass
+
+    def merge(self, other: "LogAggregates"):
+        self.total_entries += other.total_entries
+        self.emotions.update(other.emotions)
+        self.postures.update(other.postures)
+        self.sentiment_sum += other.sentiment_sum
+        self.sentiment_count += other.sentiment_count
+        for hour, counts in other.hourly_emotions.items():
+            self.hourly_emotions[hour].update(counts)
+        if other.start is not None and (self.start is None or other.start < self.start):
+            self.start = other.start
+        if other.end is not None and (self.end is None or other.end > self.end):
+            self.end = other.end
+
+    def summary(self) -> dict:
+        return {
+            "total_entries": self.total_entries,
+            "emotions": self.emotions.copy(),
+            "postures": self.postures.copy(),
+            "average_sentiment": self.sentiment_sum / self.sentiment_count if self.sentiment_count else 0,
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            "total_entries": self.total_entries,
+            "emotions": dict(self.emotions),
+            "postures": dict(self.postures),
+            "sentiment_sum": self.sentiment_sum,
+            "sentiment_count": self.sentiment_count,
+            "hourly_emotions": {hour: dict(counts) for hour, counts in self.hourly_emotions.items()},
+            "start": self.start,
+            "end": self.end,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LogAggregates":
+        stats = cls()
+        stats.total_entries = data.get("total_entries", 0)
+        stats.emotions = Counter(data.get("emotions", {}))
+        stats.postures = Counter(data.get("postures", {}))
+        stats.sentiment_sum = data.get("sentiment_sum", 0.0)
+        stats.sentiment_count = data.get("sentiment_count", 0)
+        for hour, counts in data.get("hourly_emotions", {}).items():
+            stats.hourly_emotions[hour] = Counter(counts)
+        stats.start = data.get("start")
+        stats.end = data.get("end")
+        return stats
+
+
+class CsvLogReader:
+    """
+    Cached, incrementally updated view of one CSV log file.
+    Thread-safe; share one instance per file via get_log_reader().
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        self._reset(None)
+
+    def _reset(self, identity):
+        self._identity = identity
+        self._offset = 0          # bytes parsed so far
+        self.header: Optional[List[str]] = None
+        self._data_start = 0      # offset of the first data row
+        self.stats = LogAggregates()
+        self._index_times: List[str] = []
+        self._index_offsets: List[int] = []
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def refresh(self):
+        """Parse whatever was appended since the last call."""
+        with self._lock:
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                self._reset(None)
+                return
+            identity = (stat.st_dev, stat.st_ino)
+            if identity != self._identity or stat.st_size < self._offset:
+                # New, replaced or truncated file: start over
+                self._reset(identity)
+            if stat.st_size > self._offset:
+                self._consume(stat.st_size)
+
+    def _consume(self, size: int):
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            while self._offset < size:
+                chunk = f.read(min(CONSUME_BLOCK, size - self._offset))
+                # Leave a partially written last line for the next read
+                end = chunk.rfind(b"\n") + 1
+                if end == 0:
+                    return
+                self._consume_lines(chunk[:end])
+                f.seek(self._offset)
+
+    def _consume_lines(self, data: bytes):
+        offset = self._offset
+        for raw in data.splitlines(keepends=True):
+            line_offset = offset
+            offset += len(raw)
+            fields = next(csv.reader([raw.decode("utf-8", "replace")]), None)
+            if not fields:
+                continue
+            if self.header is None:
+                self.header = fields
+                self._data_start = offset
+                continue
+            self._add(dict(zip(self.header, fields)), line_offset)
+        self._offset = offset
+
+    def _add(self, row: dict, line_offset: int):
+        if self.stats.total_entries % INDEX_EVERY == 0 and row.get("timestamp"):
+            self._index_times.append(row["timestamp"])
+            self._index_offsets.append(line_offset)
+        self.stats.add(row)
+
+    def _parse(self, data: bytes) -> List[dict]:
+        text = data.decode("utf-8", "replace")
+        return [dict(zip(self.header, fields)) for fields in csv.reader(io.StringIO(text)) if fields]
+
+    def tail(self, limit: int) -> List[dict]:
+        """Last `limit` rows, oldest first, read backwards from the end."""
+        self.refresh()
+        if self.header is None or limit <= 0:
+            return []
+        with self._lock:
+            end, start = self._offset, self._data_start
+        with open(self.path, "rb") as f:
+            position, data = end, b""
+            # limit rows need limit newlines before them (or the header's)
+            while position > start and data.count(b"\n") <= limit:
+                step = min(TAIL_BLOCK, position - start)
+                position -= step
+                f.seek(position)
+                data = f.read(step) + data
+        if position > start:
+            data = data[data.index(b"\n") + 1:]
+        rows = self._parse(data)
+        return rows[-limit:]
+
+    def since(self, threshold: str, until: Optional[str] = None) -> List[dict]:
+        """Rows with threshold <= timestamp (< until), via the sparse index."""
+        self.refresh()
+        if self.header is None:
+            return []
+        with self._lock:
+            end = self._offset
+            # Last mark strictly before the threshold; rows with equal
+            # timestamps may precede a mark, so never start on one
+            i = bisect.bisect_left(self._index_times, threshold) - 1
+            start = self._index_offsets[i] if i >= 0 else self._data_start
+        rows = []
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            # Line by line, so a query near the end never reads the whole file
+            while f.tell() < end:
+                fields = next(csv.reader([f.readline().decode("utf-8", "replace")]), None)
+                if not fields:
+                    continue
+                row = dict(zip(self.header, fields))
+                timestamp = row.get("timestamp") or ""
+                if timestamp < threshold:
+                    continue
+                if until is not None and timestamp >= until:
+                    break
+                rows.append(row)
+        return rows
+
+    def summary(self) -> dict:
+        self.refresh()
+        with self._lock:
+            return self.stats.summary()
+
+    def aggregates(self) -> LogAggregates:
+        """Copy of the running totals (for merging across segments)."""
+        self.refresh()
+        with self._lock:
+            stats = LogAggregates()
+            stats.merge(self.stats)
+            return stats
+
+    def hourly_emotions_since(self, threshold: datetime) -> Dict[str, Counter]:
+        """
+        Emotion counts per hour from `threshold` on. Whole hours come from
+        the cached hourly counts; the partial first hour is read via the index.
+        """
+        self.refresh()
+        first_hour = threshold.strftime("%Y-%m-%d %H:00")
+        with self._lock:
+            hours = {hour: counts.copy() for hour, counts in self.stats.hourly_emotions.items() if hour > first_hour}
+        partial = Counter()
+        hour_end = first_hour[:13] + ":59:60"  # sorts after every second of the hour
+        for row in self.since(threshold.strftime(TIMESTAMP_FORMAT), until=hour_end):
+            if row.get("emotion"):
+                partial[row["emotion"]] += 1
+        if partial:
+            hours[first_hour] = partial
+        return hours
+
+
+_readers: Dict[str, CsvLogReader] = {}
+_readers_lock = threading.Lock()
+
+
+def get_log_reader(path) -> CsvLogReader:
+    """Shared reader for `path`, so its cache survives across requests."""
+    key = os.path.abspath(str(path))
+    with _readers_lock:
+        reader = _readers.get(key)
+        if reader is None:
+            reader = _readers[key] = CsvLogReader(key)
+        return reader
+
+
+def evict_log_reader(path):
+    """Forget the shared reader of `path` (a rotated, compressed or deleted file)."""
+    with _readers_lock:
+        _readers.pop(os.path.abspath(str(path)), None)
@@ -1,7 +1,8 @@
 # backend/analytics/plotter.py
 import matplotlib.pyplot as plt
-import pandas as pd
-import os
+
+from backend.analytics.analyzer import load_log_frame
+from backend.analytics.data_logger import LOG_FILE
 
 
 class Plotter:
@@ -10,12 +11,20 @@ class Plotter:
     Provides emotion, posture, and sentiment charts.
     """
 
-    def __init__(self, log_file="tests/logs/syntwin_log.csv"):
-        if not os.path.exists(log_file):
-            raise FileNotFoundError("Log file not found. Please run the simulation first.")
-        self.data = pd.read_csv(log_file)
+    def __init__(self, log_file=LOG_FILE, since=None, until=None):
+        self.data = load_log_frame(log_file, since, until)
+
+    @staticmethod
+    def _finish(save_path=None):
+        """Show the current figure, or save it to `save_path` and close it."""
+        plt.tight_layout()
+        if save_path:
+            plt.savefig(save_path)
+            plt.close()
+        else:
+            plt.show()
 
-    def plot_emotion_distribution(self):
+    def plot_emotion_distribution(self, save_path=None):
         """Bar chart for emotion frequency."""
         counts = self.data["emotion"].value_counts()
         plt.figure(figsize=(8, 5))
@@ -23,20 +32,18 @@ class Plotter:
         plt.title("Emotion Frequency Distribution")
         plt.xlabel("Emotion")
         plt.ylabel("Occurrences")
-        plt.tight_layout()
-        plt.show()
+        self._finish(save_path)
 
-    def plot_posture_distribution(self):
+    def plot_posture_distribution(self, save_path=None):
         """Pie chart for posture analysis."""
         counts = self.data["posture"].value_counts()
         plt.figure(figsize=(6, 6))
         counts.plot(kind="pie", autopct="%1.1f%%", startangle=90)
         plt.title("Posture Analysis")
         plt.ylabel("")
-        plt.tight_layout()
-        plt.show()
+        self._finish(save_path)
 
-    def plot_sentiment_trend(self):
+    def plot_sentiment_trend(self, save_path=None):
         """Line chart of sentiment scores over time."""
         if "sentiment" in self.data.columns:
             plt.figure(figsize=(10, 5))
@@ -44,6 +51,5 @@ class Plotter:
             plt.title("Sentiment Trend Over Time")
             plt.xlabel("Frame / Cycle")
             plt.ylabel("Sentiment Score")
-            plt.tight_layout()
-            plt.show()
+            self._finish(save_path)
 
@@ -0,0 +1,404 @@
+# backend/analytics/segments.py
+"""
+Rotating, compressed CSV log segments.
+
+Layout for a log file `logs/syntwin_log.csv`:
+
+    logs/syntwin_log.csv                     active segment (appended to)
+    logs/segments/syntwin_log.<stamp>.csv    closed, waiting for compression
+    logs/segments/syntwin_log.<stamp>.csv.gz closed and compressed
+    logs/segments/manifest.json              compressed segments, oldest first,
+                                             with time range and aggregates
+
+SegmentedCsvLog owns the active file through one buffered handle that
+is flushed every `flush_interval` seconds. The active segment is rotated
+when it reaches `max_bytes` or `max_age` seconds. Closed segments are
+gzipped on a background thread, which also records each segment's time
+range and aggregates (see log_reader.LogAggregates) in the manifest.
+
+SegmentedLogReader reads across all of them, skipping segments whose
+time range lies outside the query.
+"""
+import atexit
+import csv
+import gzip
+import io
+import json
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+from backend.analytics.log_reader import (
+    TIMESTAMP_FORMAT,
+    LogAggregates,
+    evict_log_reader,
+    get_log_reader,
+)
+from backend.database.writer import close_all_writers
+
+LOG_HEADER = [
+    "timestamp", "emotion", "smile", "eyes", "posture",
+    "cognitive_state", "mood", "sentiment", "environment_feedback"
+]
+
+# Rotation and flush defaults
+SEGMENT_MAX_BYTES = 16 * 1024 * 1024
+SEGMENT_MAX_AGE = 24 * 3600
+FLUSH_INTERVAL = 1.0
+
+SEGMENT_DIR = "segments"
+MANIFEST_NAME = "manifest.json"
+
+
+def _paths(log_file):
+    log_file = os.path.abspath(str(log_file))
+    directory = os.path.join(os.path.dirname(log_file), SEGMENT_DIR)
+    stem = os.path.splitext(os.path.basename(log_file))[0]
+    return log_file, directory, stem
+
+
+def load_manifest(log_file) -> List[dict]:
+    """Compressed segments of `log_file`, oldest first."""
+    _, directory, _ = _paths(log_file)
+    try:
+        with open(os.path.join(directory, MANIFEST_NAME)) as f:
+            return json.load(f).get("segments", [])
+    except (FileNotFoundError, ValueError):
+        return []
+
+
+def _save_manifest(directory: str, segments: List[dict]):
+    path = os.path.join(directory, MANIFEST_NAME)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"segments": segments}, f)
+    os.replace(tmp, path)
+
+
+def _pending_segments(log_file) -> List[str]:
+    """Closed segments not compressed yet, oldest first."""
+    _, directory, stem = _paths(log_file)
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        os.path.join(directory, name)
+        for name in os.listdir(directory)
+        if name.startswith(stem + ".") and name.endswith(".csv")
+    )
+
+
+def _overlaps(start: Optional[str], end: Optional[str], since: Optional[str], until: Optional[str]) -> bool:
+    if since is not None and end is not None and end < since:
+        return False
+    if until is not None and start is not None and start >= until:
+        return False
+    return True
+
+
+def read_rows(path: str) -> Iterator[dict]:
+    """Rows of a plain or gzipped segment."""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", newline="", encoding="utf-8", errors="replace") as f:
+        yield from csv.DictReader(f)
+
+
+def segment_files(log_file, since: Optional[str] = None, until: Optional[str] = None) -> List[str]:
+    """
+    Every file holding rows of `log_file`, oldest first: compressed
+    segments whose time range overlaps [since, until), pending segments
+    and the active file.
+    """
+    log_file, directory, _ = _paths(log_file)
+    files = [
+        os.path.join(directory, segment["file"])
+        for segment in load_manifest(log_file)
+        if _overlaps(segment.get("start"), segment.get("end"), since, until)
+    ]
+    files += _pending_segments(log_file)
+    if os.path.exists(log_file):
+        files.append(log_file)
+    return files
+
+
+class SegmentedCsvLog:
+    """
+    Writer side of a segmented CSV log. One instance per file, shared by
+    every DataLogger writing it (see get_segment_log()).
+    """
+
+    def __init__(self, log_file, max_bytes: int = SEGMENT_MAX_BYTES,
+                 max_age: float = SEGMENT_MAX_AGE, flush_interval: float = FLUSH_INTERVAL):
+        self.log_file, self.directory, self._stem = _paths(log_file)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.flush_interval = flush_interval
+        self._lock = threading.RLock()
+        self._handle = None
+        self._opened_at = time.time()
+        self._segment_rows = 0
+        self._dirty = False
+        self._jobs = queue.Queue()
+        self.stats = {"rows": 0, "rotations": 0, "compressed": 0}
+
+        os.makedirs(os.path.dirname(self.log_file), exist_ok=True)
+        os.makedirs(self.directory, exist_ok=True)
+        self._open()
+        # Segments closed before a restart but never compressed
+        for path in _pending_segments(self.log_file):
+            self._jobs.put(path)
+        self._thread = threading.Thread(target=self._run, name=f"{self._stem}-segments", daemon=True)
+        self._thread.start()
+
+    def _open(self):
+        new = not os.path.exists(self.log_file) or os.path.getsize(self.log_file) == 0
+        self._handle = open(self.log_file, "a", newline="", buffering=64 * 1024)
+        self._writer = csv.writer(self._handle)
+        self._opened_at = time.time()
+        self._segment_rows = 0
+        if new:
+            self._writer.writerow(LOG_HEADER)
+            self._handle.flush()
+            return
+        # Reopened after a restart: the segment's age counts from its first row
+        first = self._first_row_time()
+        if first is not None:
+            self._opened_at = first
+            self._segment_rows = 1
+
+    def _first_row_time(self) -> Optional[float]:
+        with open(self.log_file, newline="") as f:
+            for row in csv.DictReader(f):
+                try:
+                    return datetime.strptime(row.get("timestamp") or "", TIMESTAMP_FORMAT).timestamp()
+                except ValueError:
+                    return None
+        return None
+
+    def write_rows(self, rows: List[list]):
+        """Append rows to the active segment (buffered)."""
+        with self._lock:
+            if self._handle is None:
+                self._open()
+            self._writer.writerows(rows)
+            self._dirty = True
+            self._segment_rows += len(rows)
+            self.stats["rows"] += len(rows)
+            if self._handle.tell() >= self.max_bytes or time.time() - self._opened_at >= self.max_age:
+                self._rotate()
+
+    def flush(self):
+        with self._lock:
+            if self._handle is not None and self._dirty:
+                self._handle.flush()
+                self._dirty = False
+
+    def _rotate(self):
+        """Close the active segment and queue it for compression (lock held)."""
+        self._handle.close()
+        self._handle = None
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        closed = os.path.join(self.directory, f"{self._stem}.{stamp}.csv")
+        os.replace(self.log_file, closed)
+        # Its reader's cache describes the closed segment now
+        evict_log_reader(self.log_file)
+        self._open()
+        self.stats["rotations"] += 1
+        self._jobs.put(closed)
+
+    def clear(self):
+        """Delete the active file and every segment."""
+        with self._lock:
+            if self._handle is not None:
+                self._handle.close()
+                self._handle = None
+            for name in os.listdir(self.directory):
+                if name.startswith(self._stem + ".") or name == MANIFEST_NAME:
+                    os.remove(os.path.join(self.directory, name))
+                    evict_log_reader(os.path.join(self.directory, name))
+            if os.path.exists(self.log_file):
+                os.remove(self.log_file)
+            evict_log_reader(self.log_file)
+            self._open()
+
+    def close(self):
+        with self._lock:
+            if self._handle is not None:
+                self._handle.close()
+                self._handle = None
+
+    def _run(self):
+        while True:
+            try:
+                path = self._jobs.get(timeout=self.flush_interval)
+            except queue.Empty:
+                path = None
+            try:
+                self.flush()
+                if path is None:
+                    with self._lock:
+                        if self._handle is not None and self._segment_rows \
+                                and time.time() - self._opened_at >= self.max_age:
+                            self._rotate()
+                else:
+                    self._compress(path)
+            except Exception as e:
+                print(f"[{self._stem}] Segment maintenance error: {e}")
+
+    def _compress(self, path: str):
+        """Gzip one closed segment and add it to the manifest."""
+        if not os.path.exists(path):
+            return
+        target = path + ".gz"
+        tmp = target + ".tmp"
+        stats = LogAggregates()
+        with open(path, "rb") as src, gzip.open(tmp, "wb") as dst:
+            for raw in src:
+                dst.write(raw)
+            src.seek(0)
+            for row in csv.DictReader(io.TextIOWrapper(src, encoding="utf-8", errors="replace", newline="")):
+                stats.add(row)
+
+        with self._lock:
+            if not os.path.exists(path):
+                # Cleared while compressing
+                os.remove(tmp)
+                return
+            os.replace(tmp, target)
+            segments = load_manifest(self.log_file)
+            segments.append({
+                "file": os.path.basename(target),
+                "start": stats.start,
+                "end": stats.end,
+                "rows": stats.total_entries,
+                "bytes": os.path.getsize(target),
+                "stats": stats.to_dict(),
+            })
+            segments.sort(key=lambda segment: segment["file"])
+            _save_manifest(self.directory, segments)
+            os.remove(path)
+            evict_log_reader(path)
+            self.stats["compressed"] += 1
+
+    def status(self) -> dict:
+        with self._lock:
+            size = self._handle.tell() if self._handle is not None else 0
+        return {
+            "active_bytes": size,
+            "segments": len(load_manifest(self.log_file)),
+            "pending": self._jobs.qsize(),
+            **self.stats,
+        }
+
+
+class SegmentedLogReader:
+    """
+    Read side: aggregates, tail and hourly trends across every segment.
+    Compressed segments answer from their manifest aggregates; pending
+    segments and the active file go through cached CsvLogReaders.
+    """
+
+    def __init__(self, log_file):
+        self.log_file, self.directory, _ = _paths(log_file)
+
+    def exists(self) -> bool:
+        return bool(load_manifest(self.log_file) or _pending_segments(self.log_file)
+                    or os.path.exists(self.log_file))
+
+    def _live_files(self) -> List[str]:
+        files = _pending_segments(self.log_file)
+        if os.path.exists(self.log_file):
+            files.append(self.log_file)
+        return files
+
+    def aggregates(self) -> LogAggregates:
+        stats = LogAggregates()
+        for segment in load_manifest(self.log_file):
+            stats.merge(LogAggregates.from_dict(segment.get("stats", {})))
+        for path in self._live_files():
+            stats.merge(get_log_reader(path).aggregates())
+        return stats
+
+    def summary(self) -> dict:
+        return self.aggregates().summary()
+
+    def tail(self, limit: int) -> List[dict]:
+        """Last `limit` rows across segments, oldest first."""
+        rows: List[dict] = []
+        for path in reversed(self._live_files()):
+            if len(rows) >= limit:
+                break
+            rows = get_log_reader(path).tail(limit - len(rows)) + rows
+        for segment in reversed(load_manifest(self.log_file)):
+            if len(rows) >= limit:
+                break
+            older = list(read_rows(os.path.join(self.directory, segment["file"])))
+            rows = older[-(limit - len(rows)):] + rows
+        return rows
+
+    def hourly_emotions_since(self, threshold: datetime) -> Dict[str, Counter]:
+        """Per-hour emotion counts since `threshold`, across segments."""
+        since = threshold.strftime(TIMESTAMP_FORMAT)
+        first_hour = threshold.strftime("%Y-%m-%d %H:00")
+        hour_end = first_hour[:13] + ":59:60"
+        hours: Dict[str, Counter] = {}
+
+        def add(counts_by_hour):
+            for hour, counts in counts_by_hour.items():
+                hours.setdefault(hour, Counter()).update(counts)
+
+        for segment in load_manifest(self.log_file):
+            if not _overlaps(segment.get("start"), segment.get("end"), since, None):
+                continue
+            stats = LogAggregates.from_dict(segment.get("stats", {}))
+            add({hour: counts for hour, counts in stats.hourly_emotions.items() if hour > first_hour})
+            if _overlaps(segment.get("start"), segment.get("end"), since, hour_end):
+                # The partial first hour needs the rows themselves
+                partial = Counter(
+                    row["emotion"]
+                    for row in read_rows(os.path.join(self.directory, segment["file"]))
+                    if row.get("emotion") and since <= (row.get("timestamp") or "") < hour_end
+                )
+                add({first_hour: partial} if partial else {})
+        for path in self._live_files():
+            add(get_log_reader(path).hourly_emotions_since(threshold))
+        return hours
+
+    def iter_rows(self, since: Optional[str] = None, until: Optional[str] = None) -> Iterator[dict]:
+        """Rows with since <= timestamp < until, oldest first."""
+        for path in segment_files(self.log_file, since, until):
+            for row in read_rows(path):
+                timestamp = row.get("timestamp") or ""
+                if since is not None and timestamp < since:
+                    continue
+                if until is not None and timestamp >= until:
+                    break
+                yield row
+
+
+_logs: Dict[str, SegmentedCsvLog] = {}
+_logs_lock = threading.Lock()
+
+
+def get_segment_log(log_file, **options) -> SegmentedCsvLog:
+    """Shared writer for `log_file`; the first caller's options apply."""
+    key = os.path.abspath(str(log_file))
+    with _logs_lock:
+        log = _logs.get(key)
+        if log is None:
+            log = _logs[key] = SegmentedCsvLog(key, **options)
+        return log
+
+
+def close_segment_logs():
+    """Flush and close every segment writer (called on shutdown)."""
+    # Write-behind DataLoggers feed these files, so drain them first
+    close_all_writers()
+    for log in list(_logs.values()):
+        log.close()
+
+
+atexit.register(close_segment_logs)
@@ -1,18 +1,57 @@
 import sqlite3
+import time
+from datetime import datetime, timedelta
 from pathlib import Path
-from backend.database.models import DETECTOR_LOGS_SCHEMA, create_table_query
+from backend.database.migrations import migrate
+from backend.database.partitions import RetentionWorker, enable_incremental_vacuum
 
 DB_PATH = Path(__file__).parent / "syntwin.db"
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
 
 def get_connection():
     return sqlite3.connect(DB_PATH)
 
-def initialize_db():
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(create_table_query(DETECTOR_LOGS_SCHEMA))
-    conn.commit()
-    conn.close()
+def get_maintenance_connection():
+    """Connection for background maintenance; waits for the log writer's lock."""
+    return sqlite3.connect(DB_PATH, timeout=30)
 
-# Auto-create table
+def get_writer_connection():
+    """
+    Long-lived connection for the background log writer.
+    WAL lets API readers run while a batch is being committed.
+    """
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+def epoch_ms(value=None) -> int:
+    """Epoch milliseconds for a datetime or a 'YYYY-MM-DD HH:MM:SS' string (default: now)."""
+    if value is None:
+        return int(time.time() * 1000)
+    if isinstance(value, str):
+        value = datetime.strptime(value, TIMESTAMP_FORMAT)
+    return int(value.timestamp() * 1000)
+
+def since_ms(**delta) -> int:
+    """Epoch milliseconds for now minus a timedelta, e.g. since_ms(minutes=30)."""
+    return epoch_ms(datetime.now() - timedelta(**delta))
+
+def initialize_db(db_path=DB_PATH):
+    """Create the schema or upgrade an existing database to the latest version."""
+    conn = sqlite3.connect(db_path)
+    try:
+        migrate(conn)
+        # Lets retention hand dropped partitions' pages back to the OS
+        try:
+            enable_incremental_vacuum(conn)
+        except sqlite3.OperationalError as e:
+            print(f"[DB] Could not enable incremental vacuum: {e}")
+    finally:
+        conn.close()
+
+# Auto-create / migrate tables
 initialize_db()
+
+# Drops expired day partitions; started by the API server (backend/main.py)
+retention_worker = RetentionWorker(get_maintenance_connection)
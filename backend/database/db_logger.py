@@ -1,30 +1,137 @@
-from backend.database.db import get_connection
+import os
+import threading
 
-def log_detection_to_db(entry: dict):
+from backend.database.db import epoch_ms, get_writer_connection
+from backend.database.intervals import IntervalCoalescer
+from backend.database.partitions import insert_rows, partition_for_ms
+from backend.database.rollups import apply_rollups
+
+# "frame" stores one row per detection; "interval" stores one row per
+# stable run of (emotion, posture, eyes, smile), see intervals.py
+LOG_MODE = os.getenv("SYNTWIN_LOG_MODE", "frame").lower()
+INTERVAL_MAX_SECONDS = float(os.getenv("SYNTWIN_INTERVAL_MAX_SECONDS", "60"))
+
+# {table} is the day partition and the id comes from the shared counter, see partitions.py
+INSERT_DETECTION_SQL = """
+    INSERT INTO {table}
+    (id, timestamp, ts_ms, end_ts_ms, sample_count, emotion, smile, eyes, posture, sentiment, environment_feedback)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# A provisional interval row growing in place; its partition follows from ts_ms
+UPDATE_INTERVAL_SQL = """
+    UPDATE {table} SET end_ts_ms = ?, sample_count = ?, sentiment = ? WHERE id = ?
+"""
+
+# Connection and interval state owned by the sink thread
+# (sqlite connections are thread-bound)
+_local = threading.local()
+
+
+def _normalize(entry: dict) -> dict:
+    """Entry with its epoch-ms time resolved."""
+    sample = dict(entry)
+    timestamp = entry.get("timestamp")
+    try:
+        sample["ts_ms"] = epoch_ms(timestamp) if timestamp else epoch_ms()
+    except ValueError:
+        sample["ts_ms"] = epoch_ms()
+    return sample
+
+
+def _detection_row(record: dict) -> tuple:
+    return (
+        record.get("timestamp"),
+        record["ts_ms"],
+        record.get("end_ts_ms", record["ts_ms"]),
+        record.get("sample_count", 1),
+        record.get("emotion"),
+        record.get("smile"),
+        record.get("eyes"),
+        record.get("posture"),
+        record.get("sentiment"),
+        record.get("environment_feedback")
+    )
+
+
+def _write_records(conn, records, samples):
+    """Insert detector_logs records into their partitions and roll up the samples in one transaction."""
+    with conn:
+        if records:
+            insert_rows(conn, INSERT_DETECTION_SQL, [_detection_row(record) for record in records], ts_index=1)
+        apply_rollups(conn, (
+            (s["ts_ms"], s.get("emotion"), s.get("posture"), s.get("sentiment"), 1) for s in samples
+        ))
+
+
+def _write_intervals(conn, coalescer, samples):
     """
-    Insert a single detection entry into the database.
-    entry: {
-        timestamp, emotion, smile, eyes, posture, sentiment, environment_feedback
-    }
+    Fold samples into runs and write them with their rollups in one
+    transaction: new runs (closed or still open) are inserted, runs that
+    already have a provisional row are updated. Once this commits, every
+    sample is in SQLite, so the journal cursor may move past them.
     """
-    try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO detector_logs
-            (timestamp, emotion, smile, eyes, posture, sentiment, environment_feedback)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (
-            entry.get("timestamp"),
-            entry.get("emotion"),
-            entry.get("smile"),
-            entry.get("eyes"),
-            entry.get("posture"),
-            entry.get("sentiment"),
-            entry.get("environment_feedback")
+    records = [record for sample in samples for record in coalescer.add(sample)]
+    run = coalescer.run
+    if run is not None:
+        records.append(run.to_record())
+    new = [record for record in records if record.get("row_id") is None]
+    with conn:
+        ids = insert_rows(conn, INSERT_DETECTION_SQL, [_detection_row(record) for record in new], ts_index=1)
+        for record in records:
+            if record.get("row_id") is not None:
+                conn.execute(UPDATE_INTERVAL_SQL.format(table=partition_for_ms(record["ts_ms"])), (
+                    record["end_ts_ms"], record["sample_count"], record["sentiment"], record["row_id"],
+                ))
+        apply_rollups(conn, (
+            (s["ts_ms"], s.get("emotion"), s.get("posture"), s.get("sentiment"), 1) for s in samples
         ))
-        conn.commit()
-    except Exception as e:
-        print(f"❌ DB Logging Error: {e}")
-    finally:
+    # Only once committed: the open run is the last record, so the last id is its row
+    if run is not None and run.row_id is None:
+        run.row_id = ids[-1]
+
+
+def insert_detections(conn, entries):
+    """Insert detection entries (one row each) and update the rollups."""
+    samples = [_normalize(entry) for entry in entries]
+    _write_records(conn, samples, samples)
+
+
+def _writer_connection():
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = _local.conn = get_writer_connection()
+    return conn
+
+
+def _coalescer():
+    coalescer = getattr(_local, "coalescer", None)
+    if coalescer is None:
+        coalescer = _local.coalescer = IntervalCoalescer(int(INTERVAL_MAX_SECONDS * 1000))
+    return coalescer
+
+
+def write_detections(entries):
+    """
+    Journal sink for detector_logs (see events.py): writes one batch of
+    detection entries on the sink's thread.
+    """
+    if LOG_MODE != "interval":
+        insert_detections(_writer_connection(), entries)
+        return
+
+    # Rollups still see every sample, so stats stay exact and current;
+    # the open run is stored as a provisional row (see _write_intervals)
+    _write_intervals(_writer_connection(), _coalescer(), [_normalize(entry) for entry in entries])
+
+
+def close_detection_writer():
+    """End the open interval run (its row is already written) and close the sink's connection."""
+    coalescer = getattr(_local, "coalescer", None)
+    if coalescer is not None and coalescer.run is not None:
+        # Its provisional row is already current; just stop extending it
+        coalescer.close()
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
         conn.close()
+        _local.conn = None
@@ -0,0 +1,83 @@
+"""
+The detection event stream.
+
+Producers record each event once; SQLite and the CSV log are sinks fed
+from the journal (see journal.py):
+
+    record_detection(entry) --> journal --+--> detector_logs  (every 0.25 s)
+                 |                        +--> syntwin_log.csv (every 1 s)
+                 +--> recent_window (in memory, immediately)
+
+Event kinds:
+    "detection"  a processed frame or a logged detection; goes to both sinks
+    "twin"       a TwinState update outside the detection stream; CSV only
+    "analytics"  an entry posted to /api/analytics/log; CSV only
+"""
+import atexit
+import os
+from datetime import datetime
+
+from backend.analytics.data_logger import LOG_DIR, DataLogger
+from backend.database.db_logger import close_detection_writer, write_detections
+from backend.database.journal import EventJournal
+from backend.database.recent_window import recent_window
+
+JOURNAL_PATH = os.path.join(LOG_DIR, "events.journal")
+
+journal = EventJournal(JOURNAL_PATH)
+_csv = DataLogger()
+
+
+def _detections(events):
+    write_detections([event for event in events if event.get("kind", "detection") == "detection"])
+
+
+def _csv_rows(events):
+    _csv.log_entries([DataLogger.format_row(event) for event in events])
+
+
+journal.add_sink("detector_logs", _detections, interval=0.25, max_batch=500, on_close=close_detection_writer)
+journal.add_sink("csv", _csv_rows, interval=1.0, max_batch=2000)
+
+
+def record_event(kind: str, data: dict) -> bool:
+    """Append one event to the journal (non-blocking)."""
+    event = dict(data, kind=kind)
+    if not event.get("timestamp"):
+        event["timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    if journal.append(event):
+        return True
+    if journal.writer.stats["dropped"] % 100 == 1:
+        print(f"❌ Event journal full, {journal.writer.stats['dropped']} events dropped")
+    return False
+
+
+def record_detection(entry: dict) -> bool:
+    """
+    Record one detection.
+    entry: {
+        timestamp, emotion, smile, eyes, posture, cognitive_state, mood,
+        sentiment, environment_feedback
+    }
+    """
+    recent_window.add(entry)
+    return record_event("detection", entry)
+
+
+def flush_events(timeout: float = 5.0) -> bool:
+    """Wait until every recorded event has reached SQLite and the CSV log."""
+    return journal.flush(timeout)
+
+
+def clear_csv_log():
+    """Write pending events, then delete the CSV log and its segments."""
+    flush_events()
+    _csv.clear_logs()
+
+
+def close_events(timeout: float = 5.0):
+    """Drain the journal into its sinks and stop them (called on shutdown)."""
+    journal.close(timeout)
+
+
+atexit.register(close_events)
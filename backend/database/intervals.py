@@ -0,0 +1,93 @@
+"""
+Change-based interval logging.
+
+Instead of one detector_logs row per frame, interval mode stores one row
+per stable run of (emotion, posture, eyes, smile): ts_ms/end_ts_ms span
+the run, sample_count is the number of frames it covers and sentiment is
+their mean. A run is closed when the state changes, when it reaches
+`max_duration_ms`, or when no frame arrived for `max_gap_ms`.
+
+The open run is written too, as a provisional row that is updated in
+place as it grows (`row_id`), so a crash loses no samples.
+"""
+from typing import List, Optional
+
+# Fields that define a "stable" state
+STATE_FIELDS = ("emotion", "posture", "eyes", "smile")
+
+
+class IntervalRun:
+    """One open run of identical detections."""
+
+    def __init__(self, sample: dict):
+        self.key = tuple(sample.get(field) for field in STATE_FIELDS)
+        self.timestamp = sample["timestamp"]
+        self.start_ms = sample["ts_ms"]
+        self.end_ms = sample["ts_ms"]
+        self.fields = sample
+        self.row_id: Optional[int] = None   # set once the run has a detector_logs row
+        self.sample_count = 0
+        self._sentiment_sum = 0.0
+        self._sentiment_count = 0
+        self.add(sample)
+
+    def add(self, sample: dict):
+        self.end_ms = max(self.end_ms, sample["ts_ms"])
+        self.sample_count += 1
+        if sample.get("sentiment") is not None:
+            self._sentiment_sum += sample["sentiment"]
+            self._sentiment_count += 1
+
+    @property
+    def mean_sentiment(self) -> Optional[float]:
+        if not self._sentiment_count:
+            return None
+        return self._sentiment_sum / self._sentiment_count
+
+    def to_record(self) -> dict:
+        record = dict(self.fields)
+        record.update(
+            timestamp=self.timestamp,
+            ts_ms=self.start_ms,
+            end_ts_ms=self.end_ms,
+            sample_count=self.sample_count,
+            sentiment=self.mean_sentiment,
+            row_id=self.row_id,
+        )
+        return record
+
+
+class IntervalCoalescer:
+    """
+    Folds per-frame samples into runs. Not thread-safe: owned by the
+    writer thread.
+    """
+
+    def __init__(self, max_duration_ms: int = 60_000, max_gap_ms: int = 5_000):
+        self.max_duration_ms = max_duration_ms
+        self.max_gap_ms = max_gap_ms
+        self.run: Optional[IntervalRun] = None
+
+    def add(self, sample: dict) -> List[dict]:
+        """Add one sample; returns the records of any runs it closed."""
+        run = self.run
+        if run is not None:
+            key = tuple(sample.get(field) for field in STATE_FIELDS)
+            if (
+                key == run.key
+                and sample["ts_ms"] - run.start_ms < self.max_duration_ms
+                and sample["ts_ms"] - run.end_ms <= self.max_gap_ms
+            ):
+                run.add(sample)
+                return []
+        closed = self.close()
+        self.run = IntervalRun(sample)
+        return closed
+
+    def close(self) -> List[dict]:
+        """Close the open run, if any."""
+        if self.run is None:
+            return []
+        record = self.run.to_record()
+        self.run = None
+        return [record]
@@ -0,0 +1,270 @@
+"""
+Append-only event journal.
+
+Every detection (and twin/analytics update) is recorded once, as a JSON
+line in the journal. Storage that used to be written separately on the
+hot path (SQLite detector_logs, the CSV log) is derived from it by
+sinks: each sink has its own thread, reads new journal lines at its own
+cadence, hands them to a handler in batches and persists how far it got
+(its cursor). After a crash or restart, sinks resume from their cursors,
+so derived stores catch up instead of losing the backlog.
+
+Appends go through a BatchWriter, so recording an event costs one queue
+put. The journal is truncated once every sink has consumed it and it
+has grown past `max_bytes`.
+"""
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from backend.database.writer import BatchWriter
+
+# Failed deliveries of the same batch before it is skipped
+MAX_RETRIES = 3
+
+
+class JournalSink:
+    """
+    One derived store fed from the journal.
+
+    Args:
+        name:       cursor key and thread name
+        handler:    callable receiving a list of events; runs on the sink
+                    thread. If it raises, the batch is retried next tick,
+                    up to MAX_RETRIES times (delivery is at-least-once).
+        interval:   seconds between reads
+        max_batch:  events per handler call at most
+        on_close:   optional callable run on the sink thread when it stops
+    """
+
+    def __init__(self, journal: "EventJournal", name: str, handler: Callable[[List[dict]], None],
+                 interval: float = 1.0, max_batch: int = 1000, on_close: Optional[Callable[[], None]] = None):
+        self.journal = journal
+        self.name = name
+        self.handler = handler
+        self.interval = interval
+        self.max_batch = max_batch
+        self.on_close = on_close
+        self.offset = journal._cursors.get(name, 0)
+        self.stats = {"delivered": 0, "batches": 0, "errors": 0, "skipped": 0}
+        self._failures = 0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._caught_up = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name=f"journal-{name}", daemon=True)
+        self._thread.start()
+
+    @property
+    def lag_bytes(self) -> int:
+        return max(0, self.journal.committed - self.offset)
+
+    def wait(self, timeout: float) -> bool:
+        """Block until everything committed so far has been delivered."""
+        target = self.journal.committed
+        deadline = time.monotonic() + timeout
+        with self._caught_up:
+            while self.offset < target and self.journal.committed >= target:
+                self._wake.set()
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._thread.is_alive():
+                    return False
+                self._caught_up.wait(min(remaining, 0.1))
+        return True
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout)
+
+    def _run(self):
+        try:
+            while not self._stop.is_set():
+                self._wake.wait(self.interval)
+                self._wake.clear()
+                while self._deliver():
+                    pass
+            # Final catch-up on shutdown
+            while self._deliver():
+                pass
+        finally:
+            if self.on_close is not None:
+                try:
+                    self.on_close()
+                except Exception as e:
+                    print(f"[journal:{self.name}] Sink close error: {e}")
+
+    def _deliver(self) -> bool:
+        """Hand one batch to the handler. Returns True if there may be more."""
+        events, end = self.journal._read(self.offset, self.max_batch)
+        if not events and end == self.offset:
+            return False
+        try:
+            if events:
+                self.handler(events)
+        except Exception as e:
+            self.stats["errors"] += 1
+            self._failures += 1
+            print(f"[journal:{self.name}] Sink error ({len(events)} events): {e}")
+            if self._failures < MAX_RETRIES:
+                return False
+            # Don't let one bad batch block the sink forever
+            self.stats["skipped"] += len(events)
+            events = []
+        self._failures = 0
+        self.journal._advance(self, end)
+        with self._caught_up:
+            self._caught_up.notify_all()
+        self.stats["delivered"] += len(events)
+        self.stats["batches"] += 1
+        return len(events) >= self.max_batch
+
+    def status(self) -> dict:
+        return {"offset": self.offset, "lag_bytes": self.lag_bytes, **self.stats}
+
+
+class EventJournal:
+    """
+    JSON-lines journal with cursor-tracking sinks.
+
+    Args:
+        path:           journal file; cursors are kept next to it
+        flush_interval: seconds an appended event waits before hitting the file
+        max_bytes:      size after which a fully consumed journal is truncated
+    """
+
+    def __init__(self, path, flush_interval: float = 0.1, max_bytes: int = 64 * 1024 * 1024):
+        self.path = str(path)
+        self.cursor_path = self.path + ".cursors"
+        self.max_bytes = max_bytes
+        self._lock = threading.RLock()
+        self.sinks: Dict[str, JournalSink] = {}
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._cursors = self._load_cursors()
+        self.committed = self._recover()
+        self._handle = open(self.path, "ab")
+        self.writer = BatchWriter("journal", self._append_batch, flush_interval=flush_interval, max_batch=1000)
+
+    def _load_cursors(self) -> Dict[str, int]:
+        try:
+            with open(self.cursor_path) as f:
+                return {name: int(offset) for name, offset in json.load(f).items()}
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _recover(self) -> int:
+        """Drop a torn last line left by a crash; returns the committed size."""
+        if not os.path.exists(self.path):
+            return 0
+        with open(self.path, "r+b") as f:
+            size = end = f.seek(0, os.SEEK_END)
+            # Walk back to the last newline
+            while end > 0:
+                start = max(0, end - 64 * 1024)
+                f.seek(start)
+                newline = f.read(end - start).rfind(b"\n")
+                if newline >= 0:
+                    end = start + newline + 1
+                    break
+                end = start
+            if end != size:
+                f.truncate(end)
+        for name, offset in self._cursors.items():
+            if offset > end:
+                self._cursors[name] = end
+        return end
+
+    def add_sink(self, name: str, handler: Callable[[List[dict]], None], **options) -> JournalSink:
+        sink = JournalSink(self, name, handler, **options)
+        self.sinks[name] = sink
+        return sink
+
+    def append(self, event: dict) -> bool:
+        """Record one event (non-blocking). Returns False if it was dropped."""
+        return self.writer.enqueue(event)
+
+    def _append_batch(self, events: List[dict]):
+        data = b"".join(
+            json.dumps(event, separators=(",", ":"), default=str).encode("utf-8") + b"\n"
+            for event in events
+        )
+        with self._lock:
+            self._handle.write(data)
+            self._handle.flush()
+            self.committed += len(data)
+            self._maybe_truncate()
+        for sink in self.sinks.values():
+            if sink.interval <= 0:
+                sink._wake.set()
+
+    def _maybe_truncate(self) -> bool:
+        """Start over once the journal is large and every sink has consumed it (lock held)."""
+        if self.committed < self.max_bytes or not self.sinks:
+            return False
+        if any(sink.offset < self.committed for sink in self.sinks.values()):
+            return False
+        self._handle.truncate(0)
+        self._handle.seek(0)
+        self.committed = 0
+        for sink in self.sinks.values():
+            sink.offset = 0
+        self._cursors = {name: 0 for name in self.sinks}
+        self._write_cursors()
+        return True
+
+    def _read(self, offset: int, max_events: int):
+        """Up to `max_events` events from `offset`; returns (events, new offset)."""
+        with self._lock:
+            end = self.committed
+            if offset >= end:
+                return [], offset
+            events = []
+            with open(self.path, "rb") as f:
+                f.seek(offset)
+                while offset < end and len(events) < max_events:
+                    line = f.readline()
+                    if not line.endswith(b"\n"):
+                        break
+                    offset += len(line)
+                    try:
+                        events.append(json.loads(line))
+                    except ValueError:
+                        print(f"[journal] Skipping unreadable line at offset {offset - len(line)}")
+            return events, offset
+
+    def _advance(self, sink: JournalSink, offset: int):
+        """Move a sink's cursor and persist it."""
+        with self._lock:
+            sink.offset = offset
+            self._cursors[sink.name] = offset
+            if not self._maybe_truncate():
+                self._write_cursors()
+
+    def _write_cursors(self):
+        tmp = self.cursor_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self._cursors, f)
+        os.replace(tmp, self.cursor_path)
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until every appended event has reached every sink."""
+        if not self.writer.flush(timeout):
+            return False
+        return all(sink.wait(timeout) for sink in self.sinks.values())
+
+    def close(self, timeout: float = 5.0):
+        """Drain appends, let sinks catch up, and stop them."""
+        self.writer.close(timeout)
+        for sink in self.sinks.values():
+            sink.stop(timeout)
+        with self._lock:
+            self._handle.close()
+
+    def status(self) -> dict:
+        return {
+            "bytes": self.committed,
+            "queue_length": self.writer.queue_length,
+            "sinks": {name: sink.status() for name, sink in self.sinks.items()},
+        }
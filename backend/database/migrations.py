@@ -0,0 +1,108 @@
+"""
+Versioned schema migrations for syntwin.db.
+
+The applied version is kept in SQLite's `PRAGMA user_version`. Each
+migration runs once, in order, inside its own transaction; databases
+created by older releases (user_version 0) are upgraded in place.
+"""
+import sqlite3
+from typing import Callable, List, Tuple
+
+from backend.database.models import DETECTOR_LOGS_SCHEMA, create_index_queries, create_table_query
+from backend.database.partitions import create_id_sequence, partition_from_table, renumber_partition_ids
+from backend.database.rollups import create_rollup_tables, rebuild_rollups
+
+# Rows updated per statement while backfilling, keeps each step short
+BACKFILL_CHUNK = 200_000
+
+# Local-time TEXT timestamp -> epoch milliseconds, computed inside SQLite
+TIMESTAMP_TO_MS_SQL = "CAST(ROUND((julianday(timestamp, 'utc') - 2440587.5) * 86400000) AS INTEGER)"
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def _create_detector_logs(conn: sqlite3.Connection):
+    conn.execute(create_table_query(DETECTOR_LOGS_SCHEMA))
+
+
+def _add_epoch_ms(conn: sqlite3.Connection):
+    if "ts_ms" not in _columns(conn, "detector_logs"):
+        conn.execute("ALTER TABLE detector_logs ADD COLUMN ts_ms INTEGER")
+
+    # Bulk backfill by rowid range: one UPDATE per chunk, no Python round-trips
+    max_id = conn.execute("SELECT MAX(id) FROM detector_logs").fetchone()[0] or 0
+    for start in range(0, max_id + 1, BACKFILL_CHUNK):
+        conn.execute(
+            f"UPDATE detector_logs SET ts_ms = {TIMESTAMP_TO_MS_SQL} "
+            "WHERE id >= ? AND id < ? AND ts_ms IS NULL",
+            (start, start + BACKFILL_CHUNK),
+        )
+
+
+def _create_detector_log_indexes(conn: sqlite3.Connection):
+    for query in create_index_queries("detector_logs"):
+        conn.execute(query)
+    conn.execute("ANALYZE detector_logs")
+
+
+def _create_rollups(conn: sqlite3.Connection):
+    create_rollup_tables(conn)
+    rebuild_rollups(conn)
+
+
+def _add_interval_columns(conn: sqlite3.Connection):
+    columns = _columns(conn, "detector_logs")
+    if "end_ts_ms" not in columns:
+        conn.execute("ALTER TABLE detector_logs ADD COLUMN end_ts_ms INTEGER")
+    if "sample_count" not in columns:
+        conn.execute("ALTER TABLE detector_logs ADD COLUMN sample_count INTEGER NOT NULL DEFAULT 1")
+
+
+def _partition_by_day(conn: sqlite3.Connection):
+    partition_from_table(conn)
+    conn.execute("ANALYZE")
+
+
+def _unique_partition_ids(conn: sqlite3.Connection):
+    renumber_partition_ids(conn)
+    create_id_sequence(conn)
+
+
+# (version, description, migration)
+MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Connection], None]]] = [
+    (1, "create detector_logs", _create_detector_logs),
+    (2, "add epoch-ms ts_ms column to detector_logs", _add_epoch_ms),
+    (3, "index detector_logs by time, emotion and posture", _create_detector_log_indexes),
+    (4, "add minute/hour rollups of detector_logs", _create_rollups),
+    (5, "add interval columns end_ts_ms and sample_count", _add_interval_columns),
+    (6, "split detector_logs into day partitions behind a view", _partition_by_day),
+    (7, "number detector_logs rows from one counter across partitions", _unique_partition_ids),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """Apply pending migrations and return the resulting schema version."""
+    conn.commit()  # migrations manage their own transactions
+    version = get_version(conn)
+    for target, description, migration in MIGRATIONS:
+        if target <= version:
+            continue
+        try:
+            conn.execute("BEGIN")
+            migration(conn)
+            conn.execute(f"PRAGMA user_version = {target}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        print(f"[DB] Migrated to schema v{target}: {description}")
+        version = target
+    return version
@@ -5,6 +5,9 @@ DETECTOR_LOGS_SCHEMA = {
     "columns": {
         "id": "INTEGER PRIMARY KEY AUTOINCREMENT",
         "timestamp": "TEXT",
+        "ts_ms": "INTEGER",  # epoch milliseconds of timestamp, used for range queries
+        "end_ts_ms": "INTEGER",  # end of the run in interval mode (= ts_ms per frame)
+        "sample_count": "INTEGER NOT NULL DEFAULT 1",  # frames this row stands for
         "emotion": "TEXT",
         "smile": "TEXT",
         "eyes": "TEXT",
@@ -14,10 +17,32 @@ DETECTOR_LOGS_SCHEMA = {
     }
 }
 
-def create_table_query(schema: dict) -> str:
+# Index suffix -> columns, created on every detector_logs table as
+# idx_<table>_<suffix>. Covering index for time-range reads (timeline,
+# recommender); the emotion/posture indexes serve the distribution GROUP BYs.
+DETECTOR_LOGS_INDEXES = {
+    "ts": "ts_ms, emotion, posture, sentiment",
+    "emotion": "emotion, sentiment",
+    "posture": "posture",
+}
+
+def create_table_query(schema: dict, table_name: str = None) -> str:
     """
     Generates a CREATE TABLE SQL query from the schema dictionary.
+    `table_name` overrides the schema's name (used for partitions).
     """
-    table_name = schema["table_name"]
+    table_name = table_name or schema["table_name"]
     cols = ", ".join([f"{col} {dtype}" for col, dtype in schema["columns"].items()])
     return f"CREATE TABLE IF NOT EXISTS {table_name} ({cols})"
+
+
+def create_index_query(name: str, target: str) -> str:
+    return f"CREATE INDEX IF NOT EXISTS {name} ON {target}"
+
+
+def create_index_queries(table_name: str) -> list:
+    """CREATE INDEX queries for one detector_logs table (or partition)."""
+    return [
+        create_index_query(f"idx_{table_name}_{suffix}", f"{table_name} ({columns})")
+        for suffix, columns in DETECTOR_LOGS_INDEXES.items()
+    ]
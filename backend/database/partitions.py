@@ -0,0 +1,353 @@
+"""
+Day-partitioned storage for detector_logs.
+
+Rows live in one table per local day, `detector_logs_YYYYMMDD`, and
+`detector_logs` is a UNION ALL view over them, so existing SELECTs keep
+working (SQLite pushes ts_ms range filters into every partition's index).
+Writers insert into the partition directly.
+
+Row ids come from one shared counter (the `detector_logs_seq` table),
+so `id` stays unique across partitions and through the view.
+
+Clearing or expiring data drops whole tables instead of deleting rows,
+so its cost depends on the number of days, not the number of rows. Freed
+pages are returned to the OS with incremental vacuum in the background.
+"""
+import os
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from backend.database.models import DETECTOR_LOGS_SCHEMA, create_index_queries, create_table_query
+from backend.database.rollups import clear_rollups, remove_rollups_between, rollup_summary
+
+VIEW_NAME = DETECTOR_LOGS_SCHEMA["table_name"]
+PARTITION_PREFIX = f"{VIEW_NAME}_"
+ID_SEQUENCE = f"{VIEW_NAME}_seq"
+_PARTITION_RE = re.compile(rf"^{PARTITION_PREFIX}(\d{{8}})$")
+
+# Days of raw detections to keep; 0 (the default) keeps everything
+RETENTION_DAYS = int(os.getenv("SYNTWIN_RETENTION_DAYS", "0"))
+# Pages released per incremental_vacuum step
+VACUUM_PAGES = 2000
+# SQLite caps a compound SELECT at 500 terms; older days beyond that are
+# kept on disk but left out of the view
+MAX_VIEW_PARTITIONS = 500
+
+COLUMNS = list(DETECTOR_LOGS_SCHEMA["columns"].keys())
+
+
+def partition_name(day: date) -> str:
+    return f"{PARTITION_PREFIX}{day.strftime('%Y%m%d')}"
+
+
+def partition_for_ms(ts_ms: int) -> str:
+    return partition_name(datetime.fromtimestamp(ts_ms / 1000.0).date())
+
+
+def _day_of(table: str) -> date:
+    return datetime.strptime(_PARTITION_RE.match(table).group(1), "%Y%m%d").date()
+
+
+def _day_start_ms(day: date) -> int:
+    return int(datetime.combine(day, datetime.min.time()).timestamp() * 1000)
+
+
+@contextmanager
+def _transaction(conn: sqlite3.Connection):
+    """
+    Run schema changes atomically. Joins the caller's transaction if one
+    is open (migrations), otherwise takes the write lock up front so other
+    connections never see the view half-rebuilt.
+    """
+    if conn.in_transaction:
+        yield
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def list_partitions(conn: sqlite3.Connection) -> List[str]:
+    """Partition table names, oldest first."""
+    names = [
+        row[0]
+        for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE ?",
+            (PARTITION_PREFIX + "%",),
+        )
+        if _PARTITION_RE.match(row[0])
+    ]
+    return sorted(names)
+
+
+def is_partitioned(conn: sqlite3.Connection) -> bool:
+    row = conn.execute("SELECT type FROM sqlite_master WHERE name = ?", (VIEW_NAME,)).fetchone()
+    return row is not None and row[0] == "view"
+
+
+def refresh_view(conn: sqlite3.Connection, partitions: Optional[List[str]] = None):
+    """Recreate the detector_logs view over the current partitions."""
+    if partitions is None:
+        partitions = list_partitions(conn)
+    if not partitions:
+        # The view needs at least one table
+        partitions = [create_partition(conn, date.today(), refresh=False)]
+    if len(partitions) > MAX_VIEW_PARTITIONS:
+        print(f"[DB] {len(partitions)} partitions exceed the view limit; "
+              f"only the newest {MAX_VIEW_PARTITIONS} days are queryable (set SYNTWIN_RETENTION_DAYS)")
+        partitions = partitions[-MAX_VIEW_PARTITIONS:]
+    columns = ", ".join(COLUMNS)
+    body = " UNION ALL ".join(f"SELECT {columns} FROM {table}" for table in partitions)
+    conn.execute(f"DROP VIEW IF EXISTS {VIEW_NAME}")
+    conn.execute(f"CREATE VIEW {VIEW_NAME} AS {body}")
+
+
+def create_partition(conn: sqlite3.Connection, day: date, refresh: bool = True) -> str:
+    table = partition_name(day)
+    conn.execute(create_table_query(DETECTOR_LOGS_SCHEMA, table_name=table))
+    for query in create_index_queries(table):
+        conn.execute(query)
+    if refresh:
+        refresh_view(conn)
+    return table
+
+
+def ensure_partitions(conn: sqlite3.Connection, tables: Iterable[str]):
+    """Create any missing partitions (and refresh the view once)."""
+    existing = set(list_partitions(conn))
+    missing = [table for table in set(tables) if table not in existing]
+    if not missing:
+        return
+    with _transaction(conn):
+        for table in missing:
+            create_partition(conn, _day_of(table), refresh=False)
+        refresh_view(conn)
+
+
+def create_id_sequence(conn: sqlite3.Connection):
+    """Create the shared row id counter, starting after the highest id in any partition."""
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {ID_SEQUENCE} (last_id INTEGER NOT NULL)")
+    if conn.execute(f"SELECT 1 FROM {ID_SEQUENCE}").fetchone() is None:
+        last_id = max(
+            (conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0] for table in list_partitions(conn)),
+            default=0,
+        )
+        conn.execute(f"INSERT INTO {ID_SEQUENCE} (last_id) VALUES (?)", (last_id,))
+
+
+def allocate_ids(conn: sqlite3.Connection, count: int) -> int:
+    """Reserve `count` consecutive row ids; returns the first. Call inside the insert's transaction."""
+    conn.execute(f"UPDATE {ID_SEQUENCE} SET last_id = last_id + ?", (count,))
+    return conn.execute(f"SELECT last_id FROM {ID_SEQUENCE}").fetchone()[0] - count + 1
+
+
+def renumber_partition_ids(conn: sqlite3.Connection):
+    """
+    Shift the ids of partitions that overlap an older partition's ids
+    (each one used to start its own AUTOINCREMENT at 1), oldest first,
+    keeping the order within each partition.
+    """
+    next_id = 1
+    for table in list_partitions(conn):
+        low, high = conn.execute(f"SELECT MIN(id), MAX(id) FROM {table}").fetchone()
+        if low is None:
+            continue
+        if low < next_id:
+            shift = next_id - low
+            # Through negative ids, so no intermediate value collides
+            conn.execute(f"UPDATE {table} SET id = -id")
+            conn.execute(f"UPDATE {table} SET id = ? - id", (shift,))
+            high += shift
+        next_id = high + 1
+
+
+def insert_rows(conn: sqlite3.Connection, insert_sql: str, rows: List[tuple], ts_index: int) -> List[int]:
+    """
+    Insert rows into their day partitions. `insert_sql` has a {table}
+    placeholder and takes the row id as its first parameter, followed by
+    the row's values; `ts_index` is the position of ts_ms in each row.
+    Returns the ids given to the rows, in order.
+    """
+    first_id = allocate_ids(conn, len(rows)) if rows else 0
+    by_table: Dict[str, List[tuple]] = {}
+    for offset, row in enumerate(rows):
+        by_table.setdefault(partition_for_ms(row[ts_index]), []).append((first_id + offset,) + tuple(row))
+    ensure_partitions(conn, by_table)
+    for table, table_rows in by_table.items():
+        conn.executemany(insert_sql.format(table=table), table_rows)
+    return [first_id + offset for offset in range(len(rows))]
+
+
+def recent_rows(conn: sqlite3.Connection, columns: str, limit: int) -> List[tuple]:
+    """
+    Newest rows first. Walks partitions from the newest day so ORDER BY
+    ... LIMIT touches only the last partition(s) instead of the whole view.
+    """
+    rows: List[tuple] = []
+    for table in reversed(list_partitions(conn)):
+        remaining = limit - len(rows)
+        if remaining <= 0:
+            break
+        rows += conn.execute(
+            f"SELECT {columns} FROM {table} ORDER BY ts_ms DESC LIMIT ?", (remaining,)
+        ).fetchall()
+    return rows
+
+
+def iter_recent_rows(conn: sqlite3.Connection, columns: str, size: int = 5000) -> Iterator[List[tuple]]:
+    """
+    Every row, newest first, in chunks of up to `size` rows. Each partition
+    is read with fetchmany(), so memory stays bounded whatever the total.
+    Run it inside one read transaction for a consistent snapshot.
+    """
+    tables = list(reversed(list_partitions(conn))) if is_partitioned(conn) else [VIEW_NAME]
+    for table in tables:
+        cursor = conn.execute(f"SELECT {columns} FROM {table} ORDER BY ts_ms DESC")
+        try:
+            while True:
+                chunk = cursor.fetchmany(size)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            cursor.close()
+
+
+def partition_from_table(conn: sqlite3.Connection):
+    """
+    One-time conversion of a plain detector_logs table into day partitions
+    behind a view. Runs inside the caller's transaction.
+    """
+    legacy = f"{VIEW_NAME}_unpartitioned"
+    conn.execute(f"ALTER TABLE {VIEW_NAME} RENAME TO {legacy}")
+
+    days = [
+        row[0]
+        for row in conn.execute(
+            f"SELECT DISTINCT date(COALESCE(ts_ms, 0) / 1000, 'unixepoch', 'localtime') FROM {legacy}"
+        )
+    ]
+    columns = ", ".join(COLUMNS)
+    for day_text in days:
+        day = datetime.strptime(day_text, "%Y-%m-%d").date()
+        table = create_partition(conn, day, refresh=False)
+        start, end = _day_start_ms(day), _day_start_ms(day + timedelta(days=1))
+        conn.execute(
+            f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {legacy} "
+            "WHERE COALESCE(ts_ms, 0) >= ? AND COALESCE(ts_ms, 0) < ?",
+            (start, end),
+        )
+
+    conn.execute(f"DROP TABLE {legacy}")
+    refresh_view(conn)
+
+
+def drop_partitions(conn: sqlite3.Connection, tables: List[str]):
+    """Drop partitions and the rollup buckets of their days."""
+    with _transaction(conn):
+        existing = set(list_partitions(conn))
+        for table in tables:
+            if table in existing:
+                day = _day_of(table)
+                remove_rollups_between(conn, table, _day_start_ms(day), _day_start_ms(day + timedelta(days=1)))
+            conn.execute(f"DROP TABLE IF EXISTS {table}")
+        refresh_view(conn)
+
+
+def clear_all(conn: sqlite3.Connection) -> int:
+    """Drop every partition. Returns the number of detections removed."""
+    with _transaction(conn):
+        # Counted from the hourly rollup; COUNT(*) would visit every row
+        removed = rollup_summary(conn)["total"]
+        drop_partitions(conn, list_partitions(conn))
+        clear_rollups(conn)
+    return removed
+
+
+def expire_partitions(conn: sqlite3.Connection, retention_days: int = RETENTION_DAYS) -> List[str]:
+    """Drop partitions older than the retention window."""
+    if retention_days <= 0:
+        return []
+    cutoff = date.today() - timedelta(days=retention_days)
+    expired = [table for table in list_partitions(conn) if _day_of(table) < cutoff]
+    if expired:
+        drop_partitions(conn, expired)
+    return expired
+
+
+def incremental_vacuum(conn: sqlite3.Connection, pages: int = VACUUM_PAGES) -> int:
+    """Release up to `pages` free pages to the OS. Returns pages still free."""
+    conn.execute(f"PRAGMA incremental_vacuum({int(pages)})").fetchall()
+    return conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+
+def enable_incremental_vacuum(conn: sqlite3.Connection):
+    """Switch an existing database to auto_vacuum=INCREMENTAL (needs a full VACUUM once)."""
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+        return
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.execute("VACUUM")
+
+
+class RetentionWorker:
+    """
+    Background thread that expires old partitions and vacuums freed
+    pages a chunk at a time, so neither blocks API requests for long.
+    """
+
+    def __init__(self, connect, interval: float = 3600.0, retention_days: int = RETENTION_DAYS):
+        self._connect = connect
+        self.interval = interval
+        self.retention_days = retention_days
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_run: Optional[str] = None
+        self.expired: List[str] = []
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        if self.retention_days > 0:
+            print(f"[DB] Retention on: day partitions older than {self.retention_days} days will be dropped")
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="detector-logs-retention", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def run_once(self):
+        conn = self._connect()
+        try:
+            self.expired = expire_partitions(conn, self.retention_days)
+            if self.expired:
+                print(f"[DB] Retention dropped {len(self.expired)} partition(s): {', '.join(self.expired)}")
+            # Free pages in small steps, yielding to writers between them
+            while incremental_vacuum(conn) > 0 and not self._stop.wait(0.05):
+                pass
+        finally:
+            conn.close()
+        self.last_run = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"[DB] Retention error: {e}")
+            self._stop.wait(self.interval)
+
+    def status(self) -> dict:
+        return {
+            "retention_days": self.retention_days,
+            "last_run": self.last_run,
+            "last_expired": self.expired,
+        }
@@ -0,0 +1,154 @@
+"""
+In-memory rolling window of recent detections.
+
+Every logged detection is also added here (see db_logger), so "what did
+the last N minutes look like" can be answered without touching SQLite.
+
+The window keeps running totals (emotions, postures, eye states,
+sentiment) plus a ring of per-second snapshots of those totals. The
+totals for [now - N s, now] are the current totals minus the snapshot
+taken at the start of that second, so a query costs the number of
+distinct labels, independent of how many frames the window holds.
+Windows reaching back before the buffer (older than `capacity_seconds`,
+or before the first detection this process saw) return None and the
+caller falls back to the database.
+"""
+import threading
+import time
+from collections import Counter, deque
+from typing import Dict, Optional
+
+# Seconds of history kept in memory
+WINDOW_SECONDS = 3600
+# Emotions kept for the "recent_emotions" context
+RECENT_EMOTIONS = 10
+
+
+class _Totals:
+    """Running counts since the window was created."""
+
+    __slots__ = ("samples", "emotions", "postures", "eyes", "sentiment_sum", "sentiment_count")
+
+    def __init__(self):
+        self.samples = 0
+        self.emotions = Counter()
+        self.postures = Counter()
+        self.eyes = Counter()
+        self.sentiment_sum = 0.0
+        self.sentiment_count = 0
+
+    def copy(self) -> "_Totals":
+        other = _Totals()
+        other.samples = self.samples
+        other.emotions = self.emotions.copy()
+        other.postures = self.postures.copy()
+        other.eyes = self.eyes.copy()
+        other.sentiment_sum = self.sentiment_sum
+        other.sentiment_count = self.sentiment_count
+        return other
+
+
+class RecentWindow:
+    """
+    Thread-safe rolling window fed by the detection logger.
+
+    Args:
+        capacity_seconds: history kept; older windows are not answered
+    """
+
+    def __init__(self, capacity_seconds: int = WINDOW_SECONDS):
+        self.capacity = capacity_seconds
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._totals = _Totals()
+            # slot = second % capacity -> (second, totals at the start of that second)
+            self._ring = [None] * self.capacity
+            self._second: Optional[int] = None
+            self._first_second: Optional[int] = None
+            self._recent = deque(maxlen=RECENT_EMOTIONS)
+
+    def add(self, entry: dict, now: Optional[float] = None):
+        """Add one detection entry (timestamped on arrival)."""
+        now = time.time() if now is None else now
+        second = int(now)
+        with self._lock:
+            self._advance(second)
+            totals = self._totals
+            totals.samples += 1
+            emotion = entry.get("emotion")
+            if emotion:
+                totals.emotions[emotion] += 1
+                self._recent.append((now, emotion))
+            if entry.get("posture"):
+                totals.postures[entry["posture"]] += 1
+            if entry.get("eyes"):
+                totals.eyes[entry["eyes"]] += 1
+            sentiment = entry.get("sentiment")
+            if sentiment is not None:
+                totals.sentiment_sum += sentiment
+                totals.sentiment_count += 1
+
+    def _advance(self, second: int):
+        """Snapshot the totals for every second from the last one up to `second`."""
+        if self._second is None:
+            self._first_second = self._second = second
+            self._ring[second % self.capacity] = (second, self._totals.copy())
+            return
+        if second <= self._second:
+            # Same second, or a clock step backwards: count it in the current second
+            return
+        # Seconds without detections share one snapshot; only the last
+        # `capacity` of them can ever be queried
+        snapshot = self._totals.copy()
+        for missing in range(max(self._second + 1, second - self.capacity + 1), second + 1):
+            self._ring[missing % self.capacity] = (missing, snapshot)
+        self._second = second
+
+    def summary(self, minutes: float, now: Optional[float] = None) -> Optional[Dict]:
+        """
+        Totals over the last `minutes`, or None if the window reaches back
+        further than the buffer covers:
+        {"samples", "emotions", "postures", "eyes": Counter,
+         "sentiment_sum", "sentiment_count", "recent_emotions": [newest first]}
+        """
+        now = time.time() if now is None else now
+        start = int(now - minutes * 60)
+        with self._lock:
+            if self._first_second is None or start < self._first_second:
+                return None
+            if now - start > self.capacity:
+                return None
+            current = self._totals
+            if start > self._second:
+                base = current  # nothing logged inside the window
+            else:
+                slot = self._ring[start % self.capacity]
+                if slot is None or slot[0] != start:
+                    return None
+                base = slot[1]
+            recent = [emotion for ts, emotion in reversed(self._recent) if ts >= start]
+            return {
+                "samples": current.samples - base.samples,
+                "emotions": current.emotions - base.emotions,
+                "postures": current.postures - base.postures,
+                "eyes": current.eyes - base.eyes,
+                "sentiment_sum": current.sentiment_sum - base.sentiment_sum,
+                "sentiment_count": current.sentiment_count - base.sentiment_count,
+                "recent_emotions": recent,
+            }
+
+    def status(self) -> dict:
+        with self._lock:
+            covered = 0 if self._first_second is None else min(int(time.time()) - self._first_second, self.capacity)
+            return {
+                "capacity_seconds": self.capacity,
+                "covered_seconds": max(covered, 0),
+                "samples": self._totals.samples,
+            }
+
+
+# Shared by the detection logger (writer side) and TaskRecommender (reader side)
+recent_window = RecentWindow()
@@ -0,0 +1,195 @@
+"""
+Per-minute and per-hour rollups of detector_logs.
+
+Each rollup row holds, for one time bucket and (emotion, posture) pair,
+the number of detections and the sentiment sum/count. Rows are upserted
+in the same transaction as the raw inserts (see db_logger), so stats
+endpoints read a table that grows with elapsed time rather than with
+the number of detections.
+"""
+import sqlite3
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, Optional, Tuple
+
+MINUTE_MS = 60_000
+HOUR_MS = 3_600_000
+
+# table name -> bucket width in ms
+ROLLUP_TABLES = {
+    "detector_rollup_minute": MINUTE_MS,
+    "detector_rollup_hour": HOUR_MS,
+}
+
+# NULL cannot take part in the upsert's unique key, so it is stored as ''
+_MISSING = ""
+
+# (ts_ms, emotion, posture, sentiment, weight); weight is the number of detections
+RollupSample = Tuple[int, Optional[str], Optional[str], Optional[float], int]
+
+
+def create_rollup_tables(conn: sqlite3.Connection):
+    for table in ROLLUP_TABLES:
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                bucket_ms INTEGER NOT NULL,
+                emotion TEXT NOT NULL,
+                posture TEXT NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0,
+                sentiment_sum REAL NOT NULL DEFAULT 0,
+                sentiment_count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (bucket_ms, emotion, posture)
+            ) WITHOUT ROWID
+        """)
+
+
+def _weight(conn: sqlite3.Connection, source: str) -> str:
+    """SQL for the detections a row stands for (interval rows: sample_count)."""
+    columns = [row[1] for row in conn.execute(f"PRAGMA table_info({source})")]
+    return "sample_count" if "sample_count" in columns else "1"
+
+
+def _bucket_totals_sql(source: str, width: int, weight: str, where: str = "") -> str:
+    """SELECT of (bucket_ms, emotion, posture, count, sentiment_sum, sentiment_count) over `source`."""
+    return f"""
+        SELECT (ts_ms / {width}) * {width}, COALESCE(emotion, ''), COALESCE(posture, ''),
+               SUM({weight}), COALESCE(SUM(sentiment * {weight}), 0),
+               COALESCE(SUM(CASE WHEN sentiment IS NOT NULL THEN {weight} END), 0)
+        FROM {source}
+        WHERE ts_ms IS NOT NULL {where}
+        GROUP BY 1, 2, 3
+    """
+
+
+def rebuild_rollups(conn: sqlite3.Connection, source: str = "detector_logs"):
+    """Recompute every rollup from the raw table (used by migrations)."""
+    weight = _weight(conn, source)
+    for table, width in ROLLUP_TABLES.items():
+        conn.execute(f"DELETE FROM {table}")
+        conn.execute(f"""
+            INSERT INTO {table} (bucket_ms, emotion, posture, count, sentiment_sum, sentiment_count)
+            {_bucket_totals_sql(source, width, weight)}
+        """)
+
+
+def apply_rollups(conn: sqlite3.Connection, samples: Iterable[RollupSample]):
+    """
+    Add samples to every rollup. Call inside the transaction that inserts
+    the raw rows so rollups and raw data never disagree.
+    """
+    samples = list(samples)
+    if not samples:
+        return
+    for table, width in ROLLUP_TABLES.items():
+        buckets: Dict[tuple, list] = defaultdict(lambda: [0, 0.0, 0])
+        for ts_ms, emotion, posture, sentiment, weight in samples:
+            key = ((ts_ms // width) * width, emotion or _MISSING, posture or _MISSING)
+            totals = buckets[key]
+            totals[0] += weight
+            if sentiment is not None:
+                totals[1] += sentiment * weight
+                totals[2] += weight
+        conn.executemany(f"""
+            INSERT INTO {table} (bucket_ms, emotion, posture, count, sentiment_sum, sentiment_count)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (bucket_ms, emotion, posture) DO UPDATE SET
+                count = count + excluded.count,
+                sentiment_sum = sentiment_sum + excluded.sentiment_sum,
+                sentiment_count = sentiment_count + excluded.sentiment_count
+        """, [key + tuple(totals) for key, totals in buckets.items()])
+
+
+def clear_rollups(conn: sqlite3.Connection):
+    for table in ROLLUP_TABLES:
+        conn.execute(f"DELETE FROM {table}")
+
+
+def remove_rollups_between(conn: sqlite3.Connection, source: str, start_ms: int, end_ms: int):
+    """
+    Take the rows of `source` in [start_ms, end_ms) out of the rollups,
+    e.g. a day partition about to be dropped. Buckets are aligned to the
+    epoch, so a local day need not start or end on one (UTC offsets of
+    half an hour): buckets wholly inside the range are deleted, the two
+    straddling its edges only lose `source`'s share.
+    """
+    weight = _weight(conn, source)
+    for table, width in ROLLUP_TABLES.items():
+        first_full = -(-start_ms // width) * width
+        end_full = (end_ms // width) * width
+        if first_full < end_full:
+            conn.execute(f"DELETE FROM {table} WHERE bucket_ms >= ? AND bucket_ms < ?", (first_full, end_full))
+            edges = [(start_ms, first_full), (end_full, end_ms)]
+        else:
+            edges = [(start_ms, end_ms)]
+        for low, high in edges:
+            if low >= high:
+                continue
+            totals = conn.execute(
+                _bucket_totals_sql(source, width, weight, "AND ts_ms >= ? AND ts_ms < ?"), (low, high)
+            ).fetchall()
+            conn.executemany(f"""
+                UPDATE {table} SET
+                    count = count - ?,
+                    sentiment_sum = sentiment_sum - ?,
+                    sentiment_count = sentiment_count - ?
+                WHERE bucket_ms = ? AND emotion = ? AND posture = ?
+            """, [(count, s_sum, s_count, bucket, emotion, posture)
+                  for bucket, emotion, posture, count, s_sum, s_count in totals])
+            conn.execute(f"DELETE FROM {table} WHERE bucket_ms >= ? AND bucket_ms < ? AND count <= 0",
+                         ((low // width) * width, high))
+
+
+def _rollup_rows(conn: sqlite3.Connection, since_ms: Optional[int]):
+    """
+    (emotion, posture, count, sentiment_sum, sentiment_count) rows covering
+    [since_ms, now]: whole hours from the hourly table, the partial hour at
+    the start of the window from the minute table.
+    """
+    select = "SELECT emotion, posture, SUM(count), SUM(sentiment_sum), SUM(sentiment_count) FROM {table} {where} GROUP BY emotion, posture"
+    if since_ms is None:
+        return conn.execute(select.format(table="detector_rollup_hour", where="")).fetchall()
+
+    first_full_hour = -(-since_ms // HOUR_MS) * HOUR_MS
+    minute_start = (since_ms // MINUTE_MS) * MINUTE_MS
+    rows = conn.execute(
+        select.format(table="detector_rollup_minute", where="WHERE bucket_ms >= ? AND bucket_ms < ?"),
+        (minute_start, first_full_hour),
+    ).fetchall()
+    rows += conn.execute(
+        select.format(table="detector_rollup_hour", where="WHERE bucket_ms >= ?"),
+        (first_full_hour,),
+    ).fetchall()
+    return rows
+
+
+def rollup_summary(conn: sqlite3.Connection, since_ms: Optional[int] = None) -> Dict:
+    """
+    Totals since `since_ms` (minute resolution) or over all data:
+    {"total", "emotions": Counter, "postures": Counter,
+     "emotion_sentiment": {emotion: avg}, "average_sentiment"}
+    """
+    emotions, postures = Counter(), Counter()
+    emotion_sentiment = defaultdict(lambda: [0.0, 0])
+    total = sentiment_count = 0
+    sentiment_sum = 0.0
+
+    for emotion, posture, count, s_sum, s_count in _rollup_rows(conn, since_ms):
+        emotion = emotion or None
+        posture = posture or None
+        emotions[emotion] += count
+        postures[posture] += count
+        emotion_sentiment[emotion][0] += s_sum
+        emotion_sentiment[emotion][1] += s_count
+        total += count
+        sentiment_sum += s_sum
+        sentiment_count += s_count
+
+    return {
+        "total": total,
+        "emotions": emotions,
+        "postures": postures,
+        "emotion_sentiment": {
+            emotion: (s_sum / s_count if s_count else None)
+            for emotion, (s_sum, s_count) in emotion_sentiment.items()
+        },
+        "average_sentiment": sentiment_sum / sentiment_count if sentiment_count else None,
+    }
@@ -0,0 +1,167 @@
+"""
+Write-behind batching for log sinks.
+
+Hot paths (the ~30 fps detection loop) call enqueue(), which is a single
+queue put. A background thread groups entries and hands each batch to a
+flush callback every `flush_interval` seconds or `max_batch` entries,
+whichever comes first, so a sink pays one transaction / file open per
+batch instead of per entry.
+"""
+import atexit
+import queue
+import threading
+import time
+import weakref
+from typing import Callable, List, Optional
+
+_STOP = object()
+
+# Every live writer, so shutdown can drain them all
+_writers = weakref.WeakSet()
+
+
+class _FlushRequest:
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class BatchWriter:
+    """
+    Background batching writer.
+
+    Args:
+        name:           label used in log messages and stats
+        flush:          callable receiving a list of entries; runs on the
+                        writer thread, so it may own thread-bound resources
+        flush_interval: maximum seconds an entry waits before being written
+        max_batch:      entries per flush call at most
+        max_queue:      queued entries before new ones are dropped
+        on_close:       optional callable run on the writer thread at exit
+    """
+
+    def __init__(
+        self,
+        name: str,
+        flush: Callable[[List], None],
+        flush_interval: float = 0.25,
+        max_batch: int = 500,
+        max_queue: int = 10000,
+        on_close: Optional[Callable[[], None]] = None,
+    ):
+        self.name = name
+        self._flush = flush
+        self._on_close = on_close
+        self.flush_interval = flush_interval
+        self.max_batch = max(1, max_batch)
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self.stats = {"enqueued": 0, "written": 0, "batches": 0, "dropped": 0, "errors": 0}
+        _writers.add(self)
+
+    @property
+    def queue_length(self) -> int:
+        return self._queue.qsize()
+
+    def enqueue(self, entry) -> bool:
+        """Queue one entry without blocking. Returns False if it was dropped."""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.stats["dropped"] += 1
+            return False
+        self.stats["enqueued"] += 1
+        return True
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Block until everything enqueued so far has been written."""
+        if self._thread is None or not self._thread.is_alive():
+            return True
+        request = _FlushRequest()
+        try:
+            self._queue.put(request, timeout=timeout)
+        except queue.Full:
+            return False
+        return request.done.wait(timeout)
+
+    def close(self, timeout: float = 5.0):
+        """Write pending entries and stop the writer thread."""
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            print(f"[{self.name}] Writer queue full at shutdown; pending entries may be lost")
+            return
+        thread.join(timeout)
+
+    def status(self) -> dict:
+        return {"queue_length": self.queue_length, **self.stats}
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=f"{self.name}-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        batch = []
+        deadline = None
+        try:
+            while True:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = None
+
+                if item is _STOP:
+                    self._write(batch)
+                    return
+                if isinstance(item, _FlushRequest):
+                    self._write(batch)
+                    batch, deadline = [], None
+                    item.done.set()
+                    continue
+                if item is not None:
+                    if not batch:
+                        deadline = time.monotonic() + self.flush_interval
+                    batch.append(item)
+
+                if len(batch) >= self.max_batch or (batch and time.monotonic() >= deadline):
+                    self._write(batch)
+                    batch, deadline = [], None
+        finally:
+            if self._on_close is not None:
+                try:
+                    self._on_close()
+                except Exception as e:
+                    print(f"[{self.name}] Writer close error: {e}")
+
+    def _write(self, batch: List):
+        if not batch:
+            return
+        try:
+            self._flush(batch)
+            self.stats["written"] += len(batch)
+            self.stats["batches"] += 1
+        except Exception as e:
+            self.stats["errors"] += 1
+            print(f"[{self.name}] Batch write error ({len(batch)} entries): {e}")
+
+
+def close_all_writers(timeout: float = 5.0):
+    """Drain and stop every BatchWriter (called on shutdown)."""
+    for writer in list(_writers):
+        writer.close(timeout)
+
+
+def writers_status() -> dict:
+    return {writer.name: writer.status() for writer in list(_writers)}
+
+
+atexit.register(close_all_writers)
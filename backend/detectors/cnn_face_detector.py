@@ -2,29 +2,47 @@
 Backend face detector adapter.
 Uses the new src/core detector implementation.
 """
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
 import numpy as np
 
 from backend.src.core.face_detector import SimpleFaceDetector
+from backend.src.core.face_tracker import FaceTracker
 
 
 class CNNFaceDetector:
     """
     Compatibility adapter for legacy backend API.
-    Internally delegates to src.core.face_detector.SimpleFaceDetector.
+    Internally delegates to src.core.face_detector.SimpleFaceDetector,
+    tracked between detections by src.core.face_tracker.FaceTracker.
+
+    Tracking state belongs to one frame source: callers with several
+    sources (camera, browser uploads) pass each its own new_tracker().
     """
 
-    def __init__(self, confidence_threshold: float = 0.5):
+    def __init__(self, confidence_threshold: float = 0.5, track: bool = True):
         self.confidence_threshold = confidence_threshold
+        self.track = track
         self._detector = SimpleFaceDetector()
+        self._tracker = self.new_tracker()
+
+    def new_tracker(self) -> Optional[FaceTracker]:
+        """Tracker for another frame source, sharing this detector's cascade."""
+        return FaceTracker(self._detector) if self.track else None
 
-    def detect_faces(self, frame: np.ndarray) -> List[Tuple[int, int, int, int]]:
+    def detect_faces(self, frame: np.ndarray, tracker: Optional[FaceTracker] = None) -> List[Tuple[int, int, int, int]]:
         if frame is None or frame.size == 0:
             return []
+        tracker = tracker or self._tracker
+        if tracker is not None:
+            return tracker.update(frame)
         faces = self._detector.detect(frame)
         return [tuple(map(int, face)) for face in faces]
 
+    def reset_tracking(self):
+        if self._tracker is not None:
+            self._tracker.reset()
+
     def set_confidence_threshold(self, threshold: float):
         self.confidence_threshold = max(0.0, min(1.0, threshold))
 
@@ -32,8 +50,13 @@ class CNNFaceDetector:
         return True
 
     def get_model_info(self) -> dict:
-        return {
+        info = {
             "model_loaded": True,
             "model_type": "SimpleFaceDetector (Haar Cascade)",
             "confidence_threshold": self.confidence_threshold,
+            "tracking": self._tracker is not None,
         }
+        if self._tracker is not None:
+            info["redetect_interval"] = self._tracker.redetect_interval
+            info["tracking_stats"] = dict(self._tracker.stats)
+        return info
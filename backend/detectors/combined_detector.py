@@ -2,7 +2,7 @@
 Combined detector adapter for backend streaming.
 Uses detector components backed by the new src implementation.
 """
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import cv2
 import numpy as np
@@ -11,9 +11,24 @@ from .cnn_face_detector import CNNFaceDetector
 from .emotion_cnn import EmotionCNN
 
 
+class DetectionState:
+    """
+    Face tracks and emotion smoothing history of one frame source (the
+    camera, one browser connection). Frames from different sources must
+    not share it, or boxes and smoothed emotions leak between them.
+    """
+
+    def __init__(self, tracker=None):
+        self.tracker = tracker
+        self.emotion_history: List[str] = []
+
+
 class CombinedDetector:
     """
     Backward-compatible detector used by stream_service.
+
+    The models are shared; per-source state is passed as a DetectionState
+    from new_state(). Without one, a default state is used.
     """
 
     def __init__(self, confidence_threshold: float = 0.5, smoothing_window: int = 7):
@@ -22,18 +37,27 @@ class CombinedDetector:
         self.max_faces = 5
         self.min_face_size = (30, 30)
         self.smoothing_window = max(1, smoothing_window)
-        self.emotion_history: List[str] = []
+        self.default_state = self.new_state()
+
+    def new_state(self) -> DetectionState:
+        return DetectionState(self.face_detector.new_tracker())
 
-    def detect_faces(self, frame: np.ndarray) -> List[Tuple[int, int, int, int]]:
-        return self.face_detector.detect_faces(frame)
+    @property
+    def emotion_history(self) -> List[str]:
+        return self.default_state.emotion_history
 
-    def _smooth_emotion(self, emotion: str) -> str:
-        self.emotion_history.append(emotion)
-        if len(self.emotion_history) > self.smoothing_window:
-            self.emotion_history.pop(0)
+    def detect_faces(self, frame: np.ndarray, state: Optional[DetectionState] = None) -> List[Tuple[int, int, int, int]]:
+        state = state or self.default_state
+        return self.face_detector.detect_faces(frame, tracker=state.tracker)
+
+    def _smooth_emotion(self, emotion: str, state: DetectionState) -> str:
+        history = state.emotion_history
+        history.append(emotion)
+        if len(history) > self.smoothing_window:
+            history.pop(0)
 
         counts: Dict[str, int] = {}
-        for item in self.emotion_history:
+        for item in history:
             counts[item] = counts.get(item, 0) + 1
 
         return max(counts.items(), key=lambda item: item[1])[0]
@@ -49,21 +73,25 @@ class CombinedDetector:
             "face_detected": False,
         }
 
-    def process_frame(self, frame: np.ndarray, apply_smoothing: bool = True) -> Dict:
+    def process_frame(self, frame: np.ndarray, apply_smoothing: bool = True,
+                      state: Optional[DetectionState] = None) -> Dict:
         if frame is None or frame.size == 0:
             return self._empty_result()
 
-        faces = self.detect_faces(frame)
+        state = state or self.default_state
+        faces = self.detect_faces(frame, state)
         if not faces:
             return self._empty_result()
 
-        face_results = []
-        for bbox in faces[: self.max_faces]:
-            x, y, w, h = bbox
-            if w < self.min_face_size[0] or h < self.min_face_size[1]:
-                continue
+        boxes = [
+            bbox
+            for bbox in faces[: self.max_faces]
+            if bbox[2] >= self.min_face_size[0] and bbox[3] >= self.min_face_size[1]
+        ]
 
-            emotion_result = self.emotion_detector.process_frame(frame, bbox)
+        # All faces go through the emotion model in a single batch
+        face_results = []
+        for bbox, emotion_result in zip(boxes, self.emotion_detector.process_faces(frame, boxes)):
             face_results.append(
                 {
                     "bbox": bbox,
@@ -81,7 +109,7 @@ class CombinedDetector:
         primary = max(face_results, key=lambda item: item["bbox"][2] * item["bbox"][3])
         primary_emotion = primary["emotion"]
         if apply_smoothing:
-            primary_emotion = self._smooth_emotion(primary_emotion)
+            primary_emotion = self._smooth_emotion(primary_emotion, state)
 
         return {
             "faces_detected": len(faces),
@@ -97,6 +125,10 @@ class CombinedDetector:
         }
 
     def draw_results(self, frame: np.ndarray, results: Dict) -> np.ndarray:
+        """
+        Draw an existing process_frame() result onto a copy of the frame.
+        Does not run detection or touch the smoothing history.
+        """
         annotated = frame.copy()
 
         if not results.get("face_detected"):
@@ -136,12 +168,24 @@ class CombinedDetector:
         )
         return annotated
 
-    def detect_and_annotate(self, frame: np.ndarray, apply_smoothing: bool = True, show_detailed_box: bool = True):
-        results = self.process_frame(frame, apply_smoothing=apply_smoothing)
+    def detect_and_annotate(
+        self,
+        frame: np.ndarray,
+        apply_smoothing: bool = True,
+        show_detailed_box: bool = True,
+        results: Optional[Dict] = None,
+    ):
+        """
+        Annotate a frame, running detection only when no result is supplied.
+        Pass the result of an earlier process_frame() call to avoid a second
+        inference pass on the same frame.
+        """
+        if results is None:
+            results = self.process_frame(frame, apply_smoothing=apply_smoothing)
         return self.draw_results(frame, results), results
 
-    def reset_smoothing(self):
-        self.emotion_history = []
+    def reset_smoothing(self, state: Optional[DetectionState] = None):
+        (state or self.default_state).emotion_history.clear()
 
     def close(self):
         self.emotion_detector.close()
@@ -2,7 +2,7 @@
 Backend emotion detector adapter.
 Uses the new src/core emotion analyzer implementation.
 """
-from typing import Dict, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 
 import numpy as np
 
@@ -17,8 +17,9 @@ class EmotionCNN:
 
     def __init__(self):
         self.emotions = ["Happy", "Neutral"]
+        # Only the synchronous analyze_batch() is used, so the analyzer's
+        # worker thread is never started
         self._analyzer = EmotionAnalyzer()
-        self._analyzer.start()
 
     def _to_title_probs(self, probabilities: Dict[str, float]) -> Dict[str, float]:
         if not probabilities:
@@ -36,17 +37,19 @@ class EmotionCNN:
 
         return title_probs
 
-    def process_frame(self, frame: np.ndarray, face_bbox: Tuple[int, int, int, int]) -> Dict:
-        x, y, w, h = face_bbox
+    def _neutral_result(self) -> Dict:
+        return {
+            "emotion": "Neutral",
+            "confidence": 0.0,
+            "probabilities": {"Happy": 0.0, "Neutral": 1.0},
+            "intensity": "Low",
+            "features": {},
+        }
 
-        if frame is None or frame.size == 0 or w <= 0 or h <= 0:
-            return {
-                "emotion": "Neutral",
-                "confidence": 0.0,
-                "probabilities": {"Happy": 0.0, "Neutral": 1.0},
-                "intensity": "Low",
-                "features": {},
-            }
+    def _crop(self, frame: np.ndarray, face_bbox: Tuple[int, int, int, int]) -> Optional[np.ndarray]:
+        x, y, w, h = face_bbox
+        if w <= 0 or h <= 0:
+            return None
 
         frame_h, frame_w = frame.shape[:2]
         x = max(0, x)
@@ -55,18 +58,9 @@ class EmotionCNN:
         h = min(h, frame_h - y)
 
         face_roi = frame[y : y + h, x : x + w]
-        if face_roi.size == 0:
-            return {
-                "emotion": "Neutral",
-                "confidence": 0.0,
-                "probabilities": {"Happy": 0.0, "Neutral": 1.0},
-                "intensity": "Low",
-                "features": {},
-            }
-
-        self._analyzer.analyze(face_roi)
-        emotion, probabilities = self._analyzer.get_results()
+        return face_roi if face_roi.size > 0 else None
 
+    def _to_result(self, emotion: str, probabilities: Dict[str, float]) -> Dict:
         emotion_title = str(emotion).title() if emotion else "Neutral"
         mapped_probabilities = self._to_title_probs(probabilities)
         confidence = float(mapped_probabilities.get(emotion_title, 0.0))
@@ -86,5 +80,25 @@ class EmotionCNN:
             "features": {},
         }
 
+    def process_faces(self, frame: np.ndarray, face_bboxes: Sequence[Tuple[int, int, int, int]]) -> List[Dict]:
+        """
+        Classify every face in a frame with one batched model call.
+        Returns one result per bbox, in the same order.
+        """
+        if frame is None or frame.size == 0:
+            return [self._neutral_result() for _ in face_bboxes]
+
+        crops = [self._crop(frame, bbox) for bbox in face_bboxes]
+        valid = [i for i, crop in enumerate(crops) if crop is not None]
+        analyzed = self._analyzer.analyze_batch([crops[i] for i in valid])
+
+        results = [self._neutral_result() for _ in face_bboxes]
+        for i, (emotion, probabilities) in zip(valid, analyzed):
+            results[i] = self._to_result(emotion, probabilities)
+        return results
+
+    def process_frame(self, frame: np.ndarray, face_bbox: Tuple[int, int, int, int]) -> Dict:
+        return self.process_faces(frame, [face_bbox])[0]
+
     def close(self):
         self._analyzer.stop()
@@ -0,0 +1 @@
+"""Background jobs for heavy reports and exports."""
@@ -0,0 +1,217 @@
+# backend/jobs/runner.py
+"""
+Local job runner for reports that take too long for a request.
+
+Jobs run on a process pool, so they neither hold a request open nor
+occupy the threadpool serving /api/stream and /api/nlp, and CPU-heavy
+work (Excel writing, plotting) doesn't compete for the GIL. Each job
+gets a directory under JOBS_DIR:
+
+    <job id>/progress.json   {"done", "total"}, written by the worker
+    <job id>/meta.json       written when the job finishes
+    <job id>/<artifact>      the report itself
+
+Finished artifacts are kept for `ttl` seconds. Submitting the same kind
+and parameters again within that time (or while the first job is still
+running) returns the existing job instead of starting another.
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple
+
+from backend.analytics.data_logger import LOG_DIR
+from backend.jobs.tasks import TASKS, run_task
+
+JOBS_DIR = os.path.join(LOG_DIR, "jobs")
+# Seconds a finished artifact is kept and reused
+JOB_TTL = int(os.getenv("SYNTWIN_JOB_TTL", "1800"))
+JOB_WORKERS = int(os.getenv("SYNTWIN_JOB_WORKERS", "2"))
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class Job:
+    def __init__(self, job_id: str, kind: str, params: dict, key: str, directory: str):
+        self.id = job_id
+        self.kind = kind
+        self.params = params
+        self.key = key
+        self.dir = directory
+        self.status = QUEUED
+        self.created = time.time()
+        self.finished: Optional[float] = None
+        self.artifact: Optional[str] = None
+        self.error: Optional[str] = None
+
+    @property
+    def artifact_path(self) -> Optional[str]:
+        return os.path.join(self.dir, self.artifact) if self.artifact else None
+
+    def progress(self) -> dict:
+        if self.status == DONE:
+            return {"done": 1, "total": 1, "fraction": 1.0}
+        try:
+            with open(os.path.join(self.dir, "progress.json")) as f:
+                progress = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {"done": 0, "total": 0, "fraction": 0.0}
+        total = progress.get("total") or 0
+        progress["fraction"] = round(min(1.0, progress.get("done", 0) / total), 3) if total else 0.0
+        return progress
+
+    def to_dict(self) -> dict:
+        status = self.status
+        if status == QUEUED and os.path.exists(os.path.join(self.dir, "progress.json")):
+            status = RUNNING
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": status,
+            "progress": self.progress(),
+            "created": self.created,
+            "finished": self.finished,
+            "artifact": self.artifact,
+            "error": self.error,
+        }
+
+    def save(self):
+        with open(os.path.join(self.dir, "meta.json"), "w") as f:
+            json.dump(dict(self.to_dict(), key=self.key), f)
+
+    @classmethod
+    def load(cls, directory: str) -> Optional["Job"]:
+        try:
+            with open(os.path.join(directory, "meta.json")) as f:
+                meta = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        job = cls(meta["id"], meta["kind"], meta["params"], meta["key"], directory)
+        job.status = meta["status"]
+        job.created = meta["created"]
+        job.finished = meta["finished"]
+        job.artifact = meta["artifact"]
+        job.error = meta["error"]
+        return job
+
+
+def job_key(kind: str, params: dict) -> str:
+    return hashlib.sha1(json.dumps([kind, params], sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class JobRunner:
+    """
+    Args:
+        jobs_dir:      where job directories live
+        workers:       worker processes
+        ttl:           seconds finished artifacts are kept and reused
+        task_defaults: parameters passed to every task but not part of
+                       its identity (database path, log file)
+    """
+
+    def __init__(self, jobs_dir=JOBS_DIR, workers: int = JOB_WORKERS, ttl: int = JOB_TTL,
+                 task_defaults: Optional[dict] = None):
+        self.jobs_dir = str(jobs_dir)
+        self.workers = workers
+        self.ttl = ttl
+        self.task_defaults = task_defaults or {}
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._jobs: Dict[str, Job] = {}
+        self.stats = {"submitted": 0, "reused": 0, "completed": 0, "failed": 0}
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        """Pick up finished jobs from a previous run; drop everything else."""
+        for name in os.listdir(self.jobs_dir):
+            directory = os.path.join(self.jobs_dir, name)
+            job = Job.load(directory)
+            if job is not None and job.status == DONE and not self._expired(job):
+                self._jobs[job.id] = job
+            else:
+                shutil.rmtree(directory, ignore_errors=True)
+
+    def _expired(self, job: Job) -> bool:
+        return job.finished is not None and time.time() - job.finished > self.ttl
+
+    def _purge_expired(self):
+        for job in [job for job in self._jobs.values() if self._expired(job)]:
+            del self._jobs[job.id]
+            shutil.rmtree(job.dir, ignore_errors=True)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: forking the API server would copy its threads' locks
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    def submit(self, kind: str, params: Optional[dict] = None) -> Tuple[Job, bool]:
+        """Start a job, or return a running/fresh one with the same parameters. Returns (job, reused)."""
+        if kind not in TASKS:
+            raise ValueError(f"Unknown job kind '{kind}'. Available: {', '.join(TASKS)}")
+        params = params or {}
+        key = job_key(kind, params)
+        with self._lock:
+            self._purge_expired()
+            for job in self._jobs.values():
+                if job.key == key and job.status in (QUEUED, DONE):
+                    self.stats["reused"] += 1
+                    return job, True
+
+            job_id = uuid.uuid4().hex[:12]
+            job = Job(job_id, kind, params, key, os.path.join(self.jobs_dir, job_id))
+            os.makedirs(job.dir)
+            args = (kind, {**self.task_defaults, **params}, job.dir, os.path.join(job.dir, "progress.json"))
+            try:
+                future = self._get_pool().submit(run_task, *args)
+            except BrokenProcessPool:
+                # A worker died (e.g. killed); start a fresh pool
+                self._pool = None
+                future = self._get_pool().submit(run_task, *args)
+            self._jobs[job_id] = job
+            self.stats["submitted"] += 1
+        future.add_done_callback(lambda f: self._finished(job, f))
+        return job, False
+
+    def _finished(self, job: Job, future):
+        try:
+            job.artifact = future.result()
+            job.status = DONE
+            self.stats["completed"] += 1
+        except Exception as e:
+            job.error = str(e) or type(e).__name__
+            job.status = FAILED
+            self.stats["failed"] += 1
+            print(f"[jobs] {job.kind} job {job.id} failed: {job.error}")
+        job.finished = time.time()
+        try:
+            job.save()
+        except OSError as e:
+            print(f"[jobs] Could not save job {job.id}: {e}")
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        with self._lock:
+            self._purge_expired()
+            return sorted(self._jobs.values(), key=lambda job: job.created, reverse=True)
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def status(self) -> dict:
+        return {"workers": self.workers, "ttl": self.ttl, "jobs": len(self._jobs), **self.stats}
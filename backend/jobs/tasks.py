@@ -0,0 +1,109 @@
+# backend/jobs/tasks.py
+"""
+Job functions. They run in worker processes (see runner.py), so they
+take plain, picklable arguments and import what they need themselves:
+
+    task(params, output_dir, progress) -> artifact file name
+
+`progress(done, total)` may be called as often as convenient; it is
+throttled before it reaches the status file.
+"""
+import json
+import os
+import sqlite3
+import time
+import zipfile
+
+# Seconds between progress file writes
+PROGRESS_INTERVAL = 0.5
+
+
+class ProgressFile:
+    """Throttled progress reporter writing {"done", "total"} to a JSON file."""
+
+    def __init__(self, path):
+        self.path = path
+        self._last = 0.0
+
+    def __call__(self, done: int, total: int, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._last < PROGRESS_INTERVAL:
+            return
+        self._last = now
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"done": done, "total": total}, f)
+        os.replace(tmp, self.path)
+
+
+def export_report(params: dict, output_dir: str, progress) -> str:
+    """Detection report; params: {"format": "xlsx" | "csv"}."""
+    from backend.analytics.export import EXCEL_AVAILABLE, write_csv_report, write_excel_report, report_filename
+
+    use_excel = EXCEL_AVAILABLE and params.get("format", "xlsx") != "csv"
+    filename = report_filename("xlsx" if use_excel else "csv")
+    conn = sqlite3.connect(params["db_path"])
+    try:
+        write = write_excel_report if use_excel else write_csv_report
+        write(conn, os.path.join(output_dir, filename), progress)
+    finally:
+        conn.close()
+    return filename
+
+
+def daily_summary(params: dict, output_dir: str, progress) -> str:
+    """TaskRecommender.get_daily_summary() as JSON; params: {"hours": int}."""
+    from backend.nlp.task_recommender import TaskRecommender
+
+    progress(0, 1)
+    summary = TaskRecommender(params["db_path"]).get_daily_summary(hours=int(params.get("hours", 24)))
+    filename = "daily_summary.json"
+    with open(os.path.join(output_dir, filename), "w") as f:
+        json.dump(summary, f, indent=2, default=str)
+    progress(1, 1)
+    return filename
+
+
+def plots(params: dict, output_dir: str, progress) -> str:
+    """Emotion, posture and sentiment charts as PNGs in a zip; params: {"hours": int | None}."""
+    import matplotlib
+    matplotlib.use("Agg")
+    from datetime import datetime, timedelta
+    from backend.analytics.log_reader import TIMESTAMP_FORMAT
+    from backend.analytics.plotter import Plotter
+
+    # The log is filtered on its timestamp strings, so the bound is a string too
+    since = None
+    if params.get("hours"):
+        since = (datetime.now() - timedelta(hours=int(params["hours"]))).strftime(TIMESTAMP_FORMAT)
+    plotter = Plotter(params["log_file"], since=since)
+    charts = [
+        ("emotion_distribution.png", plotter.plot_emotion_distribution),
+        ("posture_distribution.png", plotter.plot_posture_distribution),
+        ("sentiment_trend.png", plotter.plot_sentiment_trend),
+    ]
+    filename = "syntwin_plots.zip"
+    with zipfile.ZipFile(os.path.join(output_dir, filename), "w") as archive:
+        for done, (name, plot) in enumerate(charts):
+            progress(done, len(charts))
+            path = os.path.join(output_dir, name)
+            plot(save_path=path)
+            if os.path.exists(path):
+                archive.write(path, name)
+                os.remove(path)
+    progress(len(charts), len(charts))
+    return filename
+
+
+TASKS = {
+    "report": export_report,
+    "daily-summary": daily_summary,
+    "plots": plots,
+}
+
+
+def run_task(kind: str, params: dict, output_dir: str, progress_path: str) -> str:
+    """Worker process entry point."""
+    progress = ProgressFile(progress_path)
+    artifact = TASKS[kind](params, output_dir, progress)
+    return artifact
@@ -3,6 +3,8 @@ SynTwin main module.
 Contains FastAPI app and desktop detection runner.
 """
 import argparse
+import asyncio
+import os
 import time
 
 import cv2
@@ -13,8 +15,15 @@ from backend.services import (
     detection_service,
     analytics_service,
     state_service,
-    stream_service
+    stream_service,
+    job_service
 )
+from backend.database.db import retention_worker
+from backend.analytics.segments import close_segment_logs
+from backend.database.events import close_events
+from backend.nlp.llm_client import close_llm_client
+from backend.nlp.advice_cache import advice_cache
+from backend.nlp.advice_prefetch import PREFETCH_ENABLED
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -38,6 +47,37 @@ app.include_router(detection_service.router)
 app.include_router(analytics_service.router)
 app.include_router(state_service.router)
 app.include_router(stream_service.router)
+app.include_router(job_service.router)
+
+
+@app.on_event("startup")
+def start_retention():
+    """Expire old detection partitions in the background."""
+    retention_worker.start()
+
+
+@app.on_event("startup")
+async def start_advice_prefetch():
+    """Precompute AI advice when the detected state changes (needs the AI chain configured)."""
+    if PREFETCH_ENABLED and os.getenv("OPENROUTER_API_KEY"):
+        nlp_service.prefetcher.start()
+
+
+@app.on_event("shutdown")
+def flush_log_writers():
+    """Write any queued detection/CSV log rows before exiting."""
+    retention_worker.stop()
+    job_service.runner.shutdown()
+    close_events()
+    close_segment_logs()
+
+
+@app.on_event("shutdown")
+async def close_ai_client():
+    """Stop prefetching, close the AI model chain's pooled connections and save the advice cache."""
+    await nlp_service.prefetcher.stop()
+    await close_llm_client()
+    await asyncio.to_thread(advice_cache.flush)
 
 
 # Root endpoint
@@ -53,7 +93,8 @@ def read_root():
             "NLP (Task Recommendations & Sentiment Analysis)",
             "Detection (Face & Posture Detection Logging)",
             "Analytics (Data Analysis & Visualization)",
-            "State (Digital Twin State Management)"
+            "State (Digital Twin State Management)",
+            "Jobs (Background Reports & Exports)"
         ],
         "docs": "/docs",
         "redoc": "/redoc"
@@ -71,11 +112,16 @@ def health_check():
             "nlp": "running",
             "detection": "running",
             "analytics": "running",
-            "state": "running"
+            "state": "running",
+            "jobs": "running"
         }
     }
 
 
+# Frames between analyzer queue/latency reports in desktop mode
+ANALYZER_REPORT_EVERY = 300
+
+
 def run_desktop_detection():
     from backend.src.config import Config
     from backend.src.core.analyzer import EmotionAnalyzer
@@ -159,6 +205,10 @@ def run_desktop_detection():
 
             frame_count += 1
             emotion, probs = analyzer.get_results()
+            if frame_count % ANALYZER_REPORT_EVERY == 0:
+                stats = analyzer.stats
+                print(f"[EmotionAnalyzer] queue depth {analyzer.queue_depth()}, "
+                      f"{stats['completed']} done, {stats['coalesced']} coalesced, avg {stats['avg_ms']:.1f} ms")
 
             if face_coords:
                 visualizer.draw_face_box(frame, face_coords, emotion)
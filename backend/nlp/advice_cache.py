@@ -0,0 +1,204 @@
+# backend/nlp/advice_cache.py
+"""
+Cache for AI wellness advice, keyed on a quantized state signature.
+
+The advice prompt embeds raw floats (drowsy_score, confidence, blink
+rate), so consecutive polls almost never produce the same prompt even
+when the user's state hasn't really changed. The cache key instead
+reduces the state to what the advice depends on:
+
+    (emotion, posture bucket, drowsiness tier, blink-rate tier, time of day)
+
+Entries expire after `ttl` seconds and the least recently used entry is
+evicted beyond `max_entries`. With a `path`, entries are saved to disk
+and survive restarts. Saving happens on a timer thread `save_delay`
+seconds after the first change, so a burst of puts costs one write and
+none of it runs on the caller's (event loop) thread; flush() writes
+pending changes right away (called on shutdown).
+"""
+import atexit
+import bisect
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+ADVICE_CACHE_TTL = float(os.getenv("SYNTWIN_ADVICE_CACHE_TTL", "600"))
+ADVICE_CACHE_SIZE = int(os.getenv("SYNTWIN_ADVICE_CACHE_SIZE", "256"))
+# Empty: memory only
+ADVICE_CACHE_PATH = os.getenv("SYNTWIN_ADVICE_CACHE_PATH", "")
+# Seconds between a change and the write that persists it
+ADVICE_CACHE_SAVE_DELAY = 5.0
+
+# Same thresholds as the drowsiness descriptions in the prompt
+DROWSY_TIERS = (0.20, 0.45, 0.75)
+DROWSY_NAMES = ("alert", "fatigued", "drowsy", "severe")
+# Blinks per minute: low (fatigue) / normal / high (strain)
+BLINK_TIERS = (10, 25)
+BLINK_NAMES = ("low", "normal", "high")
+
+POSTURE_BUCKETS = {
+    "Straight": "upright",
+    "Slightly Forward": "upright",
+    "Slouching": "slouching",
+    "Slouching Forward": "slouching",
+    "Leaning Sideways": "leaning",
+    "Leaning Back": "leaning",
+    "Looking Down": "looking_down",
+}
+
+
+def drowsiness_tier(score) -> str:
+    return DROWSY_NAMES[bisect.bisect_right(DROWSY_TIERS, float(score or 0.0))]
+
+
+def blink_tier(rate) -> str:
+    rate = float(rate or 0.0)
+    if rate <= 0:
+        return "unknown"
+    return BLINK_NAMES[bisect.bisect_right(BLINK_TIERS, rate)]
+
+
+def state_signature(data: dict, time_of_day: str) -> Tuple[str, ...]:
+    """Cache key for the detection data behind an advice prompt."""
+    posture = data.get("posture") or "Straight"
+    return (
+        data.get("emotion") or "Neutral",
+        POSTURE_BUCKETS.get(posture, posture.lower()),
+        drowsiness_tier(data.get("drowsy_score")),
+        blink_tier(data.get("blink_rate")),
+        time_of_day,
+    )
+
+
+class AdviceCache:
+    """
+    Thread-safe LRU + TTL cache of advice results.
+
+    Args:
+        max_entries: entries kept at most (least recently used go first)
+        ttl:         seconds an entry stays valid
+        path:        optional JSON file to persist entries to
+        save_delay:  seconds from a change to the (batched) write to `path`
+    """
+
+    def __init__(self, max_entries: int = ADVICE_CACHE_SIZE, ttl: float = ADVICE_CACHE_TTL, path: Optional[str] = None,
+                 save_delay: float = ADVICE_CACHE_SAVE_DELAY):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path or None
+        self.save_delay = save_delay
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()   # key -> (value, created)
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()   # one write at a time, in order
+        self._save_timer: Optional[threading.Timer] = None
+        self._dirty = False
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+        if self.path:
+            self._load()
+
+    def get(self, key: tuple) -> Optional[Tuple[dict, float]]:
+        """(value, age in seconds) for a fresh entry, else None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            value, created = entry
+            age = time.time() - created
+            if age > self.ttl:
+                del self._entries[key]
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return value, age
+
+    def peek(self, key: tuple) -> Optional[float]:
+        """Age of a fresh entry, else None; doesn't count as a lookup."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            age = time.time() - entry[1]
+            return age if age <= self.ttl else None
+
+    def put(self, key: tuple, value: dict):
+        with self._lock:
+            self._entries[key] = (value, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+            self._schedule_save()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._schedule_save()
+
+    def _schedule_save(self):
+        """Mark entries changed and start the save timer if none is pending (lock held)."""
+        if not self.path:
+            return
+        self._dirty = True
+        if self._save_timer is None:
+            self._save_timer = threading.Timer(self.save_delay, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def flush(self):
+        """Write pending changes to `path` now."""
+        with self._save_lock:
+            with self._lock:
+                if self._save_timer is not None:
+                    self._save_timer.cancel()
+                    self._save_timer = None
+                if not self._dirty:
+                    return
+                self._dirty = False
+                entries = [[list(key), value, created] for key, (value, created) in self._entries.items()]
+            self._save(entries)
+
+    def _save(self, entries: list):
+        """Replace the file with `entries` (save lock held)."""
+        tmp = self.path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(tmp, "w") as f:
+                json.dump(entries, f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"[AI cache] Could not save {self.path}: {e}")
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"[AI cache] Ignoring unreadable {self.path}: {e}")
+            return
+        now = time.time()
+        for key, value, created in entries[-self.max_entries:]:
+            if now - created <= self.ttl:
+                self._entries[tuple(key)] = (value, created)
+
+    def status(self) -> dict:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "persistent": bool(self.path),
+            "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0.0,
+            **self.stats,
+        }
+
+
+advice_cache = AdviceCache(path=ADVICE_CACHE_PATH)
+atexit.register(advice_cache.flush)
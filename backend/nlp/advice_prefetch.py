@@ -0,0 +1,146 @@
+# backend/nlp/advice_prefetch.py
+"""
+Speculative precomputation of AI advice.
+
+A background task on the API's event loop samples the rolling detection
+state every `interval` seconds and reduces it to the advice cache's
+state signature (dominant emotion, posture bucket, drowsiness tier, ...).
+When the signature changes and then holds for `debounce` seconds, advice
+for the new state is fetched through the model chain and stored in the
+advice cache, so the next /ai/auto-advice is answered from the cache
+without waiting for a model.
+
+Prefetching only spends what's left: at most `budget_per_hour` calls,
+never for a state the cache already holds, and never while user-facing
+AI calls are running or queued.
+"""
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Awaitable, Callable, Optional
+
+PREFETCH_ENABLED = os.getenv("SYNTWIN_PREFETCH", "1") not in ("0", "false", "False")
+PREFETCH_INTERVAL = float(os.getenv("SYNTWIN_PREFETCH_INTERVAL", "5"))
+PREFETCH_DEBOUNCE = float(os.getenv("SYNTWIN_PREFETCH_DEBOUNCE", "15"))
+PREFETCH_BUDGET_PER_HOUR = int(os.getenv("SYNTWIN_PREFETCH_BUDGET", "20"))
+
+
+class AdvicePrefetcher:
+    """
+    Args:
+        read_state:  async callable returning the current state summary
+                     (TaskRecommender.analyze_current_state() format)
+        to_request:  state summary -> (cache key, detection data)
+        prefetch:    async callable computing and caching advice for the
+                     detection data
+        cache_age:   cache key -> age of a fresh cached answer, or None
+        busy:        callable, True while user-facing AI calls run or wait
+    """
+
+    def __init__(self, read_state: Callable[[], Awaitable[dict]], to_request: Callable[[dict], tuple],
+                 prefetch: Callable[[dict], Awaitable[dict]], cache_age: Callable[[tuple], Optional[float]],
+                 busy: Callable[[], bool], interval: float = PREFETCH_INTERVAL,
+                 debounce: float = PREFETCH_DEBOUNCE, budget_per_hour: int = PREFETCH_BUDGET_PER_HOUR):
+        self.read_state = read_state
+        self.to_request = to_request
+        self.prefetch = prefetch
+        self.cache_age = cache_age
+        self.busy = busy
+        self.interval = interval
+        self.debounce = debounce
+        self.budget_per_hour = budget_per_hour
+
+        self._task: Optional[asyncio.Task] = None
+        self._spent = deque()          # monotonic times of prefetch calls in the last hour
+        self._candidate = None         # signature seen most recently
+        self._candidate_since = 0.0
+        self.current = None            # signature of the last prefetch
+        self._failed = None            # signature whose prefetch failed; not retried until the state changes
+        self.stats = {"transitions": 0, "prefetched": 0, "failed": 0, "already_cached": 0,
+                      "deferred_busy": 0, "over_budget": 0, "errors": 0}
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+            print(f"[AI] Advice prefetch started (every {self.interval:.0f}s, "
+                  f"debounce {self.debounce:.0f}s, {self.budget_per_hour}/hour)")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.tick()
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"[AI] Advice prefetch error: {e}")
+
+    def _budget_left(self, now: float) -> bool:
+        while self._spent and now - self._spent[0] > 3600:
+            self._spent.popleft()
+        return len(self._spent) < self.budget_per_hour
+
+    async def tick(self) -> Optional[str]:
+        """One sample; returns what was done (for logging and tests)."""
+        state = await self.read_state()
+        if not state.get("data_points"):
+            return None
+        key, detection_data = self.to_request(state)
+        now = time.monotonic()
+
+        # Debounce: the state must hold before it is worth a model call
+        if key != self._candidate:
+            if self._candidate is not None:
+                self.stats["transitions"] += 1
+            self._candidate, self._candidate_since = key, now
+            self._failed = None
+            return "changed"
+        if now - self._candidate_since < self.debounce:
+            return "settling"
+
+        if key == self._failed:
+            return "failed_before"
+        if self.cache_age(key) is not None:
+            if key != self.current:
+                self.stats["already_cached"] += 1
+                self.current = key
+            return "cached"
+        if self.busy():
+            self.stats["deferred_busy"] += 1
+            return "busy"
+        if not self._budget_left(now):
+            self.stats["over_budget"] += 1
+            return "over_budget"
+
+        self._spent.append(now)
+        result = await self.prefetch(detection_data)
+        if result.get("status") == "success":
+            self.stats["prefetched"] += 1
+            self.current = key
+            return "prefetched"
+        self.stats["failed"] += 1
+        self._failed = key
+        return "failed"
+
+    def status(self) -> dict:
+        now = time.monotonic()
+        self._budget_left(now)
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "interval": self.interval,
+            "debounce": self.debounce,
+            "budget_per_hour": self.budget_per_hour,
+            "spent_last_hour": len(self._spent),
+            "state": list(self._candidate) if self._candidate else None,
+            "state_held_seconds": round(now - self._candidate_since, 1) if self._candidate else None,
+            **self.stats,
+        }
@@ -0,0 +1,239 @@
+# backend/nlp/llm_client.py
+"""
+Async access to the model chain for the API's AI endpoints.
+
+call_api_chain_async() races the models like model_chain.call_api_chain()
+(same hedging, same circuit breakers) but on the event loop, with one
+shared httpx.AsyncClient. Its connection pool keeps connections to the
+provider alive between calls, so a request doesn't pay a new TCP/TLS
+handshake, and the calls that lose the race are really cancelled.
+
+Every call goes through a bulkhead: at most LLM_MAX_CONCURRENCY calls run
+at once, up to LLM_MAX_QUEUE more wait (for LLM_QUEUE_TIMEOUT seconds at
+most), and anything beyond that is rejected with BulkheadFull right away.
+Slow providers therefore can't pile up requests and starve the detection
+and analytics endpoints.
+
+Without httpx installed, the thread-based chain runs on a worker thread
+instead (still behind the bulkhead). With it, synchronous callers of
+model_chain.call_api_chain() go through call_chain_blocking().
+"""
+import asyncio
+import os
+import ssl
+import time
+from contextlib import asynccontextmanager
+from functools import lru_cache
+
+from backend.nlp.model_chain import (
+    MAX_IN_FLIGHT,
+    MODEL_CHAIN,
+    HedgeSchedule,
+    call_api_chain_threaded,
+    get_breaker,
+    handle_response,
+    request_body,
+    request_headers,
+)
+from backend.nlp import model_chain
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+LLM_MAX_CONCURRENCY = int(os.getenv("SYNTWIN_LLM_CONCURRENCY", "4"))
+LLM_MAX_QUEUE = int(os.getenv("SYNTWIN_LLM_QUEUE", "8"))
+LLM_QUEUE_TIMEOUT = float(os.getenv("SYNTWIN_LLM_QUEUE_TIMEOUT", "10"))
+
+# Connection pool for the provider
+MAX_CONNECTIONS = 20
+MAX_KEEPALIVE = 10
+KEEPALIVE_EXPIRY = 60.0
+
+
+@lru_cache(maxsize=1)
+def _ssl_context():
+    """TLS settings shared by every client; building them costs ~0.2 s."""
+    import certifi   # installed with httpx
+    return ssl.create_default_context(cafile=certifi.where())
+
+
+class BulkheadFull(Exception):
+    """Too many LLM calls running and waiting; try again later."""
+
+
+class Bulkhead:
+    """Caps concurrent calls; a bounded number of callers may wait for a slot."""
+
+    def __init__(self, limit: int = LLM_MAX_CONCURRENCY, max_queue: int = LLM_MAX_QUEUE,
+                 queue_timeout: float = LLM_QUEUE_TIMEOUT):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(limit)
+        self.active = 0
+        self.waiting = 0
+        self.stats = {"completed": 0, "queued": 0, "rejected": 0, "timed_out": 0}
+
+    @asynccontextmanager
+    async def slot(self):
+        if self._semaphore.locked():
+            if self.waiting >= self.max_queue:
+                self.stats["rejected"] += 1
+                raise BulkheadFull(f"{self.active} AI calls running and {self.waiting} waiting")
+            self.stats["queued"] += 1
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.stats["timed_out"] += 1
+                raise BulkheadFull(f"No AI call slot free within {self.queue_timeout:.0f}s")
+            finally:
+                self.waiting -= 1
+        else:
+            await self._semaphore.acquire()
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self.stats["completed"] += 1
+            self._semaphore.release()
+
+    def status(self) -> dict:
+        return {"limit": self.limit, "active": self.active, "waiting": self.waiting,
+                "max_queue": self.max_queue, **self.stats}
+
+
+class AsyncModelChain:
+    """Hedged model racing over a shared, keep-alive httpx connection pool."""
+
+    def __init__(self, max_connections: int = MAX_CONNECTIONS, max_keepalive: int = MAX_KEEPALIVE):
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self._client = None
+        self.stats = {"calls": 0, "attempts": 0, "cancelled": 0}
+
+    def _get_client(self):
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                verify=_ssl_context(),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive,
+                    keepalive_expiry=KEEPALIVE_EXPIRY,
+                ),
+            )
+        return self._client
+
+    async def _attempt(self, model, user_message, timeout, reasoning_enabled):
+        """One model call. Returns an attempt result; cancellation propagates."""
+        breaker = get_breaker(model)
+        started = time.monotonic()
+        self.stats["attempts"] += 1
+        try:
+            response = await self._get_client().post(
+                model_chain.OPENROUTER_URL,
+                headers=request_headers(),
+                json=request_body(model, user_message, reasoning_enabled),
+                timeout=timeout,
+            )
+            return handle_response(model, response, started)
+        except asyncio.CancelledError:
+            # Lost the race; don't hold it against the model
+            breaker.release()
+            self.stats["cancelled"] += 1
+            raise
+        except httpx.TimeoutException:
+            error = "Timeout - model not responding"
+        except httpx.TransportError:
+            error = "Connection error"
+        except Exception as e:
+            error = str(e)
+        breaker.record_failure(error)
+        return {"status": "failed", "model": model, "error": error}
+
+    async def call(self, user_message, models=MODEL_CHAIN, timeout=30, reasoning_enabled=True,
+                   hedge_delay=None, max_in_flight=MAX_IN_FLIGHT):
+        """Async counterpart of model_chain.call_api_chain(), same HedgeSchedule."""
+        self.stats["calls"] += 1
+        schedule = HedgeSchedule(models, hedge_delay, max_in_flight)
+        pending = set()
+        try:
+            while schedule.running:
+                model = schedule.launch_next()
+                if model is not None:
+                    pending.add(asyncio.ensure_future(self._attempt(model, user_message, timeout, reasoning_enabled)))
+                    continue
+
+                done, pending = await asyncio.wait(pending, timeout=schedule.wait_timeout(),
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    outcome = schedule.finished(task.result())
+                    if outcome is not None:
+                        return outcome
+        finally:
+            # Cancel the losers (and everything, if our caller was cancelled)
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+            schedule.release_unstarted()
+
+        return schedule.failure()
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def status(self) -> dict:
+        return {
+            "client": "httpx" if HTTPX_AVAILABLE else "requests (thread)",
+            "max_connections": self.max_connections,
+            "max_keepalive": self.max_keepalive,
+            **self.stats,
+        }
+
+
+bulkhead = Bulkhead()
+llm_chain = AsyncModelChain()
+
+
+async def call_api_chain_async(user_message, **options):
+    """
+    Run the model chain behind the bulkhead. Raises BulkheadFull when too
+    many calls are already running and queued.
+    """
+    async with bulkhead.slot():
+        if HTTPX_AVAILABLE:
+            return await llm_chain.call(user_message, **options)
+        return await asyncio.to_thread(call_api_chain_threaded, user_message, **options)
+
+
+def call_chain_blocking(user_message, **options):
+    """
+    The async chain for synchronous callers (model_chain.call_api_chain()),
+    on a private event loop and client, so losing calls are cancelled
+    instead of holding a thread until their timeout. Not for use on a
+    running event loop.
+    """
+    async def run():
+        chain = AsyncModelChain()
+        try:
+            return await chain.call(user_message, **options)
+        finally:
+            await chain.aclose()
+
+    return asyncio.run(run())
+
+
+async def close_llm_client():
+    """Close the pooled connections (called on shutdown)."""
+    await llm_chain.aclose()
+
+
+def llm_status() -> dict:
+    return {"bulkhead": bulkhead.status(), "pool": llm_chain.status()}
@@ -1,5 +1,8 @@
 import json
 import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 import requests
 from dotenv import load_dotenv
@@ -18,85 +21,367 @@ MODEL_CHAIN = [
 ]
 
 BEARER_TOKEN = os.getenv("OPENROUTER_API_KEY")
-OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+# Overridable to point the chain at a local stub (backend/scripts/stub_llm_server.py)
+OPENROUTER_URL = os.getenv("OPENROUTER_URL", "https://openrouter.ai/api/v1/chat/completions")
 
+# Seconds to wait for an answer before also starting the next model
+HEDGE_DELAY = float(os.getenv("SYNTWIN_HEDGE_DELAY", "4"))
+# Models racing at the same time at most
+MAX_IN_FLIGHT = 3
 
-def call_api_chain(user_message, models=MODEL_CHAIN, timeout=30, reasoning_enabled=True):
+# Circuit breaker settings
+FAILURE_THRESHOLD = 2      # consecutive failures that open a model's breaker
+FAILURE_COOLDOWN = 30.0    # seconds a model is skipped after that
+RATE_LIMIT_COOLDOWN = 60.0 # seconds skipped after a 429 without Retry-After
+MAX_COOLDOWN = 600.0       # cap for repeated failures in half-open state
+
+# Chains running at once on the thread fallback; it sits behind the same
+# bulkhead as the async chain (see llm_client.py)
+SYNC_CHAIN_CONCURRENCY = int(os.getenv("SYNTWIN_LLM_CONCURRENCY", "4"))
+
+# Without httpx, attempts run on threads. An abandoned attempt keeps its
+# thread until its timeout, so there is room for one abandoned generation
+# next to the attempts of every running chain.
+_executor = ThreadPoolExecutor(max_workers=2 * MAX_IN_FLIGHT * SYNC_CHAIN_CONCURRENCY, thread_name_prefix="llm")
+
+
+class CircuitBreaker:
     """
-    Try the configured models in sequence until one succeeds.
-    This function is AI-only and does not generate fallback content.
+    Per-model breaker. Closed: calls go through. Open: the model is
+    skipped until its cooldown ends. After that one trial call is let
+    through (half-open); success closes the breaker, failure re-opens it
+    with twice the cooldown.
     """
-    
-    for model_index, model in enumerate(models, 1):
-        print(f"\n{'='*60}")
-        print(f"Attempt {model_index}: Trying model - {model}")
-        print('='*60)
-        
+
+    def __init__(self, model: str):
+        self.model = model
+        self._lock = threading.Lock()
+        self.failures = 0
+        self.open_until = 0.0
+        self.cooldown = FAILURE_COOLDOWN
+        self._trial = False
+        self.last_error = None
+
+    @property
+    def state(self) -> str:
+        if self.open_until == 0.0:
+            return "closed"
+        return "open" if time.monotonic() < self.open_until else "half-open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.open_until == 0.0:
+                return True
+            if time.monotonic() < self.open_until or self._trial:
+                return False
+            self._trial = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.open_until = 0.0
+            self.cooldown = FAILURE_COOLDOWN
+            self._trial = False
+
+    def record_failure(self, error: str, cooldown: float = None):
+        """A failed call; `cooldown` opens the breaker right away (rate limits)."""
+        with self._lock:
+            self.failures += 1
+            self.last_error = error
+            if self._trial:
+                # The half-open trial failed: back off further
+                self.cooldown = min(self.cooldown * 2, MAX_COOLDOWN)
+                cooldown = max(cooldown or 0.0, self.cooldown)
+            elif cooldown is None and self.failures >= FAILURE_THRESHOLD:
+                cooldown = self.cooldown
+            self._trial = False
+            if cooldown:
+                self.open_until = time.monotonic() + cooldown
+
+    def release(self):
+        """A trial call that was cancelled before it finished."""
+        with self._lock:
+            self._trial = False
+
+    def status(self) -> dict:
+        remaining = max(0.0, self.open_until - time.monotonic())
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "retry_in": round(remaining, 1),
+            "last_error": self.last_error,
+        }
+
+
+breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(model: str) -> CircuitBreaker:
+    with _breakers_lock:
+        if model not in breakers:
+            breakers[model] = CircuitBreaker(model)
+        return breakers[model]
+
+
+def chain_status(models=MODEL_CHAIN) -> dict:
+    """Breaker state per model, for /api/nlp/ai/status."""
+    return {model: get_breaker(model).status() for model in models}
+
+
+def _retry_after(response) -> float:
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return RATE_LIMIT_COOLDOWN
+
+
+def request_body(model, user_message, reasoning_enabled):
+    return {
+        "model": model,
+        "messages": [{"role": "user", "content": user_message}],
+        "reasoning": {"enabled": reasoning_enabled}
+    }
+
+
+def request_headers():
+    return {
+        "Authorization": f"Bearer {BEARER_TOKEN}",
+        "Content-Type": "application/json",
+    }
+
+
+def handle_response(model, response, started):
+    """
+    Turn an HTTP response (requests or httpx) into an attempt result and
+    update the model's breaker.
+    """
+    breaker = get_breaker(model)
+
+    # Check if response is successful
+    if response.status_code != 200:
         try:
-            response = requests.post(
-                url=OPENROUTER_URL,
-                headers={
-                    "Authorization": f"Bearer {BEARER_TOKEN}",
-                    "Content-Type": "application/json",
-                },
-                json={
-                    "model": model,
-                    "messages": [{"role": "user", "content": user_message}],
-                    "reasoning": {"enabled": reasoning_enabled}
-                },
-                timeout=timeout
-            )
-            
-            # Check if response is successful
-            if response.status_code != 200:
-                error_msg = response.json().get('error', {})
-                print(f" Error Status: {response.status_code}")
-                print(f" Error: {error_msg}")
-                
-                # Check for rate limit or token issues
-                if "rate_limit" in str(error_msg).lower() or "token" in str(error_msg).lower():
-                    print(f"  Model out of tokens or rate limited. Trying next model...")
-                    continue
-                else:
-                    print(f"  Error occurred. Trying next model...")
-                    continue
-            
-            response_data = response.json()
-            
-            # Extract content and token info
-            content = response_data['choices'][0]['message'].get('content')
-            usage = response_data.get('usage', {})
-            
-            # Get remaining tokens from headers
-            remaining_tokens = response.headers.get('x-ratelimit-remaining-tokens', 'N/A')
-            
-            print(f"\n Success with model: {model}")
-            print(f"\nResponse:")
-            print(json.dumps(content, indent=2))
-            
-            print(f"\n{'='*60}")
-            print("Token Usage:")
-            print('='*60)
-            print(f"Prompt Tokens:      {usage.get('prompt_tokens', 0)}")
-            print(f"Completion Tokens:  {usage.get('completion_tokens', 0)}")
-            print(f"Total Tokens Used:  {usage.get('total_tokens', 0)}")
-            print(f"Remaining Tokens:   {remaining_tokens}")
-            print('='*60)
-            
-            return {"status": "success", "model": model, "content": content, "usage": usage}
-        
-        except requests.exceptions.Timeout:
-            print(f" Timeout - Model not responding. Trying next model...")
-            continue
-        except requests.exceptions.ConnectionError:
-            print(f" Connection Error. Trying next model...")
-            continue
-        except Exception as e:
-            print(f" Error: {str(e)}")
-            print(f"Trying next model...")
-            continue
-    
+            error_msg = response.json().get('error', {})
+        except ValueError:
+            error_msg = response.text[:200]
+        error = f"HTTP {response.status_code}: {error_msg}"
+        # Rate limited or out of tokens/credits: skip the model for a while
+        if response.status_code in (402, 429) or "rate_limit" in str(error_msg).lower() or "token" in str(error_msg).lower():
+            breaker.record_failure(error, cooldown=_retry_after(response))
+        else:
+            breaker.record_failure(error)
+        return {"status": "failed", "model": model, "error": error}
+
+    response_data = response.json()
+    content = response_data['choices'][0]['message'].get('content')
+    if not content:
+        breaker.record_failure("Empty response")
+        return {"status": "failed", "model": model, "error": "Empty response"}
+
+    breaker.record_success()
+    return {
+        "status": "success",
+        "model": model,
+        "content": content,
+        "usage": response_data.get('usage', {}),
+        "remaining_tokens": response.headers.get('x-ratelimit-remaining-tokens', 'N/A'),
+        "latency_ms": round((time.monotonic() - started) * 1000.0, 1),
+    }
+
+
+def _attempt(model, user_message, timeout, reasoning_enabled, session, cancelled):
+    """
+    One model call on a worker thread. Never raises; returns
+    {"status": "success" | "failed" | "cancelled", ...}.
+    """
+    breaker = get_breaker(model)
+    started = time.monotonic()
+    try:
+        response = session.post(
+            url=OPENROUTER_URL,
+            headers=request_headers(),
+            json=request_body(model, user_message, reasoning_enabled),
+            timeout=timeout
+        )
+        return handle_response(model, response, started)
+
+    except Exception as e:
+        if cancelled.is_set():
+            # Lost the race; don't hold its error against the model
+            breaker.release()
+            return {"status": "cancelled", "model": model}
+        if isinstance(e, requests.exceptions.Timeout):
+            error = "Timeout - model not responding"
+        elif isinstance(e, requests.exceptions.ConnectionError):
+            error = "Connection error"
+        else:
+            error = str(e)
+        breaker.record_failure(error)
+        return {"status": "failed", "model": model, "error": error}
+
+
+def available_models(models):
+    """Models whose breaker lets a call through, in order; logs the skipped ones."""
+    candidates = [model for model in models if get_breaker(model).allow()]
+    skipped = [model for model in models if model not in candidates]
+    if skipped:
+        print(f"[AI] Skipping {len(skipped)} model(s) with open circuit breakers: {', '.join(skipped)}")
+    return candidates, skipped
+
+
+def chain_success(result, started):
+    usage = result["usage"]
+    print(f"\n Success with model: {result['model']} ({result['latency_ms']} ms)")
+    print(f"\nResponse:")
+    print(json.dumps(result["content"], indent=2))
+    print(f"Tokens: prompt {usage.get('prompt_tokens', 0)}, "
+          f"completion {usage.get('completion_tokens', 0)}, "
+          f"total {usage.get('total_tokens', 0)}, remaining {result['remaining_tokens']}")
+    return {
+        "status": "success",
+        "model": result["model"],
+        "content": result["content"],
+        "usage": usage,
+        "latency_ms": round((time.monotonic() - started) * 1000.0, 1),
+    }
+
+
+def chain_failure(errors, skipped):
     print(f"\n{'='*60}")
     print(" All models failed!")
     print('='*60)
-    return {"status": "failed", "model": None, "content": None, "error": "All configured models failed"}
+    error = "All configured models failed" if errors or not skipped else "All models are cooling down after recent failures"
+    return {"status": "failed", "model": None, "content": None, "error": error, "errors": errors}
+
+
+class HedgeSchedule:
+    """
+    Scheduling of one hedged race over the model chain, shared by the
+    thread-based call_api_chain() and the asyncio chain in llm_client.py.
+    The caller only runs and waits for the attempts:
+
+        while schedule.running:
+            model = schedule.launch_next()    # start it, if not None
+            ... wait up to schedule.wait_timeout() for an attempt ...
+            result = schedule.finished(attempt_result)   # not None: done
+        schedule.failure()
+
+    and calls release_unstarted() when it stops, whatever the outcome.
+    """
+
+    def __init__(self, models=MODEL_CHAIN, hedge_delay=None, max_in_flight=MAX_IN_FLIGHT):
+        self.hedge_delay = HEDGE_DELAY if hedge_delay is None else hedge_delay
+        self.max_in_flight = max_in_flight
+        self.candidates, self.skipped = available_models(models)
+        self.started = time.monotonic()
+        self.in_flight = 0
+        self.errors = {}
+        self._next_launch = self.started
+
+    @property
+    def running(self) -> bool:
+        return bool(self.candidates) or self.in_flight > 0
+
+    def _has_room(self) -> bool:
+        return bool(self.candidates) and self.in_flight < self.max_in_flight
+
+    def launch_next(self):
+        """The model to start now, or None to wait for a running attempt."""
+        now = time.monotonic()
+        if not self._has_room() or (self.in_flight and now < self._next_launch):
+            return None
+        model = self.candidates.pop(0)
+        self.in_flight += 1
+        self._next_launch = now + self.hedge_delay
+        print(f"[AI] Trying model - {model} ({self.in_flight} in flight)")
+        return model
+
+    def wait_timeout(self):
+        """Seconds until the next hedge is due; None to wait for an attempt to finish."""
+        if not self._has_room():
+            return None
+        return max(0.0, self._next_launch - time.monotonic())
+
+    def finished(self, result):
+        """Record a finished attempt. Returns the chain's result when it won, else None."""
+        self.in_flight -= 1
+        if result["status"] == "success":
+            return chain_success(result, self.started)
+        self.errors[result["model"]] = result.get("error")
+        print(f" {result['model']} failed: {result.get('error')}. Trying next model...")
+        # Replace a failed model right away instead of waiting out the hedge delay
+        self._next_launch = time.monotonic()
+        return None
+
+    def release_unstarted(self):
+        """Models never started don't keep a half-open trial slot."""
+        for model in self.candidates:
+            get_breaker(model).release()
+        self.candidates = []
+
+    def failure(self):
+        return chain_failure(self.errors, self.skipped)
+
+
+def call_api_chain(user_message, models=MODEL_CHAIN, timeout=30, reasoning_enabled=True,
+                   hedge_delay=None, max_in_flight=MAX_IN_FLIGHT):
+    """
+    Race the configured models, in order of preference, until one succeeds.
+
+    The first model starts right away. If it hasn't answered within
+    `hedge_delay` seconds the next one starts too (up to `max_in_flight`
+    at once), and a failed model is replaced immediately. The first
+    success wins and the other calls are cancelled. Models whose circuit
+    breaker is open are skipped.
+    This function is AI-only and does not generate fallback content.
+
+    With httpx installed the race runs on the async chain (llm_client.py),
+    which really cancels the losing calls; otherwise on worker threads.
+    """
+    options = dict(models=models, timeout=timeout, reasoning_enabled=reasoning_enabled,
+                   hedge_delay=hedge_delay, max_in_flight=max_in_flight)
+    from backend.nlp import llm_client
+    if llm_client.HTTPX_AVAILABLE:
+        return llm_client.call_chain_blocking(user_message, **options)
+    return call_api_chain_threaded(user_message, **options)
+
+
+def call_api_chain_threaded(user_message, models=MODEL_CHAIN, timeout=30, reasoning_enabled=True,
+                            hedge_delay=None, max_in_flight=MAX_IN_FLIGHT):
+    """call_api_chain() on worker threads with requests; losing calls are abandoned."""
+    schedule = HedgeSchedule(models, hedge_delay, max_in_flight)
+    pending = {}   # future -> (model, session, cancelled)
+
+    def launch(model):
+        session = requests.Session()
+        cancelled = threading.Event()
+        future = _executor.submit(_attempt, model, user_message, timeout, reasoning_enabled, session, cancelled)
+        pending[future] = (model, session, cancelled)
+
+    def cancel_all():
+        for model, session, cancelled in pending.values():
+            # requests can't abort a call in flight: the losing attempt is
+            # abandoned, ends at its timeout at the latest, and its result is ignored
+            cancelled.set()
+            session.close()
+
+    try:
+        while schedule.running:
+            model = schedule.launch_next()
+            if model is not None:
+                launch(model)
+                continue
+
+            done, _ = wait(list(pending), timeout=schedule.wait_timeout(), return_when=FIRST_COMPLETED)
+            for future in done:
+                _, session, _ = pending.pop(future)
+                session.close()
+                outcome = schedule.finished(future.result())
+                if outcome is not None:
+                    return outcome
+    finally:
+        cancel_all()
+        schedule.release_unstarted()
+
+    return schedule.failure()
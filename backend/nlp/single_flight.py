@@ -0,0 +1,45 @@
+# backend/nlp/single_flight.py
+"""
+Single-flight coalescing of concurrent async computations.
+
+Requests that ask for the same thing while it is being computed await
+the computation already in flight instead of starting their own. Nothing
+is kept once it finishes (caching is the advice cache's job).
+"""
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.stats = {"calls": 0, "executions": 0, "coalesced": 0, "errors": 0}
+
+    async def do(self, key: Hashable, compute: Callable[[], Awaitable]):
+        """Result of compute() for `key`, shared with concurrent callers."""
+        self.stats["calls"] += 1
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+        else:
+            self.stats["executions"] += 1
+            task = asyncio.ensure_future(compute())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finished(key, t))
+        # shield: a caller that goes away doesn't cancel the others' result
+        return await asyncio.shield(task)
+
+    def _finished(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled() and task.exception() is not None:
+            self.stats["errors"] += 1
+
+    def status(self) -> dict:
+        calls = self.stats["calls"]
+        return {
+            "in_flight": len(self._inflight),
+            "coalesced_rate": round(self.stats["coalesced"] / calls, 3) if calls else 0.0,
+            **self.stats,
+        }
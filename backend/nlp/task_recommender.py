@@ -6,10 +6,13 @@ Enhanced with Advanced NLP and ML models for more accurate recommendations.
 NOW WITH REAL-LIFE TASK SUGGESTIONS!
 """
 import sqlite3
-from datetime import datetime, timedelta
 from pathlib import Path
 from collections import Counter
 
+from backend.database.db import initialize_db, since_ms
+from backend.database.recent_window import recent_window
+from backend.database.rollups import rollup_summary
+
 
 class TaskRecommender:
     """
@@ -20,36 +23,74 @@ class TaskRecommender:
         if db_path is None:
             db_path = Path(__file__).parent.parent / "database" / "syntwin.db"
         self.db_path = db_path
+        # Bring older databases up to the indexed ts_ms schema
+        initialize_db(db_path)
 
     def get_recent_data(self, minutes=30):
         """
         Fetch recent detection data from database.
+        Rows: (emotion, smile, eyes, posture, sentiment, timestamp, sample_count);
+        sample_count > 1 for interval-mode rows covering several frames.
         """
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
-        time_threshold = (datetime.now() - timedelta(minutes=minutes)).strftime("%Y-%m-%d %H:%M:%S")
-        
         cursor.execute("""
-            SELECT emotion, smile, eyes, posture, sentiment, timestamp
+            SELECT emotion, smile, eyes, posture, sentiment, timestamp, sample_count
             FROM detector_logs
-            WHERE timestamp >= ?
-            ORDER BY timestamp DESC
-        """, (time_threshold,))
+            WHERE ts_ms >= ?
+            ORDER BY ts_ms DESC
+        """, (since_ms(minutes=minutes),))
         
         results = cursor.fetchall()
         conn.close()
         
         return results
 
+    def _db_window_summary(self, minutes):
+        """Window totals computed from SQLite (rows weighted by the frames they cover)."""
+        data = self.get_recent_data(minutes)
+        summary = {
+            "samples": 0,
+            "emotions": Counter(),
+            "postures": Counter(),
+            "eyes": Counter(),
+            "sentiment_sum": 0.0,
+            "sentiment_count": 0,
+            "recent_emotions": [row[0] for row in data if row[0]][:10],
+        }
+        for emotion, _smile, eye_state, posture, sentiment, _timestamp, samples in data:
+            weight = samples or 1
+            summary["samples"] += weight
+            if emotion:
+                summary["emotions"][emotion] += weight
+            if posture:
+                summary["postures"][posture] += weight
+            if eye_state:
+                summary["eyes"][eye_state] += weight
+            if sentiment is not None:
+                summary["sentiment_sum"] += sentiment * weight
+                summary["sentiment_count"] += weight
+        return summary
+
+    def window_summary(self, minutes=10):
+        """
+        Totals for the last `minutes`: from the in-memory recent window when
+        it covers the period, otherwise from the database.
+        """
+        summary = recent_window.summary(minutes)
+        if summary is None:
+            summary = self._db_window_summary(minutes)
+        return summary
+
     def analyze_current_state(self, minutes=10):
         """
         Analyze user's current emotional and physical state.
         Returns a summary of dominant patterns.
         """
-        data = self.get_recent_data(minutes)
+        window = self.window_summary(minutes)
         
-        if not data:
+        if not window["samples"]:
             return {
                 "dominant_emotion": "Unknown",
                 "posture_status": "Unknown",
@@ -59,30 +100,31 @@ class TaskRecommender:
                 "data_points": 0
             }
         
-        emotions = [row[0] for row in data if row[0]]
-        postures = [row[3] for row in data if row[3]]
-        eyes = [row[2] for row in data if row[2]]
-        sentiments = [row[4] for row in data if row[4] is not None]
-        
-        # Count occurrences
-        emotion_counter = Counter(emotions)
-        posture_counter = Counter(postures)
+        emotion_counter = window["emotions"]
+        posture_counter = window["postures"]
+        eyes_counter = window["eyes"]
+        sentiment_sum = window["sentiment_sum"]
+        sentiment_weight = window["sentiment_count"]
+
+        emotions_total = sum(emotion_counter.values())
+        postures_total = sum(posture_counter.values())
+        eyes_total = sum(eyes_counter.values())
         
         # Determine dominant patterns
         dominant_emotion = emotion_counter.most_common(1)[0][0] if emotion_counter else "Neutral"
         dominant_posture = posture_counter.most_common(1)[0][0] if posture_counter else "Unknown"
         
         # Calculate average sentiment
-        avg_sentiment = sum(sentiments) / len(sentiments) if sentiments else 0
+        avg_sentiment = sentiment_sum / sentiment_weight if sentiment_weight else 0
         
         # Determine energy level
-        closed_eyes_count = eyes.count("Closed")
-        drowsy_count = emotions.count("Drowsy")
-        energy_level = "Low" if (closed_eyes_count > len(eyes) * 0.3 or drowsy_count > 3) else "Normal"
+        closed_eyes_count = eyes_counter["Closed"]
+        drowsy_count = emotion_counter["Drowsy"]
+        energy_level = "Low" if (closed_eyes_count > eyes_total * 0.3 or drowsy_count > 3) else "Normal"
         
         # Check if user needs a break
-        slouching_count = postures.count("Slouching")
-        needs_break = slouching_count > len(postures) * 0.5 or energy_level == "Low"
+        slouching_count = posture_counter["Slouching"]
+        needs_break = slouching_count > postures_total * 0.5 or energy_level == "Low"
         
         return {
             "dominant_emotion": dominant_emotion,
@@ -90,10 +132,10 @@ class TaskRecommender:
             "energy_level": energy_level,
             "avg_sentiment": round(avg_sentiment, 2),
             "needs_break": needs_break,
-            "data_points": len(data),
-            "closed_eyes_ratio": round(closed_eyes_count / len(eyes), 2) if eyes else 0,
-            "recent_emotions": emotions[:10],   # last 10 for Gemini context
-            "drowsy_score": round(drowsy_count / len(emotions), 2) if emotions else 0.0,
+            "data_points": window["samples"],
+            "closed_eyes_ratio": round(closed_eyes_count / eyes_total, 2) if eyes_total else 0,
+            "recent_emotions": window["recent_emotions"][:10],   # last 10 for Gemini context
+            "drowsy_score": round(drowsy_count / emotions_total, 2) if emotions_total else 0.0,
         }
 
     def get_task_suggestions(self, minutes=10):
@@ -237,21 +279,25 @@ class TaskRecommender:
         """
         Get a summary of the user's day for end-of-day insights.
         """
-        data = self.get_recent_data(minutes=hours * 60)
+        # Minute/hour rollups instead of every raw row of the day
+        conn = sqlite3.connect(self.db_path)
+        try:
+            summary = rollup_summary(conn, since_ms(hours=hours))
+        finally:
+            conn.close()
         
-        if not data:
+        if not summary["total"]:
             return {"message": "No data available for today"}
         
-        emotions = [row[0] for row in data if row[0]]
-        postures = [row[3] for row in data if row[3]]
-        sentiments = [row[4] for row in data if row[4] is not None]
+        emotions = Counter({e: n for e, n in summary["emotions"].items() if e})
+        postures = Counter({p: n for p, n in summary["postures"].items() if p})
         
-        emotion_summary = Counter(emotions).most_common(3)
-        posture_summary = Counter(postures).most_common(3)
-        avg_sentiment = sum(sentiments) / len(sentiments) if sentiments else 0
+        emotion_summary = emotions.most_common(3)
+        posture_summary = postures.most_common(3)
+        avg_sentiment = summary["average_sentiment"] or 0
         
         return {
-            "total_detections": len(data),
+            "total_detections": summary["total"],
             "top_emotions": emotion_summary,
             "top_postures": posture_summary,
             "average_sentiment": round(avg_sentiment, 2),
@@ -262,12 +308,13 @@ class TaskRecommender:
     def _estimate_productive_time(self, emotions, postures):
         """
         Estimate productive time based on focused/happy emotions and good posture.
+        emotions/postures: Counters of label -> number of detections.
         """
         productive_states = ["Happy", "Focused", "Neutral"]
         good_postures = ["Upright", "Slightly Forward"]
         
-        productive_count = sum(1 for e in emotions if e in productive_states)
-        good_posture_count = sum(1 for p in postures if p in good_postures)
+        productive_count = sum(n for e, n in emotions.items() if e in productive_states)
+        good_posture_count = sum(n for p, n in postures.items() if p in good_postures)
         
         # Rough estimate (each detection ~1-2 seconds)
         productive_minutes = (productive_count * 2) / 60
@@ -0,0 +1,166 @@
+"""
+detector_logs query benchmark for the schema migrations.
+
+Builds a temporary database in the pre-migration layout (TEXT timestamp,
+no indexes), times the API's range and recency queries, applies the
+migrations (ts_ms backfill, indexes, day partitions) and times the ts_ms
+versions. The query plans should change from full table SCANs to index
+SEARCHes. Finally times /clear, which drops partitions instead of rows.
+
+Usage:
+    python -m backend.scripts.benchmark_detector_logs --rows 10000000
+"""
+import argparse
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.database.migrations import migrate
+from backend.database.partitions import clear_all, list_partitions, recent_rows
+
+LEGACY_SCHEMA = """
+    CREATE TABLE detector_logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT, emotion TEXT, smile TEXT,
+        eyes TEXT, posture TEXT, sentiment REAL, environment_feedback TEXT
+    )
+"""
+
+
+def _populate(conn, rows: int, interval_s: float):
+    """Insert `rows` detections ending now, `interval_s` apart, entirely in SQLite."""
+    start = datetime.now() - timedelta(seconds=rows * interval_s)
+    conn.execute(LEGACY_SCHEMA)
+    conn.execute(
+        """
+        WITH RECURSIVE seq(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM seq LIMIT ?)
+        INSERT INTO detector_logs (timestamp, emotion, smile, eyes, posture, sentiment, environment_feedback)
+        SELECT datetime(?, '+' || CAST(i * ? AS INTEGER) || ' seconds'),
+               CASE i % 3 WHEN 0 THEN 'Happy' WHEN 1 THEN 'Neutral' ELSE 'Drowsy' END,
+               CASE i % 3 WHEN 0 THEN 'Yes' ELSE 'No' END,
+               'Open',
+               CASE i % 4 WHEN 0 THEN 'Slouching' ELSE 'Upright' END,
+               (i % 200) / 100.0 - 1.0,
+               'Posture: Upright'
+        FROM seq
+        """,
+        (rows, start.strftime("%Y-%m-%d %H:%M:%S"), interval_s),
+    )
+    conn.commit()
+
+
+def _time_query(conn, sql: str, params: tuple, repeat: int):
+    plan = " | ".join(row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+    started = time.perf_counter()
+    for _ in range(repeat):
+        count = len(conn.execute(sql, params).fetchall())
+    elapsed_ms = (time.perf_counter() - started) * 1000.0 / repeat
+    return elapsed_ms, count, plan
+
+
+def _time_recent(conn, repeat: int):
+    """The /recent endpoint reads the newest partitions directly."""
+    newest = list_partitions(conn)[-1]
+    plan = " | ".join(
+        row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN SELECT timestamp FROM {newest} ORDER BY ts_ms DESC LIMIT 10")
+    )
+    started = time.perf_counter()
+    for _ in range(repeat):
+        count = len(recent_rows(conn, "timestamp, emotion, posture", 10))
+    elapsed_ms = (time.perf_counter() - started) * 1000.0 / repeat
+    return elapsed_ms, count, plan
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark detector_logs range queries before/after migration")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--interval", type=float, default=0.1, help="Seconds between generated rows")
+    parser.add_argument("--window-minutes", type=int, default=30, help="Range query window")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"detector_logs benchmark ({args.rows:,} rows)")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(Path(tmp) / "bench.db")
+
+        started = time.perf_counter()
+        _populate(conn, args.rows, args.interval)
+        print(f"Populated legacy table in {time.perf_counter() - started:.1f}s")
+
+        # Whole seconds, matching the TEXT timestamp resolution
+        threshold = (datetime.now() - timedelta(minutes=args.window_minutes)).replace(microsecond=0)
+        threshold_text = threshold.strftime("%Y-%m-%d %H:%M:%S")
+        threshold_ms = int(threshold.timestamp() * 1000)
+
+        before = {
+            "range": _time_query(
+                conn,
+                "SELECT timestamp, emotion, posture, sentiment FROM detector_logs "
+                "WHERE timestamp >= ? ORDER BY timestamp ASC",
+                (threshold_text,),
+                args.repeat,
+            ),
+            "recent": _time_query(
+                conn,
+                "SELECT timestamp, emotion, posture FROM detector_logs ORDER BY timestamp DESC LIMIT 10",
+                (),
+                args.repeat,
+            ),
+        }
+
+        started = time.perf_counter()
+        version = migrate(conn)
+        print(f"Migrated to schema v{version} in {time.perf_counter() - started:.1f}s")
+
+        after = {
+            "range": _time_query(
+                conn,
+                "SELECT timestamp, emotion, posture, sentiment FROM detector_logs "
+                "WHERE ts_ms >= ? ORDER BY ts_ms ASC",
+                (threshold_ms,),
+                args.repeat,
+            ),
+            "recent": _time_recent(conn, args.repeat),
+        }
+        partitions = len(list_partitions(conn))
+
+        started = time.perf_counter()
+        clear_all(conn)
+        clear_ms = (time.perf_counter() - started) * 1000.0
+        conn.close()
+
+    failed = False
+    for name in ("range", "recent"):
+        old_ms, old_count, old_plan = before[name]
+        new_ms, new_count, new_plan = after[name]
+        print()
+        print(f"{name} query: {old_count} -> {new_count} rows")
+        print(f"  before: {old_ms:9.2f} ms  [{old_plan}]")
+        print(f"  after:  {new_ms:9.2f} ms  [{new_plan}]")
+        print(f"  speedup: {old_ms / max(new_ms, 1e-6):.1f}x")
+        if "SEARCH" not in new_plan and "USING INDEX" not in new_plan:
+            failed = True
+        if old_count != new_count:
+            failed = True
+
+    print()
+    print(f"clear: dropped {partitions} day partitions in {clear_ms:.1f} ms")
+
+    print()
+    if failed:
+        print("FAIL: migrated queries are not index seeks or returned different rows")
+        return 1
+    print("PASS: range and recency queries use the ts_ms index")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
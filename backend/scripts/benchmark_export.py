@@ -0,0 +1,103 @@
+"""
+Report export benchmark.
+
+Builds a temporary database with --rows detections and compares the old
+export (fetchall() into a list, CSV built in one string) with the
+streamed one (fetchmany() per partition, one chunk per batch): time to
+first byte, total time and peak Python memory. If openpyxl is installed
+the write-only Excel export is timed as well.
+
+Usage:
+    python -m backend.scripts.benchmark_export --rows 2000000
+"""
+import argparse
+import csv
+import io
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.analytics.export import EXCEL_AVAILABLE, iter_csv_report, write_excel_report
+from backend.database.migrations import migrate
+from backend.scripts.benchmark_detector_logs import _populate
+
+
+def _buffered_csv(conn):
+    """The export as it used to be: every row in memory, then one string."""
+    rows = conn.execute(
+        "SELECT timestamp, emotion, posture, sentiment FROM detector_logs ORDER BY ts_ms DESC"
+    ).fetchall()
+    text = io.StringIO()
+    writer = csv.writer(text)
+    writer.writerow(["Timestamp", "Emotion", "Posture", "Sentiment"])
+    for row in rows:
+        writer.writerow(row)
+    yield text.getvalue().encode("utf-8")
+
+
+def _measure(chunks):
+    tracemalloc.start()
+    started = time.perf_counter()
+    first_ms = None
+    size = 0
+    for data in chunks:
+        if first_ms is None:
+            first_ms = (time.perf_counter() - started) * 1000.0
+        size += len(data)
+    total_ms = (time.perf_counter() - started) * 1000.0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return first_ms, total_ms, peak, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark buffered vs streamed report export")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--interval", type=float, default=0.1, help="Seconds between generated rows")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"Report export benchmark ({args.rows:,} rows)")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(Path(tmp) / "bench.db")
+        _populate(conn, args.rows, args.interval)
+        migrate(conn)
+
+        results = {
+            "buffered csv": _measure(_buffered_csv(conn)),
+            "streamed csv": _measure(iter_csv_report(conn)),
+        }
+        for name, (first_ms, total_ms, peak, size) in results.items():
+            print(f"{name:13s}: first byte {first_ms:9.1f} ms, total {total_ms:9.1f} ms, "
+                  f"peak {peak / 1024 / 1024:8.1f} MB, {size / 1024 / 1024:.1f} MB out")
+
+        if EXCEL_AVAILABLE:
+            started = time.perf_counter()
+            tracemalloc.start()
+            write_excel_report(conn, Path(tmp) / "report.xlsx")
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"write-only xlsx: {(time.perf_counter() - started) * 1000.0:9.1f} ms, "
+                  f"peak {peak / 1024 / 1024:8.1f} MB")
+        else:
+            print("openpyxl not installed; skipping the Excel export")
+        conn.close()
+
+    buffered, streamed = results["buffered csv"], results["streamed csv"]
+    if buffered[3] != streamed[3]:
+        print(f"\n❌ Output sizes differ: {buffered[3]} vs {streamed[3]} bytes")
+        return 1
+    print("\n✅ Same output, streamed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
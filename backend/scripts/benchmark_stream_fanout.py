@@ -0,0 +1,132 @@
+"""
+Fan-out benchmark for the shared detection producer.
+
+Runs the FrameBroadcaster and its threaded DetectionPipeline with a
+simulated detection cost and compares 1 client against many. Inference
+must run once per frame regardless of the client count; the extra CPU per
+frame should only be message delivery.
+
+Usage:
+    python -m backend.scripts.benchmark_stream_fanout --clients 50 --frames 200
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.streaming.broadcaster import FrameBroadcaster
+from backend.streaming.pipeline import DetectionPipeline
+from backend.streaming.protocol import FramePacket
+
+
+def _simulated_pipeline(cost_ms: float):
+    """Pipeline whose inference stage busy-waits to stand in for the detectors."""
+    jpeg = b"\xff" * 30000
+    meta = {
+        "results": {"emotion": "Neutral", "confidence": "80%", "posture": "Straight"},
+        "sentiment": {"score": 0.1, "label": "Neutral", "factors": []},
+    }
+    calls = {"count": 0}
+
+    def capture():
+        # A camera delivers frames at its own pace
+        time.sleep(0.002)
+        return object()
+
+    def infer(frame):
+        calls["count"] += 1
+        deadline = time.perf_counter() + cost_ms / 1000.0
+        while time.perf_counter() < deadline:
+            pass
+        return frame
+
+    def encode(analysis):
+        return FramePacket(analysis, meta, encoder=lambda image, tier: jpeg[: int(len(jpeg) * tier.scale)])
+
+    pipeline = DetectionPipeline(
+        capture=capture, infer=infer, encode=encode, is_active=lambda: True, frame_interval=0
+    )
+    return pipeline, calls
+
+
+async def _run(clients: int, frames: int, cost_ms: float):
+    pipeline, calls = _simulated_pipeline(cost_ms)
+    broadcaster = FrameBroadcaster(pipeline)
+    delivered = {"count": 0}
+
+    async def client(protocol):
+        sub = broadcaster.subscribe(protocol=protocol)
+        try:
+            while True:
+                packet = await sub.get()
+                message = packet.encode(sub.wire_format(packet.seq))
+                # Stand-in for websocket.send_text() / send_bytes()
+                delivered["count"] += len(message) > 0
+        finally:
+            broadcaster.unsubscribe(sub)
+
+    cpu_start = time.process_time()
+    # Mix JSON and binary clients: each format is serialized once per frame
+    protocols = ("json", "binary")
+    tasks = [asyncio.create_task(client(protocols[i % 2])) for i in range(clients)]
+    while broadcaster.frames_published < frames:
+        await asyncio.sleep(0.001)
+    cpu_used = time.process_time() - cpu_start
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await asyncio.sleep(0.2)  # let pipeline threads exit
+
+    return {
+        "clients": clients,
+        "frames": broadcaster.frames_published,
+        "detector_calls": calls["count"],
+        "messages_delivered": delivered["count"],
+        "cpu_ms_per_frame": cpu_used * 1000.0 / max(1, broadcaster.frames_published),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the shared detection producer")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--cost-ms", type=float, default=15.0, help="Simulated detection cost per frame")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Stream fan-out benchmark")
+    print("=" * 60)
+
+    baseline = asyncio.run(_run(1, args.frames, args.cost_ms))
+    fanout = asyncio.run(_run(args.clients, args.frames, args.cost_ms))
+
+    for result in (baseline, fanout):
+        print(
+            f"{result['clients']:>3} client(s): {result['frames']} frames, "
+            f"{result['detector_calls']} detector calls, "
+            f"{result['messages_delivered']} messages delivered, "
+            f"{result['cpu_ms_per_frame']:.2f} ms CPU/frame"
+        )
+
+    overhead = fanout["cpu_ms_per_frame"] - baseline["cpu_ms_per_frame"]
+    per_client_us = overhead * 1000.0 / max(1, args.clients - 1)
+    print()
+    print(f"Fan-out overhead: {overhead:.2f} ms/frame ({per_client_us:.1f} us per extra client)")
+
+    # Inference must not scale with the number of dashboards
+    calls_per_frame = fanout["detector_calls"] / max(1, fanout["frames"])
+    if calls_per_frame > 1.01 or overhead > args.cost_ms:
+        print("FAIL: detection cost grows with client count")
+        return 1
+
+    print("PASS: one detection pass per frame, clients add only delivery overhead")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
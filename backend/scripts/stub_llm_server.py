@@ -0,0 +1,180 @@
+"""
+Local stand-in for the OpenRouter chat completions API, with scripted
+per-model behaviour, to exercise the model chain's hedging and circuit
+breakers without network access or API credits.
+
+Behaviour per model: "<delay seconds>:<status>", e.g. "5:200" answers
+after 5 s, "0:429" is rate limited, "0:500" fails. Unlisted models
+answer immediately.
+
+Usage:
+    # Serve on :8090, then run the API with OPENROUTER_URL=http://127.0.0.1:8090/v1/chat/completions
+    python -m backend.scripts.stub_llm_server --serve --model "nvidia/nemotron-3-super-120b-a12b:free=5:200"
+
+    # Run the built-in scenarios against call_api_chain() (or the async, pooled chain,
+    # or the requests/thread fallback)
+    python -m backend.scripts.stub_llm_server [--async | --threads]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+
+class StubState:
+    def __init__(self):
+        self.behaviour = {}   # model -> (delay, status)
+        self.calls = []       # models in request order
+        self.connections = 0  # TCP connections accepted
+        self.requests = 0     # requests served, over all scenarios
+        self.lock = threading.Lock()
+
+    def set(self, behaviour: dict):
+        with self.lock:
+            self.behaviour = dict(behaviour)
+            self.calls = []
+
+
+def make_handler(state: StubState):
+    class Handler(BaseHTTPRequestHandler):
+        # Keep-alive, so pooled clients can reuse connections
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            super().setup()
+            with state.lock:
+                state.connections += 1
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            model = body.get("model", "")
+            with state.lock:
+                state.calls.append(model)
+                state.requests += 1
+                delay, status = state.behaviour.get(model, (0.0, 200))
+            time.sleep(delay)
+            if status == 200:
+                payload = {
+                    "choices": [{"message": {"content": f"Advice from {model}"}}],
+                    "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+                }
+            else:
+                payload = {"error": {"code": status, "message": "rate_limit exceeded" if status == 429 else "upstream error"}}
+            data = json.dumps(payload).encode("utf-8")
+            try:
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                if status == 429:
+                    self.send_header("Retry-After", "60")
+                self.end_headers()
+                self.wfile.write(data)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # the client gave up on this call
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def start_server(port: int = 0):
+    state = StubState()
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+
+def _parse_behaviour(specs):
+    behaviour = {}
+    for spec in specs or []:
+        model, _, rule = spec.rpartition("=")
+        delay, _, status = rule.partition(":")
+        behaviour[model] = (float(delay), int(status or 200))
+    return behaviour
+
+
+def run_scenarios(port: int, use_async: bool = False, use_threads: bool = False) -> int:
+    server, state = start_server(port)
+    os.environ["OPENROUTER_URL"] = f"http://127.0.0.1:{server.server_address[1]}/v1/chat/completions"
+    from backend.nlp import model_chain
+
+    if use_async:
+        from backend.nlp.llm_client import llm_chain
+        loop = asyncio.new_event_loop()
+        # Build the client (and its SSL context) up front, so the first scenario times only the call
+        llm_chain._get_client()
+
+        def call(**options):
+            return loop.run_until_complete(llm_chain.call(**options))
+    elif use_threads:
+        call = model_chain.call_api_chain_threaded
+    else:
+        call = model_chain.call_api_chain
+
+    models = ["model-a", "model-b", "model-c", "model-d"]
+    hedge = 0.5
+    scenarios = [
+        ("fast first model", {}, "model-a", 0.3),
+        ("slow first model is hedged", {"model-a": (5, 200), "model-b": (0.1, 200)}, "model-b", hedge + 0.5),
+        ("failure fails over at once", {"model-a": (0, 500), "model-b": (0.1, 200)}, "model-b", 0.4),
+        ("rate limit opens the breaker", {"model-a": (0, 429), "model-b": (0, 200)}, "model-b", 0.4),
+        ("open breaker is skipped", {"model-a": (0, 429), "model-b": (0, 200)}, "model-b", 0.3),
+        ("third hedge wins while two hang", {"model-b": (3, 200), "model-c": (3, 200), "model-d": (0.2, 200)},
+         "model-d", 2 * hedge + 0.5),
+    ]
+
+    failed = False
+    for name, behaviour, expected, budget in scenarios:
+        state.set(behaviour)
+        started = time.perf_counter()
+        result = call(user_message="hello", models=models, timeout=10, hedge_delay=hedge)
+        elapsed = time.perf_counter() - started
+        ok = result["model"] == expected and elapsed <= budget
+        failed |= not ok
+        print(f"{'✅' if ok else '❌'} {name}: {result['model']} in {elapsed:.2f}s "
+              f"(expected {expected} within {budget}s), calls: {', '.join(state.calls)}")
+
+    print("\nBreakers:", json.dumps(model_chain.chain_status(models), indent=2))
+    print(f"{state.requests} requests over {state.connections} connections")
+    if use_async:
+        loop.run_until_complete(llm_chain.aclose())
+        loop.close()
+    server.shutdown()
+    return 1 if failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub LLM server for the model chain")
+    parser.add_argument("--serve", action="store_true", help="Only run the server")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--model", action="append", help='Behaviour "model=delay:status" (repeatable)')
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Use the async, pooled chain")
+    parser.add_argument("--threads", dest="use_threads", action="store_true", help="Use the requests/thread fallback")
+    args = parser.parse_args()
+
+    if not args.serve:
+        return run_scenarios(0, args.use_async, args.use_threads)
+
+    server, state = start_server(args.port)
+    state.set(_parse_behaviour(args.model))
+    print(f"Stub LLM server on http://127.0.0.1:{args.port}/v1/chat/completions (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
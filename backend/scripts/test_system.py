@@ -99,6 +99,168 @@ def test_camera_detection():
         print(f"❌ Camera test failed: {e}")
         return False
 
+def test_plot_job():
+    """Test a "last N hours" plot job against a small log"""
+    print("\n🧪 Testing plot job...")
+
+    try:
+        import csv
+        import tempfile
+        import zipfile
+        from datetime import datetime, timedelta
+        from backend.jobs.tasks import plots
+
+        with tempfile.TemporaryDirectory() as tmp:
+            log_file = os.path.join(tmp, "syntwin_log.csv")
+            with open(log_file, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["timestamp", "emotion", "posture", "sentiment"])
+                for minutes, emotion in ((180, "Sad"), (30, "Happy"), (5, "Neutral")):
+                    stamp = (datetime.now() - timedelta(minutes=minutes)).strftime("%Y-%m-%d %H:%M:%S")
+                    writer.writerow([stamp, emotion, "Straight", 0.5])
+
+            artifact = plots({"log_file": log_file, "hours": 1}, tmp, lambda done, total: None)
+            with zipfile.ZipFile(os.path.join(tmp, artifact)) as archive:
+                names = archive.namelist()
+            assert "emotion_distribution.png" in names, f"Missing charts: {names}"
+
+        print("✅ Plot job with hours set succeeded")
+        return True
+    except Exception as e:
+        print(f"❌ Plot job test failed: {e}")
+        return False
+
+def test_partition_rollups_half_hour_tz():
+    """Test that dropping a day partition keeps the hourly rollup exact in a UTC+5:30 zone"""
+    print("\n🧪 Testing partition drop rollups (TZ=Asia/Kolkata)...")
+
+    import subprocess
+    check = """
+import sqlite3
+from datetime import date, datetime, timedelta
+from backend.database.migrations import migrate
+from backend.database.partitions import drop_partitions, insert_rows, partition_name
+from backend.database.rollups import apply_rollups, rollup_summary, HOUR_MS
+
+conn = sqlite3.connect(":memory:")
+migrate(conn)
+midnight = datetime.combine(date.today() - timedelta(days=1), datetime.min.time())
+# Detections every 5 minutes from 23:00 to 01:00 local time, across the day boundary
+samples = [int((midnight - timedelta(hours=1) + timedelta(minutes=5 * i)).timestamp() * 1000) for i in range(24)]
+sql = "INSERT INTO {table} (id, timestamp, ts_ms, end_ts_ms, sample_count, emotion, posture, sentiment) VALUES (?, '', ?, ?, 1, 'Happy', 'Straight', 0.5)"
+with conn:
+    insert_rows(conn, sql, [(ts, ts) for ts in samples], ts_index=0)
+    apply_rollups(conn, [(ts, 'Happy', 'Straight', 0.5, 1) for ts in samples])
+drop_partitions(conn, [partition_name(midnight.date() - timedelta(days=1))])
+kept = [ts for ts in samples if ts >= int(midnight.timestamp() * 1000)]
+hours = dict(conn.execute("SELECT bucket_ms, count FROM detector_rollup_hour").fetchall())
+expected = {}
+for ts in kept:
+    expected[ts // HOUR_MS * HOUR_MS] = expected.get(ts // HOUR_MS * HOUR_MS, 0) + 1
+assert hours == expected, (hours, expected)
+assert rollup_summary(conn)["total"] == len(kept)
+"""
+    try:
+        env = dict(os.environ, TZ="Asia/Kolkata")
+        root = str(Path(__file__).parent.parent.parent)
+        result = subprocess.run([sys.executable, "-c", check], cwd=root, env=env, capture_output=True, text=True)
+        if result.returncode != 0:
+            print(f"❌ Rollups wrong after the drop: {result.stderr.strip().splitlines()[-1]}")
+            return False
+        print("✅ Hourly rollups match the remaining detections")
+        return True
+    except Exception as e:
+        print(f"❌ Partition rollup test failed: {e}")
+        return False
+
+def test_interval_log_restart():
+    """Test that interval-mode logging loses no samples when the process stops mid-run"""
+    print("\n🧪 Testing interval logging across a restart...")
+
+    import subprocess
+    check = """
+import os, sqlite3, tempfile
+from datetime import datetime, timedelta
+from backend.database import db_logger
+from backend.database.migrations import migrate
+from backend.database.rollups import rollup_summary
+
+conn = sqlite3.connect(os.path.join(tempfile.mkdtemp(), "restart.db"))
+migrate(conn)
+db_logger.LOG_MODE = "interval"
+db_logger._local.conn = conn
+start = datetime.now() - timedelta(minutes=1)
+
+def batch(first, count):
+    return [{"timestamp": (start + timedelta(seconds=first + i)).strftime("%Y-%m-%d %H:%M:%S"),
+             "emotion": "Happy", "posture": "Straight", "eyes": "Open", "smile": "Yes", "sentiment": 0.5}
+            for i in range(count)]
+
+# Two journal batches of one stable run; the sink's cursor moves past both
+db_logger.write_detections(batch(0, 5))
+db_logger.write_detections(batch(5, 3))
+# Crash: the in-memory run is gone without being closed
+db_logger._local.coalescer = None
+# After the restart the sink continues with new events only
+db_logger.write_detections(batch(8, 4))
+
+logged = conn.execute("SELECT COALESCE(SUM(sample_count), 0) FROM detector_logs").fetchone()[0]
+assert logged == 12, f"{logged} of 12 samples in detector_logs"
+assert rollup_summary(conn)["total"] == 12
+"""
+    try:
+        root = str(Path(__file__).parent.parent.parent)
+        result = subprocess.run([sys.executable, "-c", check], cwd=root, capture_output=True, text=True)
+        if result.returncode != 0:
+            print(f"❌ Samples lost: {result.stderr.strip().splitlines()[-1]}")
+            return False
+        print("✅ Every sample reached detector_logs")
+        return True
+    except Exception as e:
+        print(f"❌ Interval restart test failed: {e}")
+        return False
+
+def test_interleaved_sources():
+    """Test that two interleaved frame sources keep their own face tracks and smoothing"""
+    print("\n🧪 Testing interleaved client sources...")
+
+    try:
+        import numpy as np
+        from backend.detectors.combined_detector import CombinedDetector
+
+        detector = CombinedDetector()
+        # Scripted cascade and emotion model: source A shows a happy face at
+        # the top left, source B a sad one at the bottom right (marker pixel)
+        boxes = {0: (40, 40, 120, 120), 255: (400, 240, 120, 120)}
+        emotions = {0: "Happy", 255: "Sad"}
+        detector.face_detector._detector.detect = lambda frame: [boxes[int(frame[0, 0, 0])]]
+        detector.emotion_detector.process_faces = lambda frame, bboxes: [
+            {"emotion": emotions[int(frame[0, 0, 0])], "confidence": 0.9} for _ in bboxes
+        ]
+
+        rng = np.random.default_rng(0)
+        frames = {}
+        for marker in boxes:
+            frame = rng.integers(0, 256, (480, 640, 3), dtype=np.uint8)   # texture for optical flow
+            frame[0, 0, 0] = marker
+            frames[marker] = frame
+
+        source_a, source_b = detector.new_state(), detector.new_state()
+        for _ in range(12):
+            for marker, state in ((0, source_a), (255, source_b)):
+                result = detector.process_frame(frames[marker], state=state)
+                x, y, w, h = result["bbox"]
+                assert abs(x - boxes[marker][0]) <= 5 and abs(y - boxes[marker][1]) <= 5, \
+                    f"source {marker}: box {result['bbox']} drifted from {boxes[marker]}"
+                assert result["primary_emotion"] == emotions[marker], \
+                    f"source {marker}: {result['primary_emotion']} instead of {emotions[marker]}"
+
+        print("✅ Each source kept its own boxes and emotions")
+        return True
+    except Exception as e:
+        print(f"❌ Interleaved sources test failed: {e}")
+        return False
+
 def main():
     print("=" * 60)
     print("🧪 Running Test Suite")
@@ -111,6 +273,10 @@ def main():
     results.append(("Imports", test_imports()))
     results.append(("Configuration", test_config()))
     results.append(("Camera", test_camera_detection()))
+    results.append(("Plot job", test_plot_job()))
+    results.append(("Partition rollups", test_partition_rollups_half_hour_tz()))
+    results.append(("Interval restart", test_interval_log_restart()))
+    results.append(("Interleaved sources", test_interleaved_sources()))
     
     # Summary
     print()
@@ -6,17 +6,17 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import Optional, List
 from datetime import datetime
-from backend.database.db_logger import log_detection_to_db
-from backend.analytics.data_logger import DataLogger
+from backend.database.db import since_ms
+from backend.database.events import flush_events, record_detection
+from backend.database.partitions import clear_all, recent_rows
+from backend.database.recent_window import recent_window
+from backend.database.rollups import rollup_summary
 import sqlite3
 from pathlib import Path
 
 
 router = APIRouter(prefix="/api/detection", tags=["Detection"])
 
-# Initialize logger
-csv_logger = DataLogger(log_dir="logs")
-
 
 # Request/Response Models
 class DetectionEntry(BaseModel):
@@ -72,11 +72,8 @@ def log_detection(entry: DetectionEntry):
             "environment_feedback": entry.environment_feedback
         }
         
-        # Log to database
-        log_detection_to_db(entry_data)
-        
-        # Log to CSV
-        csv_logger.log_entry(entry_data)
+        # Log once; the database and CSV log are fed from the event journal
+        record_detection(entry_data)
         
         return {
             "success": True,
@@ -98,16 +95,13 @@ def get_recent_detections(limit: int = 10):
     try:
         db_path = Path(__file__).parent.parent / "database" / "syntwin.db"
         conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT timestamp, emotion, smile, eyes, posture, sentiment, environment_feedback
-            FROM detector_logs
-            ORDER BY timestamp DESC
-            LIMIT ?
-        """, (limit,))
         
-        rows = cursor.fetchall()
+        # Newest day partitions first; sorting the whole view would scan every day
+        rows = recent_rows(
+            conn,
+            "timestamp, emotion, smile, eyes, posture, sentiment, environment_feedback",
+            limit,
+        )
         conn.close()
         
         detections = []
@@ -139,35 +133,15 @@ def get_detection_stats():
     try:
         db_path = Path(__file__).parent.parent / "database" / "syntwin.db"
         conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        # Total detections
-        cursor.execute("SELECT COUNT(*) FROM detector_logs")
-        total = cursor.fetchone()[0]
-        
-        # Emotion distribution
-        cursor.execute("""
-            SELECT emotion, COUNT(*) as count
-            FROM detector_logs
-            GROUP BY emotion
-            ORDER BY count DESC
-        """)
-        emotion_stats = {row[0]: row[1] for row in cursor.fetchall()}
-        
-        # Posture distribution
-        cursor.execute("""
-            SELECT posture, COUNT(*) as count
-            FROM detector_logs
-            GROUP BY posture
-            ORDER BY count DESC
-        """)
-        posture_stats = {row[0]: row[1] for row in cursor.fetchall()}
-        
-        # Average sentiment
-        cursor.execute("SELECT AVG(sentiment) FROM detector_logs WHERE sentiment IS NOT NULL")
-        avg_sentiment = cursor.fetchone()[0] or 0
         
+        # Read the hourly rollup instead of scanning detector_logs
+        summary = rollup_summary(conn)
         conn.close()
+
+        total = summary["total"]
+        emotion_stats = dict(summary["emotions"].most_common())
+        posture_stats = dict(summary["postures"].most_common())
+        avg_sentiment = summary["average_sentiment"] or 0
         
         return {
             "success": True,
@@ -191,20 +165,17 @@ def get_detection_timeline(hours: int = 24):
     - hours: Number of hours to look back (default: 24)
     """
     try:
-        from datetime import timedelta
-        
         db_path = Path(__file__).parent.parent / "database" / "syntwin.db"
         conn = sqlite3.connect(db_path)
         cursor = conn.cursor()
         
-        time_threshold = (datetime.now() - timedelta(hours=hours)).strftime("%Y-%m-%d %H:%M:%S")
-        
+        # Index seek on ts_ms (see backend/database/migrations.py)
         cursor.execute("""
-            SELECT timestamp, emotion, posture, sentiment
+            SELECT timestamp, emotion, posture, sentiment, end_ts_ms - ts_ms, sample_count
             FROM detector_logs
-            WHERE timestamp >= ?
-            ORDER BY timestamp ASC
-        """, (time_threshold,))
+            WHERE ts_ms >= ?
+            ORDER BY ts_ms ASC
+        """, (since_ms(hours=hours),))
         
         rows = cursor.fetchall()
         conn.close()
@@ -215,7 +186,10 @@ def get_detection_timeline(hours: int = 24):
                 "timestamp": row[0],
                 "emotion": row[1],
                 "posture": row[2],
-                "sentiment": row[3]
+                "sentiment": row[3],
+                # Interval mode: how long this state lasted and how many frames it covers
+                "duration_ms": row[4] or 0,
+                "samples": row[5]
             })
         
         return {
@@ -233,14 +207,16 @@ def clear_detections():
     Clear all detection data (use with caution!)
     """
     try:
+        # Let already-recorded detections land first so none arrive after the clear
+        flush_events()
+        
         db_path = Path(__file__).parent.parent / "database" / "syntwin.db"
         conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
         
-        cursor.execute("DELETE FROM detector_logs")
-        deleted_count = cursor.rowcount
-        conn.commit()
+        # Drops the day partitions instead of deleting row by row
+        deleted_count = clear_all(conn)
         conn.close()
+        recent_window.clear()
         
         return {
             "success": True,
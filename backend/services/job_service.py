@@ -0,0 +1,94 @@
+# backend/services/job_service.py
+"""
+Job Service - API endpoints for background reports and exports
+"""
+import os
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse
+from pydantic import BaseModel
+
+from backend.analytics.data_logger import LOG_FILE
+from backend.database.db import DB_PATH
+from backend.jobs.runner import DONE, JobRunner
+from backend.jobs.tasks import TASKS
+
+router = APIRouter(prefix="/api/jobs", tags=["Jobs"])
+
+runner = JobRunner(task_defaults={"db_path": str(DB_PATH), "log_file": os.path.abspath(LOG_FILE)})
+
+
+# Request Models
+class JobRequest(BaseModel):
+    kind: str
+    params: Optional[dict] = None
+
+
+def _job_response(job, reused: Optional[bool] = None) -> dict:
+    data = job.to_dict()
+    if job.status == DONE:
+        data["download_url"] = f"/api/jobs/{job.id}/download"
+    if reused is not None:
+        data["reused"] = reused
+    return {"success": True, "data": data}
+
+
+# Endpoints
+@router.post("/")
+def submit_job(request: JobRequest):
+    """
+    Start a background job; returns its id right away.
+
+    Kinds and params:
+    - report:        {"format": "xlsx" | "csv"}
+    - daily-summary: {"hours": 24}
+    - plots:         {"hours": null}  (emotion/posture/sentiment charts, zipped)
+
+    An identical request within the artifact TTL returns the existing job.
+    """
+    try:
+        if request.kind not in TASKS:
+            return {
+                "success": False,
+                "message": f"Unknown job kind '{request.kind}'. Available: {', '.join(TASKS)}"
+            }
+        job, reused = runner.submit(request.kind, request.params)
+        return _job_response(job, reused)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/")
+def list_jobs():
+    """List jobs whose artifacts are still kept."""
+    return {
+        "success": True,
+        "data": [job.to_dict() for job in runner.list()],
+        "runner": runner.status()
+    }
+
+
+@router.get("/{job_id}")
+def get_job_status(job_id: str):
+    """Status and progress of a job."""
+    job = runner.get(job_id)
+    if job is None:
+        return {
+            "success": False,
+            "message": "Job not found (it may have expired)"
+        }
+    return _job_response(job)
+
+
+@router.get("/{job_id}/download")
+def download_job_artifact(job_id: str):
+    """Download a finished job's artifact."""
+    job = runner.get(job_id)
+    if job is None or job.status != DONE or not os.path.exists(job.artifact_path):
+        raise HTTPException(status_code=404, detail="Artifact not available")
+    return FileResponse(
+        job.artifact_path,
+        filename=job.artifact,
+        headers={"Access-Control-Expose-Headers": "Content-Disposition"}
+    )
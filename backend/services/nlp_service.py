@@ -4,13 +4,18 @@ NLP Service - API endpoints for task recommendations, sentiment analysis,
 and AI model-driven mental wellness advice.
 """
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import Optional, Dict, List
 import os
 from backend.nlp.task_recommender import TaskRecommender
 from backend.nlp.decision_tree_fallback import build_decision_tree_fallback
 from backend.nlp.sentiment_analyzer import SentimentAnalyzer
-from backend.nlp.model_chain import call_api_chain
+from backend.nlp.model_chain import chain_status
+from backend.nlp.llm_client import BulkheadFull, bulkhead, call_api_chain_async, llm_status
+from backend.nlp.advice_cache import advice_cache, state_signature
+from backend.nlp.single_flight import SingleFlight
+from backend.nlp.advice_prefetch import AdvicePrefetcher
 
 router = APIRouter(prefix="/api/nlp", tags=["NLP"])
 
@@ -18,6 +23,10 @@ router = APIRouter(prefix="/api/nlp", tags=["NLP"])
 recommender = TaskRecommender()
 sentiment_analyzer = SentimentAnalyzer()
 
+# Concurrent auto-advice requests share one state read and one AI call
+state_flight = SingleFlight("state")
+advice_flight = SingleFlight("advice")
+
 
 def _describe_drowsy_score(score: float) -> str:
     if score >= 0.75:
@@ -261,8 +270,66 @@ def health_check():
 
 
 # ── AI Wellness Advisor ───────────────────────────────────────────────────────
+async def _run_ai_chain(prompt: str) -> dict:
+    """The model chain behind the bulkhead; a full bulkhead counts as a failure."""
+    try:
+        return await call_api_chain_async(prompt)
+    except BulkheadFull as e:
+        print(f"[AI] Rejected advice request: {e}")
+        return {"status": "failed", "error": f"AI advisor busy ({e})"}
+
+
+def _detection_data_from_state(state: dict) -> dict:
+    """Advice prompt input from an analyze_current_state() summary."""
+    return {
+        "emotion":         state.get("dominant_emotion", "Neutral"),
+        "confidence":      state.get("confidence", 0.0),
+        "smile":           state.get("smile", "Not Smiling"),
+        "eyes":            state.get("eyes", "Eyes Open"),
+        "posture":         state.get("posture_status", "Straight"),
+        "drowsy_score":    state.get("drowsy_score", 0.0),
+        "blink_rate":      state.get("blink_rate", 0.0),
+        "recent_emotions": state.get("recent_emotions", []),
+        "session_minutes": state.get("session_minutes", None),
+    }
+
+
+async def _read_state(minutes: int) -> dict:
+    """analyze_current_state() off the event loop, shared by concurrent callers."""
+    return await state_flight.do(
+        minutes, lambda: run_in_threadpool(recommender.analyze_current_state, minutes=minutes)
+    )
+
+
+async def _cached_ai_advice(detection_data: dict, precomputed: bool = False) -> dict:
+    """
+    AI advice for the detection data, from the advice cache when a
+    request with the same quantized state was answered (or prefetched)
+    recently, or shared with a concurrent request for the same state.
+    """
+    key = state_signature(detection_data, _time_of_day())
+    cached = advice_cache.get(key)
+    if cached is not None:
+        result, age = cached
+        return dict(result, cache_age_seconds=round(age, 1))
+
+    async def compute():
+        result = await _run_ai_chain(_build_ai_prompt(detection_data))
+        if result["status"] == "success":
+            advice_cache.put(key, {"status": "success", "model": result["model"], "content": result["content"],
+                                   "precomputed": precomputed})
+        return result
+
+    # Same state already being asked about: wait for that answer
+    return await advice_flight.do(key, compute)
+
+
+def _fallback_error(result: dict) -> str:
+    return f"{result.get('error') or 'All AI models failed'}; using decision-tree fallback."
+
+
 @router.post("/ai/advice")
-def get_ai_advice(request: AIAdviceRequest):
+async def get_ai_advice(request: AIAdviceRequest):
     """
     Send current detection data to the AI model chain and receive
     personalised mental-wellness tasks + motivation.
@@ -286,8 +353,7 @@ def get_ai_advice(request: AIAdviceRequest):
             "recent_emotions": request.recent_emotions,
             "session_minutes": request.session_minutes,
         }
-        prompt = _build_ai_prompt(detection_data)
-        result = call_api_chain(prompt)
+        result = await _cached_ai_advice(detection_data)
 
         if result["status"] == "success":
             advice = result["content"]
@@ -312,7 +378,9 @@ def get_ai_advice(request: AIAdviceRequest):
                 "emotion": detection_data["emotion"],
                 "ai_model_available": ai_model_available,
                 "fallback_source": fallback_source,
-                "error":   None if ai_model_available else "All AI models failed; using decision-tree fallback.",
+                "cached":  "cache_age_seconds" in result,
+                "cache_age_seconds": result.get("cache_age_seconds"),
+                "error":   None if ai_model_available else _fallback_error(result),
             }
         }
     except Exception as e:
@@ -321,18 +389,39 @@ def get_ai_advice(request: AIAdviceRequest):
 
 @router.get("/ai/status")
 def ai_status():
-    """Check whether the AI model chain is configured and reachable."""
+    """Check whether the AI model chain is configured, with each model's circuit breaker state."""
     available = bool(os.getenv("OPENROUTER_API_KEY"))
     return {
         "success":   True,
         "available": available,
         "message":   "AI model chain ready" if available
-                     else "AI model chain unavailable – check OPENROUTER_API_KEY"
+                     else "AI model chain unavailable – check OPENROUTER_API_KEY",
+        "models":    chain_status(),
+        "llm":       llm_status(),
+        "cache":     advice_cache.status(),
+        "coalescing": {"state": state_flight.status(), "advice": advice_flight.status()},
+        "prefetch":  prefetcher.status()
     }
 
 
+def _prefetch_request(state: dict) -> tuple:
+    detection_data = _detection_data_from_state(state)
+    return state_signature(detection_data, _time_of_day()), detection_data
+
+
+# Prefetches advice for the state the dashboard's auto-advice (minutes=10)
+# will ask about; started by the API server (backend/main.py)
+prefetcher = AdvicePrefetcher(
+    read_state=lambda: _read_state(10),
+    to_request=_prefetch_request,
+    prefetch=lambda detection_data: _cached_ai_advice(detection_data, precomputed=True),
+    cache_age=advice_cache.peek,
+    busy=lambda: bulkhead.active > 0 or bulkhead.waiting > 0,
+)
+
+
 @router.get("/ai/auto-advice")
-def get_auto_ai_advice(minutes: int = 10):
+async def get_auto_ai_advice(minutes: int = 10):
     """
     Automatically read the latest detection state from the DB and
     get AI wellness advice — no request body needed.
@@ -340,7 +429,7 @@ def get_auto_ai_advice(minutes: int = 10):
     """
     try:
         # Pull current state from the database
-        state = recommender.analyze_current_state(minutes=minutes)
+        state = await _read_state(minutes)
 
         # Guard: do not call the AI chain if there is no real detection data yet
         if state.get("data_points", 0) == 0:
@@ -357,19 +446,8 @@ def get_auto_ai_advice(minutes: int = 10):
             }
 
         # Build a detection_data dict from the DB state
-        detection_data = {
-            "emotion":         state.get("dominant_emotion", "Neutral"),
-            "confidence":      state.get("confidence", 0.0),
-            "smile":           state.get("smile", "Not Smiling"),
-            "eyes":            state.get("eyes", "Eyes Open"),
-            "posture":         state.get("posture_status", "Straight"),
-            "drowsy_score":    state.get("drowsy_score", 0.0),
-            "blink_rate":      state.get("blink_rate", 0.0),
-            "recent_emotions": state.get("recent_emotions", []),
-            "session_minutes": state.get("session_minutes", None),
-        }
-        prompt = _build_ai_prompt(detection_data)
-        result = call_api_chain(prompt)
+        detection_data = _detection_data_from_state(state)
+        result = await _cached_ai_advice(detection_data)
 
         if result["status"] == "success":
             advice = result["content"]
@@ -394,8 +472,11 @@ def get_auto_ai_advice(minutes: int = 10):
                 "emotion":          detection_data["emotion"],
                 "ai_model_available": ai_model_available,
                 "fallback_source":  fallback_source,
+                "cached":           "cache_age_seconds" in result,
+                "cache_age_seconds": result.get("cache_age_seconds"),
+                "precomputed":      result.get("precomputed", False),
                 "state_summary":    state,
-                "error":            None if ai_model_available else "All AI models failed; using decision-tree fallback.",
+                "error":            None if ai_model_available else _fallback_error(result),
             }
         }
     except Exception as e:
@@ -6,44 +6,107 @@ import warnings
 warnings.filterwarnings('ignore', category=UserWarning, module='google.protobuf')
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from typing import List
+from typing import List, Set
 import cv2
+import numpy as np
 import asyncio
 import json
-import base64
+import threading
+import time
 from datetime import datetime
 from backend.detectors.combined_detector import CombinedDetector
 from backend.classifiers.posture_detector import PostureDetector
 from backend.simulator.twin_state import TwinState
-from backend.database.db_logger import log_detection_to_db
-from backend.analytics.data_logger import DataLogger
+from backend.database.events import journal, record_detection
+from backend.database.recent_window import recent_window
+from backend.database.writer import writers_status
 from backend.nlp.sentiment_analyzer import SentimentAnalyzer
+from backend.streaming.broadcaster import FrameBroadcaster
+from backend.streaming.flow_control import AUTO_QUALITY, QualityTier
+from backend.streaming.ingest import ClientFrameIngest
+from backend.streaming.pipeline import DetectionPipeline
+from backend.streaming.protocol import (
+    PROTOCOL_BINARY,
+    PROTOCOLS,
+    FramePacket,
+    encode_results_message,
+    resolve_meta_encoding,
+)
 
 router = APIRouter(prefix="/api/stream", tags=["Stream"])
 
 # Global state
-detector = None
-twin_state = None
-csv_logger = None
-sentiment_analyzer = None
 active_connections: List[WebSocket] = []
+ingest_connections: Set[ClientFrameIngest] = set()
 detection_active = False
 
 
+def encode_jpeg(image, tier: QualityTier) -> bytes:
+    """JPEG-encode a frame at a quality tier's resolution scale and quality."""
+    if tier.scale < 1.0:
+        image = cv2.resize(image, None, fx=tier.scale, fy=tier.scale, interpolation=cv2.INTER_AREA)
+    ok, buffer = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, tier.jpeg_quality])
+    if not ok:
+        raise ValueError("JPEG encoding failed")
+    return buffer.tobytes()
+
+
+# Decode-time downscaling for uploaded frames (libjpeg scales while decoding)
+_DECODE_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+}
+
+
+def decode_client_frame(data: bytes, reduce: int = 2):
+    """Decode an uploaded JPEG at 1/reduce size. Returns None if it is not an image."""
+    flag = _DECODE_FLAGS.get(reduce, cv2.IMREAD_REDUCED_COLOR_2)
+    frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), flag)
+    if frame is None or frame.size == 0:
+        return None
+    return frame
+
+
+class FrameSource:
+    """
+    State of one frame source: the server camera or one client-capture
+    connection. Face tracks, emotion smoothing and the twin follow one
+    person, so every source keeps its own.
+    """
+
+    def __init__(self, detector: CombinedDetector):
+        self.detection = detector.new_state()
+        # Its updates are part of each detection event, not logged separately
+        self.twin = TwinState(log_updates=False)
+
+
 class DetectionManager:
     """Manages the detection process."""
     
     def __init__(self):
         self.detector = CombinedDetector()
         self.posture_detector = PostureDetector()
-        self.twin = TwinState()
-        self.csv_logger = DataLogger(log_dir="logs")
+        self.camera_source = self.new_source()
         self.sentiment_analyzer = SentimentAnalyzer()
         self.cap = None
         self.is_running = False
+        # Guards self.cap: the capture thread reads while commands open/release it
+        self._camera_lock = threading.Lock()
+        # Models and loggers are shared by the camera pipeline and
+        # client-capture connections; one analysis at a time
+        self._analysis_lock = threading.Lock()
+
+    def new_source(self) -> FrameSource:
+        """Tracking, smoothing and twin state for another frame source."""
+        return FrameSource(self.detector)
     
     def start_camera(self):
         """Initialize camera with optimized settings."""
+        with self._camera_lock:
+            return self._open_camera()
+
+    def _open_camera(self):
         if self.cap is not None and self.cap.isOpened():
             return True
         
@@ -68,33 +131,75 @@ class DetectionManager:
     
     def stop_camera(self):
         """Release camera."""
-        if self.cap is not None:
-            self.cap.release()
-            self.cap = None
+        with self._camera_lock:
+            if self.cap is not None:
+                self.cap.release()
+                self.cap = None
     
     def process_frame(self):
-        """Process a single frame and return results."""
+        """Process a single frame and return results (all stages inline)."""
+        frame = self.read_frame()
+        if frame is None:
+            return None
+        analysis = self.analyze_frame(frame)
+        if analysis is None:
+            return None
+        packet = self.encode_result(analysis)
+        return packet.to_dict() if packet is not None else None
+
+    def read_frame(self):
+        """Capture stage: read the next camera frame, or None."""
         try:
-            if self.cap is None or not self.cap.isOpened():
-                # Try to reconnect camera
-                print("Camera not opened, attempting to reconnect...")
-                if not self.start_camera():
-                    print("Failed to reconnect camera")
-                    return None
-            
-            # Read frame directly (buffer=1 prevents lag)
-            ret, frame = self.cap.read()
+            with self._camera_lock:
+                if self.cap is None or not self.cap.isOpened():
+                    # Detection was stopped while this read was pending
+                    if not self.is_running:
+                        return None
+                    # Try to reconnect camera
+                    print("Camera not opened, attempting to reconnect...")
+                    if not self._open_camera():
+                        print("Failed to reconnect camera")
+                        return None
+                
+                # Read frame directly (buffer=1 prevents lag)
+                ret, frame = self.cap.read()
             if not ret or frame is None or frame.size == 0:
                 # Skip this frame but don't stop - camera might recover
                 print("Failed to read frame, will retry")
                 return None
+            return frame
         except Exception as e:
             print(f"Error in process_frame (camera read): {e}")
             return None
-        
+
+    def analyze_frame(self, frame, source: FrameSource = None):
+        """
+        Inference stage: run detectors, sentiment, twin update and logging.
+        Returns the intermediate analysis consumed by encode_result().
+        `source` defaults to the server camera.
+        """
+        with self._analysis_lock:
+            return self._analyze_frame(frame, source or self.camera_source)
+
+    def analyze_client_frame(self, data: bytes, reduce: int = 2, source: FrameSource = None):
+        """
+        Ingest mode: decode a JPEG uploaded by the browser and analyze it
+        with the connection's own `source` state.
+        Returns the results payload only; the frame is not sent back.
+        """
+        frame = decode_client_frame(data, reduce)
+        if frame is None:
+            print("Received client frame that could not be decoded")
+            return None
+        analysis = self.analyze_frame(frame, source)
+        if analysis is None:
+            return None
+        return self.build_payload(analysis)
+
+    def _analyze_frame(self, frame, source: FrameSource):
         # Detect using fresh CNN logic
         try:
-            detection_result = self.detector.process_frame(frame, apply_smoothing=True)
+            detection_result = self.detector.process_frame(frame, apply_smoothing=True, state=source.detection)
             posture_result = self.posture_detector.detect(frame)
             
             # Map fresh CNN results to expected format
@@ -143,7 +248,7 @@ class DetectionManager:
             sentiment_result = {"score": 0, "label": "Neutral", "factors": []}
         
         # Update Twin State
-        self.twin.update_from_inputs(
+        source.twin.update_from_inputs(
             cognitive={"state": "Focused" if results["emotion"] in ["Happy", "Focused"] else "Distracted"},
             mood={"mood": results["emotion"]},
             sentiment=sentiment_result["score"],
@@ -163,27 +268,41 @@ class DetectionManager:
             "sentiment": sentiment_result["score"],
             "environment_feedback": f"Posture: {results['posture']}"
         }
-        log_detection_to_db(entry)
-        self.csv_logger.log_entry(entry)
+        # One journal event; SQLite and the CSV log are fed from it
+        record_detection(entry)
         
-        # Draw detections on frame with enhanced emotion box
+        return {
+            "frame": frame,
+            "detection_result": detection_result,
+            "posture_result": posture_result,
+            "results": results,
+            "sentiment_result": sentiment_result,
+            "twin_state": source.twin.get_snapshot(),
+        }
+
+    def encode_result(self, analysis):
+        """Encode stage: annotate the frame and build the FramePacket."""
+        # Draw the existing detection result; no second inference pass
         try:
-            processed_frame, _ = self.detector.detect_and_annotate(
-                frame.copy(), 
-                apply_smoothing=True
-            )
+            processed_frame = self.detector.draw_results(analysis["frame"], analysis["detection_result"])
         except Exception as e:
             print(f"Error drawing detections: {e}")
-            processed_frame = frame
-        
-        # Convert frame to base64 for sending
-        try:
-            _, buffer = cv2.imencode('.jpg', processed_frame)
-            frame_base64 = base64.b64encode(buffer).decode('utf-8')
-        except Exception as e:
-            print(f"Error encoding frame: {e}")
-            return None
-        
+            processed_frame = analysis["frame"]
+
+        # JPEG encoding happens per quality tier when the packet is published
+        return FramePacket(processed_frame, self.build_payload(analysis), encoder=encode_jpeg)
+
+    def build_payload(self, analysis):
+        """JSON-serializable results, sentiment, model pipeline and twin state."""
+        frame = analysis["frame"]
+        detection_result = analysis["detection_result"]
+        posture_result = analysis["posture_result"]
+        results = analysis["results"]
+        sentiment_result = analysis["sentiment_result"]
+        emotion = detection_result.get('primary_emotion', 'Neutral')
+        confidence = detection_result.get('confidence', 0.0)
+        intensity = detection_result.get('intensity', None)
+
         # Prepare JSON-serializable results (remove any non-serializable objects)
         clean_results = {
             "emotion": str(results.get("emotion", "Unknown")),
@@ -241,87 +360,201 @@ class DetectionManager:
         }
         
         return {
-            "frame": frame_base64,
             "results": clean_results,
             "sentiment": clean_sentiment,
             "model_pipeline": model_pipeline,
-            "twin_state": self.twin.get_snapshot()
+            "twin_state": analysis["twin_state"]
         }
 
 
 # Global detection manager
 detection_manager = DetectionManager()
 
+# One producer shared by every WebSocket client; camera, inference and
+# encoding run on pipeline threads so the event loop stays responsive.
+pipeline = DetectionPipeline(
+    capture=detection_manager.read_frame,
+    infer=detection_manager.analyze_frame,
+    encode=detection_manager.encode_result,
+    is_active=lambda: detection_manager.is_running,
+)
+broadcaster = FrameBroadcaster(pipeline)
+
 
 @router.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
-    """WebSocket endpoint for real-time detection streaming."""
+    """
+    WebSocket endpoint for real-time detection streaming.
+
+    Query params:
+    - protocol: "json" (default) or "binary"
+    - meta: metadata encoding for binary mode, "msgpack" (default) or "json"
+    - pipeline_every: binary mode sends model_pipeline every N frames (default: 1)
+    - quality: "auto" (default) adapts JPEG quality, resolution and fps to how
+      fast this client drains its socket; "high", "medium", "low" or
+      "minimal" pins a tier
+    - source: "server" (default) streams the server camera; "client" means
+      the browser captures its own camera and sends binary JPEG frames,
+      and the server replies with results only (no frame)
+    - reduce: client mode decode downscale, 1, 2 (default) or 4
+
+    The format can also be changed later with {"action": "configure",
+    "protocol": ..., "meta": ..., "pipeline_every": ..., "quality": ...}.
+    In client mode "start"/"stop" only pause or resume frame processing.
+    """
     await websocket.accept()
     active_connections.append(websocket)
 
+    params = websocket.query_params
+    try:
+        pipeline_every = int(params.get("pipeline_every", 1))
+    except ValueError:
+        pipeline_every = 1
+    client_capture = params.get("source", "server") == "client"
+
+    subscription = None
+    ingest = None
+    if client_capture:
+        try:
+            reduce = int(params.get("reduce", 2))
+        except ValueError:
+            reduce = 2
+        protocol = PROTOCOL_BINARY if params.get("protocol") == PROTOCOL_BINARY else "json"
+        meta_encoding = resolve_meta_encoding(params.get("meta"))
+
+        async def send_results(payload):
+            message = encode_results_message(payload, protocol, meta_encoding)
+            if isinstance(message, bytes):
+                await websocket.send_bytes(message)
+            else:
+                await websocket.send_text(message)
+
+        # This browser's own tracks, smoothing and twin
+        source = detection_manager.new_source()
+        ingest = ClientFrameIngest(
+            process=lambda data: detection_manager.analyze_client_frame(data, reduce, source),
+            send=send_results,
+        )
+        ingest_connections.add(ingest)
+    else:
+        subscription = broadcaster.subscribe(
+            protocol=params.get("protocol", "json"),
+            meta_encoding=params.get("meta"),
+            pipeline_every=pipeline_every,
+            quality=params.get("quality", AUTO_QUALITY),
+        )
+
+    def format_status():
+        if ingest is not None:
+            return {
+                "source": "client",
+                "protocol": protocol,
+                "meta_encoding": meta_encoding if protocol == PROTOCOL_BINARY else None,
+                "reduce": reduce,
+            }
+        return {
+            "source": "server",
+            "protocol": subscription.protocol,
+            "meta_encoding": subscription.meta_encoding if subscription.protocol == PROTOCOL_BINARY else None,
+            "pipeline_every": subscription.pipeline_every,
+            "quality": subscription.flow.status(),
+        }
+
+    def is_running():
+        return ingest.active if ingest is not None else detection_manager.is_running
+
+    def release():
+        if subscription is not None:
+            broadcaster.unsubscribe(subscription)
+        if ingest is not None:
+            ingest_connections.discard(ingest)
+        if websocket in active_connections:
+            active_connections.remove(websocket)
+
     # Send current detection status without auto-starting
-    await websocket.send_json({
-        "type": "status",
-        "message": "Connected to detection server",
-        "running": detection_manager.is_running
-    })
-    
+    try:
+        await websocket.send_json({
+            "type": "status",
+            "message": "Connected to detection server",
+            "running": is_running(),
+            **format_status()
+        })
+    except Exception:
+        release()
+        raise
+
     async def send_detection_data():
-        """Continuously send detection data while running."""
-        print(f"Detection streaming task started. Current status: is_running={detection_manager.is_running}")
+        """Forward frames from the shared producer to this client."""
         frame_count = 0
-        
         try:
-            # Stream frames only while detection is explicitly running
             while True:
-                # Check if we should stop this connection's streaming
-                if not detection_manager.is_running:
-                    # Wait briefly and check again (allows restart without reconnecting)
-                    await asyncio.sleep(0.1)
-                    continue
-                
-                # Detection is running, process and send frames
+                packet = await subscription.get()
+
+                # Respect this client's fps cap, then send the newest frame
+                delay = subscription.flow.delay_until_ready()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                    packet = subscription.latest(packet)
+
+                # Normally built on the encode thread; after a tier or format
+                # change the first frame is built off the event loop.
+                wire_format = subscription.wire_format(packet.seq)
+                if packet.is_encoded(wire_format):
+                    message = packet.encode(wire_format)
+                else:
+                    message = await asyncio.to_thread(packet.encode, wire_format)
+
                 try:
-                    result = detection_manager.process_frame()
-                    if result:
-                        try:
-                            await websocket.send_json({
-                                "type": "detection",
-                                "data": result
-                            })
-                            frame_count += 1
-                            if frame_count % 100 == 0:
-                                print(f"Sent {frame_count} frames")
-                        except Exception as send_err:
-                            # Connection issue - exit this loop
-                            print(f"Failed to send frame (connection closed): {send_err}")
-                            break
+                    started = time.perf_counter()
+                    if isinstance(message, bytes):
+                        await websocket.send_bytes(message)
                     else:
-                        # No result from camera
-                        await asyncio.sleep(0.05)
-                        continue
-                        
-                    await asyncio.sleep(0.033)  # ~30 FPS
-                except Exception as e:
-                    print(f"Frame processing error: {e}")
-                    await asyncio.sleep(0.1)
-                    continue
-                    
+                        await websocket.send_text(message)
+                    send_time = time.perf_counter() - started
+                    subscription.sent += 1
+                    frame_count += 1
+                except Exception as send_err:
+                    # Connection issue - exit this loop
+                    print(f"Failed to send frame (connection closed): {send_err}")
+                    break
+
+                if subscription.flow.record_send(send_time):
+                    broadcaster.refresh_settings()
+                    print(f"Client {subscription.id} quality -> {subscription.flow.tier.name}")
+                    await websocket.send_json({
+                        "type": "quality",
+                        **subscription.flow.status()
+                    })
         finally:
             print(f"Streaming ended for this connection. Total frames: {frame_count}")
     
     async def handle_commands():
-        """Handle start/stop commands from client."""
+        """Handle start/stop commands (and uploaded frames in client mode)."""
         should_stop = False
         while not should_stop:
             try:
-                data = await websocket.receive_text()
-                command = json.loads(data)
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    raise WebSocketDisconnect(message.get("code", 1000))
+                if message.get("bytes") is not None:
+                    if ingest is not None:
+                        ingest.submit(message["bytes"])
+                    continue
+                command = json.loads(message.get("text") or "{}")
                 print(f"Received command: {command.get('action')}")
-                
-                if command.get("action") == "start":
+
+                if ingest is not None and command.get("action") in ("start", "stop"):
+                    # Client capture: the browser owns the camera
+                    ingest.active = command["action"] == "start"
+                    await websocket.send_json({
+                        "type": "status",
+                        "message": "Detection started" if ingest.active else "Detection stopped",
+                        "running": ingest.active
+                    })
+
+                elif command.get("action") == "start":
                     if not detection_manager.is_running:
-                        if detection_manager.start_camera():
+                        if await asyncio.to_thread(detection_manager.start_camera):
                             detection_manager.is_running = True
                             print("Detection started by command")
                             await websocket.send_json({
@@ -344,7 +577,7 @@ async def websocket_endpoint(websocket: WebSocket):
                 elif command.get("action") == "stop":
                     print("Stop command received - stopping detection")
                     detection_manager.is_running = False
-                    detection_manager.stop_camera()
+                    await asyncio.to_thread(detection_manager.stop_camera)
                     await websocket.send_json({
                         "type": "status",
                         "message": "Detection stopped",
@@ -352,6 +585,28 @@ async def websocket_endpoint(websocket: WebSocket):
                     })
                     # Don't exit command loop - allow restart without reconnecting
                     print("Detection stopped, ready for new commands")
+
+                elif command.get("action") == "configure" and subscription is not None:
+                    requested = command.get("protocol")
+                    if requested is not None and requested not in PROTOCOLS:
+                        await websocket.send_json({
+                            "type": "error",
+                            "message": f"Unknown protocol '{requested}', expected one of {list(PROTOCOLS)}"
+                        })
+                        continue
+                    subscription.configure(
+                        protocol=requested,
+                        meta_encoding=command.get("meta"),
+                        pipeline_every=command.get("pipeline_every"),
+                        quality=command.get("quality"),
+                    )
+                    broadcaster.refresh_settings()
+                    await websocket.send_json({
+                        "type": "status",
+                        "message": "Stream format updated",
+                        "running": detection_manager.is_running,
+                        **format_status()
+                    })
                     
             except WebSocketDisconnect:
                 print("Client disconnected from command handler")
@@ -363,7 +618,10 @@ async def websocket_endpoint(websocket: WebSocket):
     
     # Run both tasks concurrently
     try:
-        detection_task = asyncio.create_task(send_detection_data())
+        if ingest is not None:
+            detection_task = asyncio.create_task(ingest.run())
+        else:
+            detection_task = asyncio.create_task(send_detection_data())
         command_task = asyncio.create_task(handle_commands())
         
         # Wait for either task to complete (stop command or connection issue)
@@ -386,8 +644,7 @@ async def websocket_endpoint(websocket: WebSocket):
         print(f"WebSocket main error: {e}")
     finally:
         # Clean up connection
-        if websocket in active_connections:
-            active_connections.remove(websocket)
+        release()
         
         # If this was the last connection and detection is still running,
         # keep it running (don't auto-stop on disconnect)
@@ -405,7 +662,7 @@ async def start_detection():
             "message": "Detection already running"
         }
     
-    if detection_manager.start_camera():
+    if await asyncio.to_thread(detection_manager.start_camera):
         detection_active = True
         return {
             "success": True,
@@ -423,7 +680,7 @@ async def stop_detection():
     """Stop detection process."""
     global detection_active
     
-    detection_manager.stop_camera()
+    await asyncio.to_thread(detection_manager.stop_camera)
     detection_active = False
     
     return {
@@ -439,7 +696,19 @@ def get_detection_status():
         "success": True,
         "data": {
             "running": detection_active,
-            "has_camera": detection_manager.cap is not None and detection_manager.cap.isOpened()
+            "has_camera": detection_manager.cap is not None and detection_manager.cap.isOpened(),
+            "clients": broadcaster.subscriber_count,
+            "client_streams": broadcaster.clients_status(),
+            "frames_published": broadcaster.frames_published,
+            "ingest_clients": [ingest.status() for ingest in ingest_connections],
+            "log_writers": writers_status(),
+            "journal": journal.status(),
+            "recent_window": recent_window.status(),
+            "pipeline": {
+                "running": pipeline.running,
+                "queue_depths": pipeline.queue_depths(),
+                "stats": dict(pipeline.stats)
+            }
         }
     }
 
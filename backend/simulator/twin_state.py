@@ -8,23 +8,24 @@ based on emotional, cognitive, and environmental inputs.
 # backend/simulator/twin_state.py
 
 from datetime import datetime
-from backend.analytics.data_logger import DataLogger
+from backend.database.events import record_event
 
 
 class TwinState:
     """
     Represents internal state of the user's digital twin.
-    Automatically logs each update.
+    Logs each update to the event journal unless log_updates is False
+    (the detection stream records the same fields in its own events).
     """
 
-    def __init__(self):
+    def __init__(self, log_updates=True):
         self.energy = 100
         self.focus = 80
         self.mood = "Neutral"
         self.health = 90
         self.social_level = 50
         self.last_update = datetime.now().strftime("%H:%M:%S")
-        self.logger = DataLogger()
+        self.log_updates = log_updates
 
     def update_from_inputs(self, cognitive, mood, sentiment=None, environment_feedback=None):
         # Update based on current inputs
@@ -36,7 +37,9 @@ class TwinState:
         self.last_update = datetime.now().strftime("%H:%M:%S")
 
         # ✅ Log simulation cycle
-        self.logger.log_entry({
+        if not self.log_updates:
+            return
+        record_event("twin", {
             "emotion": self.mood,
             "cognitive_state": cognitive.get("state"),
             "mood": self.mood,
@@ -20,6 +20,8 @@ class Config:
     
     # Performance Settings
     ANALYSIS_THROTTLE = 3  # Analyze every N frames to improve performance
+    FACE_REDETECT_INTERVAL = 10  # Full Haar detection every N frames, tracked in between
+    FACE_TRACK_MIN_CONFIDENCE = 0.5  # Re-detect early when optical flow agreement drops below this
     
     # Analysis Settings
     ANALYSIS_INTERVAL = 0.1  # Seconds between emotion checks
@@ -1,7 +1,11 @@
 import os
 import cv2
 import numpy as np
+import queue
 import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future
 from backend.src.config import Config
 
 try:
@@ -20,6 +24,9 @@ try:
 except Exception:
     DeepFace = None
 
+# Result of one analyze() request; seq identifies the frame it belongs to
+AnalysisResult = namedtuple("AnalysisResult", ["seq", "emotion", "probabilities"])
+
 class EmotionAnalyzer:
     def __init__(self):
         self.deepface_model = "liveness" # DeepFace handles its own models
@@ -29,10 +36,20 @@ class EmotionAnalyzer:
         
         self.current_emotion = "neutral"
         self.emotion_probs = {e: 0.0 for e in Config.EMOTIONS}
+        self.result_seq = 0
         self.lock = threading.Lock()
-        self.analysis_lock = threading.Lock()
+        # Serializes model calls between the worker thread and analyze_batch()
+        self.model_lock = threading.Lock()
         self.running = False
 
+        # One long-lived worker fed by a single-slot queue: a new request
+        # replaces one that has not started yet (latest frame wins)
+        self._requests = queue.Queue(maxsize=1)
+        self._submit_lock = threading.Lock()
+        self._worker = None
+        self._seq = 0
+        self.stats = {"submitted": 0, "completed": 0, "coalesced": 0, "failed": 0, "avg_ms": 0.0}
+
     def load_custom_model(self):
         try:
             if load_model is None:
@@ -49,72 +66,172 @@ class EmotionAnalyzer:
 
     def start(self):
         self.running = True
-        
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._worker_loop, name="EmotionAnalyzer", daemon=True)
+            self._worker.start()
+
     def stop(self):
         self.running = False
+        worker = self._worker
+        if worker is None:
+            return
+        with self._submit_lock:
+            self._cancel_pending()
+            self._requests.put(None)
+        worker.join(timeout=2.0)
+        self._worker = None
 
-    def analyze(self, face_img):
+    def analyze(self, face_img, callback=None):
         """
-        Runs analysis in a separate thread to avoid blocking the UI.
+        Queue a face for analysis on the worker thread without blocking.
+
+        Returns a Future resolving to an AnalysisResult (or None if the
+        models produced nothing). If a newer request arrives before this
+        one starts, this one is cancelled. `callback(result)` is called on
+        the worker thread after a successful analysis.
         """
         if not self.running:
-            return
+            return None
 
-        # Keep only one active analysis thread at a time.
-        # This prevents concurrent DeepFace model/weight initialization.
-        if not self.analysis_lock.acquire(blocking=False):
-            return
+        future = Future()
+        with self._submit_lock:
+            self._seq += 1
+            self.stats["submitted"] += 1
+            self._cancel_pending()
+            self._requests.put_nowait((self._seq, face_img, future, callback))
+        return future
 
-        threading.Thread(target=self._analyze_thread, args=(face_img,)).start()
+    def queue_depth(self):
+        return self._requests.qsize()
 
-    def _analyze_thread(self, face_img):
+    def _cancel_pending(self):
         try:
-            if face_img is None or face_img.size == 0:
-                return
+            stale = self._requests.get_nowait()
+        except queue.Empty:
+            return
+        if stale is not None:
+            stale[2].cancel()
+            self.stats["coalesced"] += 1
 
-            # 1. Custom Model Analysis (Fast)
-            custom_probs = {}
-            if self.custom_model and img_to_array is not None:
-                roi = cv2.resize(face_img, (48, 48))
-                roi = roi.astype("float") / 255.0
-                roi = img_to_array(roi)
-                roi = np.expand_dims(roi, axis=0)
-                
-                preds = self.custom_model.predict(roi, verbose=0)[0]
-                custom_probs = {label: float(prob) for label, prob in zip(Config.EMOTIONS, preds)}
+    def _worker_loop(self):
+        while True:
+            request = self._requests.get()
+            if request is None:
+                break
+            seq, face_img, future, callback = request
+            if not future.set_running_or_notify_cancel():
+                continue
 
-            # 2. DeepFace Analysis (Accurate but Slower)
-            # We can skip DeepFace every few frames or run it less frequently if needed
-            # For now, let's rely on the custom model for speed if available, 
-            # or use DeepFace if custom model is missing.
-            
-            final_probs = custom_probs
-            
-            if not final_probs and self.deepface_available: # Fallback to DeepFace if no custom model
+            started = time.perf_counter()
+            try:
+                result = self._analyze_request(seq, face_img)
+            except Exception as e:
+                print(f"Analysis Error: {e}")
+                self.stats["failed"] += 1
+                future.set_exception(e)
+                continue
+
+            elapsed_ms = (time.perf_counter() - started) * 1000.0
+            self.stats["completed"] += 1
+            self.stats["avg_ms"] += (elapsed_ms - self.stats["avg_ms"]) / self.stats["completed"]
+            future.set_result(result)
+
+            if callback is not None:
                 try:
-                    # DeepFace expects BGR
-                    result = DeepFace.analyze(face_img, actions=['emotion'], enforce_detection=False, silent=True)
-                    if result and isinstance(result, list) and len(result) > 0:
-                        emotion_data = result[0].get('emotion', {})
-                        # Normalize keys to lowercase and convert to 0-1 range
-                        final_probs = {k.lower(): float(v)/100.0 for k, v in emotion_data.items()}
+                    callback(result)
                 except Exception as e:
-                    print(f"DeepFace analysis error: {e}")
-                    pass
-            elif not final_probs:
-                final_probs = {"neutral": 1.0}
+                    print(f"Analysis callback error: {e}")
 
-            # Update State
-            if final_probs:
-                with self.lock:
-                    self.emotion_probs = final_probs
-                    self.current_emotion = max(final_probs, key=final_probs.get)
+    def _analyze_request(self, seq, face_img):
+        if face_img is None or face_img.size == 0:
+            return None
 
+        final_probs = self.predict_batch([face_img])[0]
+        if not final_probs:
+            return None
+
+        emotion = max(final_probs, key=final_probs.get)
+        # Update State; results for older frames never overwrite newer ones
+        with self.lock:
+            if seq > self.result_seq:
+                self.result_seq = seq
+                self.emotion_probs = final_probs
+                self.current_emotion = emotion
+        return AnalysisResult(seq, emotion, final_probs)
+
+    def analyze_batch(self, face_imgs):
+        """
+        Synchronous multi-face analysis.
+        Returns one (emotion, probabilities) pair per face, in input order.
+        """
+        results = []
+        for probs in self.predict_batch(face_imgs):
+            if not probs:
+                probs = {"neutral": 1.0}
+            results.append((max(probs, key=probs.get), probs))
+        return results
+
+    def predict_batch(self, face_imgs):
+        """
+        Emotion probabilities for each face crop.
+
+        The custom model scores every face in one forward pass; DeepFace
+        (used only when no custom model is loaded) has no batch API and
+        runs per face.
+        """
+        face_imgs = list(face_imgs)
+        if not face_imgs:
+            return []
+
+        with self.model_lock:
+            # 1. Custom Model Analysis (Fast)
+            if self.custom_model is not None:
+                try:
+                    batch = self._prepare_batch(face_imgs)
+                    # One forward pass for all faces, without predict()'s per-call setup
+                    preds = np.asarray(self.custom_model.predict_on_batch(batch))
+                    return [
+                        {label: float(prob) for label, prob in zip(Config.EMOTIONS, row)}
+                        for row in preds
+                    ]
+                except Exception as e:
+                    print(f"Custom model batch error: {e}")
+
+            # 2. DeepFace Analysis (Accurate but Slower)
+            if self.deepface_available:
+                return [self._deepface_probs(face_img) for face_img in face_imgs]
+
+        return [{"neutral": 1.0} for _ in face_imgs]
+
+    def _prepare_batch(self, face_imgs):
+        """Stack face crops into one float32 (N, 48, 48, C) tensor."""
+        channels = self.custom_model.input_shape[-1] or 1
+        batch = np.empty((len(face_imgs), 48, 48, channels), dtype=np.float32)
+        for i, face_img in enumerate(face_imgs):
+            roi = cv2.resize(face_img, (48, 48))
+            if channels == 1 and roi.ndim == 3:
+                roi = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
+            batch[i] = roi.reshape(48, 48, -1)[:, :, :channels]
+        batch /= 255.0
+        return batch
+
+    def _deepface_probs(self, face_img):
+        try:
+            # DeepFace expects BGR
+            result = DeepFace.analyze(face_img, actions=['emotion'], enforce_detection=False, silent=True)
+            if result and isinstance(result, list) and len(result) > 0:
+                emotion_data = result[0].get('emotion', {})
+                # Normalize keys to lowercase and convert to 0-1 range
+                return {k.lower(): float(v)/100.0 for k, v in emotion_data.items()}
         except Exception as e:
-            print(f"Analysis Error: {e}")
-        finally:
-            self.analysis_lock.release()
+            print(f"DeepFace analysis error: {e}")
+        return {}
 
     def get_results(self):
         with self.lock:
             return self.current_emotion, self.emotion_probs
+
+    def get_latest(self):
+        """Latest result together with the sequence number of its request."""
+        with self.lock:
+            return AnalysisResult(self.result_seq, self.current_emotion, self.emotion_probs)
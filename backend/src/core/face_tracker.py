@@ -0,0 +1,202 @@
+"""
+Face tracking between Haar cascade detections.
+
+A full-frame detectMultiScale costs tens of milliseconds. Between
+detections each face box is carried forward with sparse optical flow
+(Lucas-Kanade on corners inside the box) and smoothed with a
+constant-velocity alpha-beta filter, which costs a few milliseconds and
+removes most of the cascade's box jitter. A full detection runs every
+N frames, or as soon as a track's flow confidence drops.
+"""
+import time
+
+import cv2
+import numpy as np
+
+from backend.src.config import Config
+
+
+def _iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ix = max(0.0, min(ax + aw, bx + bw) - max(ax, bx))
+    iy = max(0.0, min(ay + ah, by + bh) - max(ay, by))
+    inter = ix * iy
+    union = aw * ah + bw * bh - inter
+    return inter / union if union > 0 else 0.0
+
+
+class FaceTrack:
+    """One tracked face: box (x, y, w, h) as floats plus its velocity."""
+
+    def __init__(self, track_id, box):
+        self.id = track_id
+        self.box = np.asarray(box, dtype=np.float32)
+        self.velocity = np.zeros(2, dtype=np.float32)
+        self.confidence = 1.0
+        self.age = 0
+
+    def predict(self):
+        """Constant-velocity prediction of the next box."""
+        predicted = self.box.copy()
+        predicted[:2] += self.velocity
+        return predicted
+
+    def correct(self, measured, alpha, beta):
+        """Blend a measured box into the prediction (alpha-beta filter)."""
+        predicted = self.predict()
+        residual = np.asarray(measured, dtype=np.float32) - predicted
+        self.box = predicted + alpha * residual
+        self.velocity += beta * residual[:2]
+        self.age += 1
+
+    def as_bbox(self):
+        x, y, w, h = self.box
+        return int(round(x)), int(round(y)), int(round(w)), int(round(h))
+
+
+class FaceTracker:
+    """
+    Wraps a face detector with optical-flow tracking.
+
+    Usage:
+        tracker = FaceTracker(SimpleFaceDetector())
+        boxes = tracker.update(frame)   # list of (x, y, w, h)
+    """
+
+    def __init__(
+        self,
+        detector,
+        redetect_interval=Config.FACE_REDETECT_INTERVAL,
+        min_confidence=Config.FACE_TRACK_MIN_CONFIDENCE,
+        alpha=0.6,
+        beta=0.2,
+        max_points=40,
+    ):
+        self.detector = detector
+        self.redetect_interval = max(1, redetect_interval)
+        self.min_confidence = min_confidence
+        self.alpha = alpha
+        self.beta = beta
+        self.max_points = max_points
+
+        self.tracks = []
+        self._next_id = 1
+        self._prev_gray = None
+        self._frames_since_detect = 0
+        self.stats = {"detections": 0, "tracked": 0, "detect_ms": 0.0, "track_ms": 0.0}
+
+    def reset(self):
+        self.tracks = []
+        self._prev_gray = None
+        self._frames_since_detect = 0
+
+    def update(self, frame):
+        """Return face boxes for this frame, detecting only when needed."""
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+        # A different source or resolution invalidates the tracks
+        if self._prev_gray is not None and self._prev_gray.shape != gray.shape:
+            self.reset()
+
+        started = time.perf_counter()
+        if self._needs_detection() or not self._track(gray):
+            self._detect(frame, gray)
+            self._record("detections", "detect_ms", started)
+        else:
+            self._frames_since_detect += 1
+            self._record("tracked", "track_ms", started)
+
+        self._prev_gray = gray
+        return [track.as_bbox() for track in self.tracks]
+
+    def _needs_detection(self):
+        return (
+            self._prev_gray is None
+            or not self.tracks
+            or self._frames_since_detect >= self.redetect_interval
+        )
+
+    def _detect(self, frame, gray):
+        detections = [tuple(map(float, face)) for face in self.detector.detect(frame)]
+        matched = []
+        unmatched = list(self.tracks)
+
+        for box in detections:
+            best = max(unmatched, key=lambda t: _iou(t.box, box), default=None)
+            if best is not None and _iou(best.box, box) > 0.3:
+                # Smooth the cascade's jitter into the existing track
+                best.correct(box, self.alpha, self.beta)
+                best.confidence = 1.0
+                unmatched.remove(best)
+                matched.append(best)
+            else:
+                matched.append(FaceTrack(self._next_id, box))
+                self._next_id += 1
+
+        self.tracks = matched
+        self._frames_since_detect = 0
+
+    def _track(self, gray):
+        """Move every track by optical flow. False means a detection is needed."""
+        frame_h, frame_w = gray.shape[:2]
+        for track in self.tracks:
+            measured, confidence = self._flow(gray, track)
+            track.confidence = confidence
+            if measured is None or confidence < self.min_confidence:
+                return False
+            track.correct(measured, self.alpha, self.beta)
+            x, y, w, h = track.box
+            if x + w < 0 or y + h < 0 or x > frame_w or y > frame_h:
+                return False
+        return True
+
+    def _flow(self, gray, track):
+        """Measured box and confidence (share of consistent flow points)."""
+        x, y, w, h = track.as_bbox()
+        frame_h, frame_w = gray.shape[:2]
+        x0, y0 = max(0, x), max(0, y)
+        x1, y1 = min(frame_w, x + w), min(frame_h, y + h)
+        if x1 - x0 < 8 or y1 - y0 < 8:
+            return None, 0.0
+
+        mask = np.zeros_like(self._prev_gray)
+        mask[y0:y1, x0:x1] = 255
+        points = cv2.goodFeaturesToTrack(
+            self._prev_gray, maxCorners=self.max_points, qualityLevel=0.01, minDistance=4, mask=mask
+        )
+        if points is None or len(points) < 4:
+            return None, 0.0
+
+        lk = dict(winSize=(15, 15), maxLevel=2)
+        moved, status, _ = cv2.calcOpticalFlowPyrLK(self._prev_gray, gray, points, None, **lk)
+        back, back_status, _ = cv2.calcOpticalFlowPyrLK(gray, self._prev_gray, moved, None, **lk)
+
+        # Forward-backward check rejects points that drifted
+        error = np.linalg.norm(points - back, axis=2).ravel()
+        good = (status.ravel() == 1) & (back_status.ravel() == 1) & (error < 1.0)
+        confidence = float(good.sum()) / len(points)
+        if good.sum() < 4:
+            return None, confidence
+
+        old = points[good].reshape(-1, 2)
+        new = moved[good].reshape(-1, 2)
+        dx, dy = np.median(new - old, axis=0)
+
+        # Scale from the spread of the points around their centre
+        old_spread = np.median(np.linalg.norm(old - old.mean(axis=0), axis=1))
+        new_spread = np.median(np.linalg.norm(new - new.mean(axis=0), axis=1))
+        scale = new_spread / old_spread if old_spread > 1e-3 else 1.0
+        scale = float(np.clip(scale, 0.9, 1.1))
+
+        bx, by, bw, bh = track.box
+        cx, cy = bx + bw / 2 + dx, by + bh / 2 + dy
+        bw, bh = bw * scale, bh * scale
+        return (cx - bw / 2, cy - bh / 2, bw, bh), confidence
+
+    def _record(self, counter, timer, started):
+        elapsed_ms = (time.perf_counter() - started) * 1000.0
+        count = self.stats[counter] + 1
+        self.stats[counter] = count
+        # Running average per mode
+        self.stats[timer] += (elapsed_ms - self.stats[timer]) / count
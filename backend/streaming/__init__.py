@@ -0,0 +1 @@
+"""Real-time detection streaming helpers."""
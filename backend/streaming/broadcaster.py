@@ -0,0 +1,199 @@
+# backend/streaming/broadcaster.py
+"""
+Single-producer fan-out for detection streaming.
+
+One producer (the detection pipeline) captures, infers and encodes each
+frame once; every connected WebSocket client receives the same packet,
+serialized once per wire format and quality tier.
+"""
+import asyncio
+import itertools
+from typing import Dict, List, Optional, Set, Tuple
+
+from backend.streaming.flow_control import AUTO_QUALITY, FlowController
+from backend.streaming.pipeline import DetectionPipeline
+from backend.streaming.protocol import (
+    PROTOCOL_BINARY,
+    PROTOCOL_JSON,
+    FramePacket,
+    WireFormat,
+    resolve_meta_encoding,
+)
+
+# (protocol, metadata encoding, pipeline_every, quality tier name)
+SubscriptionSettings = Tuple[str, str, int, str]
+
+_subscription_ids = itertools.count(1)
+
+
+def _wire_format(settings: SubscriptionSettings, seq: int) -> WireFormat:
+    """Wire format for a frame; JSON always carries the full payload."""
+    protocol, meta_encoding, pipeline_every, tier_name = settings
+    include_pipeline = protocol != PROTOCOL_BINARY or seq % pipeline_every == 0
+    return protocol, meta_encoding, include_pipeline, tier_name
+
+
+class Subscription:
+    """
+    Latest-packet slot, wire format and flow control for one client.
+    A slow client never blocks the producer: an unsent packet is
+    replaced by the newer one.
+    """
+
+    def __init__(
+        self,
+        protocol: str = PROTOCOL_JSON,
+        meta_encoding: str = None,
+        pipeline_every: int = 1,
+        quality: str = AUTO_QUALITY,
+    ):
+        self.id = next(_subscription_ids)
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+        self.sent = 0
+        self.dropped = 0
+        self.protocol = PROTOCOL_JSON
+        self.meta_encoding = resolve_meta_encoding()
+        self.pipeline_every = 1
+        self.flow = FlowController(quality)
+        self.configure(protocol, meta_encoding, pipeline_every)
+
+    def configure(
+        self,
+        protocol: str = None,
+        meta_encoding: str = None,
+        pipeline_every: int = None,
+        quality: str = None,
+    ):
+        """Change the wire format or quality. Unknown protocols fall back to JSON."""
+        if protocol is not None:
+            self.protocol = PROTOCOL_BINARY if protocol == PROTOCOL_BINARY else PROTOCOL_JSON
+        if meta_encoding is not None or protocol is not None:
+            self.meta_encoding = resolve_meta_encoding(meta_encoding)
+        if pipeline_every is not None:
+            self.pipeline_every = max(1, int(pipeline_every))
+        if quality is not None:
+            self.flow.set_quality(quality)
+
+    def settings(self) -> SubscriptionSettings:
+        return self.protocol, self.meta_encoding, self.pipeline_every, self.flow.tier.name
+
+    def wire_format(self, seq: int) -> WireFormat:
+        return _wire_format(self.settings(), seq)
+
+    def offer(self, packet: FramePacket):
+        """Store a packet, replacing any packet the client has not taken yet."""
+        if self._queue.full():
+            try:
+                self._queue.get_nowait()
+                self.dropped += 1
+            except asyncio.QueueEmpty:
+                pass
+        self._queue.put_nowait(packet)
+
+    async def get(self) -> FramePacket:
+        """Wait for the next packet."""
+        return await self._queue.get()
+
+    def latest(self, packet: FramePacket) -> FramePacket:
+        """Swap `packet` for a newer one if it arrived meanwhile."""
+        try:
+            newer = self._queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return packet
+        self.dropped += 1
+        return newer
+
+    def status(self) -> Dict:
+        return {
+            "id": self.id,
+            "protocol": self.protocol,
+            "meta_encoding": self.meta_encoding if self.protocol == PROTOCOL_BINARY else None,
+            "pipeline_every": self.pipeline_every,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "quality": self.flow.status(),
+        }
+
+
+class FrameBroadcaster:
+    """
+    Runs one detection pipeline for all subscribers.
+
+    The pipeline starts with the first subscriber and stops after the last
+    one leaves. Packets are serialized on the pipeline's encode thread for
+    every wire format and quality tier in use; the event loop only delivers
+    finished messages.
+
+    Usage:
+        broadcaster = FrameBroadcaster(pipeline)
+        sub = broadcaster.subscribe(protocol="binary")
+        packet = await sub.get()
+        message = packet.encode(sub.wire_format(packet.seq))   # cached
+        broadcaster.unsubscribe(sub)
+    """
+
+    def __init__(self, pipeline: DetectionPipeline):
+        self.pipeline = pipeline
+        self._subscribers: Set[Subscription] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Immutable snapshot of subscriber settings, read by the encode thread
+        self._settings_in_use: Tuple[SubscriptionSettings, ...] = ()
+        self._seq = 0
+        self.frames_published = 0
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(
+        self,
+        protocol: str = PROTOCOL_JSON,
+        meta_encoding: str = None,
+        pipeline_every: int = 1,
+        quality: str = AUTO_QUALITY,
+    ) -> Subscription:
+        """Register a client and start the pipeline if it is not running."""
+        sub = Subscription(protocol, meta_encoding, pipeline_every, quality)
+        self._subscribers.add(sub)
+        self.refresh_settings()
+        self._loop = asyncio.get_running_loop()
+        if not self.pipeline.running:
+            self.pipeline.start(self.publish)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        """Remove a client. The pipeline stops once nobody is listening."""
+        self._subscribers.discard(sub)
+        self.refresh_settings()
+        if not self._subscribers:
+            self.pipeline.stop()
+
+    def refresh_settings(self):
+        """Call after a subscription's wire format or quality tier changes."""
+        self._settings_in_use = tuple({sub.settings() for sub in self._subscribers})
+
+    def clients_status(self) -> List[Dict]:
+        return [sub.status() for sub in sorted(self._subscribers, key=lambda s: s.id)]
+
+    def publish(self, packet: FramePacket):
+        """
+        Serialize a packet for every wire format in use and schedule delivery
+        to every subscriber. Called from the pipeline's encode thread.
+        """
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+
+        self._seq += 1
+        packet.seq = self._seq
+        for settings in self._settings_in_use:
+            packet.encode(_wire_format(settings, packet.seq))
+
+        loop.call_soon_threadsafe(self._fan_out, packet)
+
+    def _fan_out(self, packet: FramePacket):
+        self.frames_published += 1
+        for sub in list(self._subscribers):
+            sub.offer(packet)
+        if self.frames_published % 100 == 0:
+            print(f"Published {self.frames_published} frames to {self.subscriber_count} client(s)")
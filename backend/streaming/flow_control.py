@@ -0,0 +1,140 @@
+# backend/streaming/flow_control.py
+"""
+Per-client adaptive stream quality.
+
+Each client is sent frames at a quality tier (JPEG quality, resolution
+scale and frame-rate cap). The controller watches how long sends take:
+when a client's socket drains slowly, send time grows and the client is
+moved down a tier; when it keeps up comfortably it is moved back up.
+"""
+import time
+from typing import Dict, NamedTuple, Optional
+
+
+class QualityTier(NamedTuple):
+    name: str
+    jpeg_quality: int
+    scale: float
+    max_fps: float
+
+    @property
+    def frame_interval(self) -> float:
+        return 1.0 / self.max_fps
+
+
+# Ordered best -> worst
+QUALITY_TIERS = (
+    QualityTier("high", jpeg_quality=85, scale=1.0, max_fps=30),
+    QualityTier("medium", jpeg_quality=70, scale=0.75, max_fps=20),
+    QualityTier("low", jpeg_quality=55, scale=0.5, max_fps=12),
+    QualityTier("minimal", jpeg_quality=40, scale=0.5, max_fps=5),
+)
+TIERS_BY_NAME = {tier.name: tier for tier in QUALITY_TIERS}
+AUTO_QUALITY = "auto"
+
+
+class FlowController:
+    """
+    Chooses a quality tier for one client from its measured send times.
+
+    Send time is tracked as an exponentially weighted moving average and
+    compared with the current tier's frame interval:
+      - above `downgrade_ratio` of the interval for `downgrade_after`
+        consecutive sends -> one tier down
+      - below `upgrade_ratio` of the next tier's interval for
+        `upgrade_after` consecutive sends -> one tier up
+    """
+
+    def __init__(
+        self,
+        quality: str = AUTO_QUALITY,
+        smoothing: float = 0.3,
+        downgrade_ratio: float = 0.5,
+        upgrade_ratio: float = 0.15,
+        downgrade_after: int = 3,
+        upgrade_after: int = 45,
+    ):
+        self.smoothing = smoothing
+        self.downgrade_ratio = downgrade_ratio
+        self.upgrade_ratio = upgrade_ratio
+        self.downgrade_after = downgrade_after
+        self.upgrade_after = upgrade_after
+
+        self.adaptive = True
+        self._index = 0
+        self.avg_send_time = 0.0
+        self._slow_streak = 0
+        self._fast_streak = 0
+        self._last_send_at: Optional[float] = None
+        self.tier_changes = 0
+        self.set_quality(quality)
+
+    @property
+    def tier(self) -> QualityTier:
+        return QUALITY_TIERS[self._index]
+
+    def set_quality(self, quality: Optional[str]):
+        """Pin a tier by name, or 'auto' to adapt. Unknown names mean auto."""
+        if quality in TIERS_BY_NAME:
+            self.adaptive = False
+            self._index = QUALITY_TIERS.index(TIERS_BY_NAME[quality])
+        else:
+            self.adaptive = True
+        self._slow_streak = 0
+        self._fast_streak = 0
+
+    def delay_until_ready(self, now: float = None) -> float:
+        """Seconds to wait before the next send to respect the tier's fps cap."""
+        if self._last_send_at is None:
+            return 0.0
+        now = time.monotonic() if now is None else now
+        return max(0.0, self._last_send_at + self.tier.frame_interval - now)
+
+    def record_send(self, duration: float, now: float = None) -> bool:
+        """Record a completed send. Returns True if the tier changed."""
+        self._last_send_at = time.monotonic() if now is None else now
+        if self.avg_send_time == 0.0:
+            self.avg_send_time = duration
+        else:
+            self.avg_send_time += self.smoothing * (duration - self.avg_send_time)
+
+        if self.avg_send_time > self.tier.frame_interval * self.downgrade_ratio:
+            self._fast_streak = 0
+            self._slow_streak += 1
+            if self._slow_streak >= self.downgrade_after:
+                return self._move(1)
+            return False
+
+        self._slow_streak = 0
+        if self._index > 0:
+            better = QUALITY_TIERS[self._index - 1]
+            if self.avg_send_time < better.frame_interval * self.upgrade_ratio:
+                self._fast_streak += 1
+                if self._fast_streak >= self.upgrade_after:
+                    return self._move(-1)
+            else:
+                self._fast_streak = 0
+        return False
+
+    def status(self) -> Dict:
+        return {
+            "tier": self.tier.name,
+            "adaptive": self.adaptive,
+            "jpeg_quality": self.tier.jpeg_quality,
+            "scale": self.tier.scale,
+            "max_fps": self.tier.max_fps,
+            "avg_send_ms": round(self.avg_send_time * 1000.0, 2),
+            "tier_changes": self.tier_changes,
+        }
+
+    def _move(self, step: int) -> bool:
+        self._slow_streak = 0
+        self._fast_streak = 0
+        if not self.adaptive:
+            return False
+        index = min(len(QUALITY_TIERS) - 1, max(0, self._index + step))
+        if index == self._index:
+            return False
+        self._index = index
+        self.tier_changes += 1
+        return True
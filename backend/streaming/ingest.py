@@ -0,0 +1,80 @@
+# backend/streaming/ingest.py
+"""
+Client-side capture ingest.
+
+In ingest mode the browser captures its own camera and uploads JPEG frames
+over the WebSocket. Each connection gets one in-flight inference; frames
+that arrive while it is busy replace the pending frame, so the server
+always works on the newest image and upload cost follows the client's
+own frame rate.
+"""
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+
+class ClientFrameIngest:
+    """
+    Latest-frame-wins ingest loop for one client.
+
+    Args:
+        process: blocking callable turning uploaded JPEG bytes into a result
+                 payload (or None); runs in a worker thread
+        send:    coroutine delivering a payload back to the client
+    """
+
+    def __init__(
+        self,
+        process: Callable[[bytes], Optional[Dict]],
+        send: Callable[[Dict], Awaitable[None]],
+    ):
+        self._process = process
+        self._send = send
+        self._pending: asyncio.Queue = asyncio.Queue(maxsize=1)
+        self.active = False
+        self.received = 0
+        self.processed = 0
+        self.dropped = 0
+        self.avg_process_time = 0.0
+
+    def submit(self, data: bytes):
+        """Queue an uploaded frame, replacing one that has not been processed yet."""
+        if not self.active:
+            return
+        self.received += 1
+        if self._pending.full():
+            try:
+                self._pending.get_nowait()
+                self.dropped += 1
+            except asyncio.QueueEmpty:
+                pass
+        self._pending.put_nowait(data)
+
+    async def run(self):
+        """Process uploaded frames until cancelled."""
+        while True:
+            data = await self._pending.get()
+            started = time.perf_counter()
+            try:
+                payload = await asyncio.to_thread(self._process, data)
+            except Exception as e:
+                print(f"Ingest processing error: {e}")
+                continue
+            elapsed = time.perf_counter() - started
+            self.avg_process_time = elapsed if self.processed == 0 else (
+                0.8 * self.avg_process_time + 0.2 * elapsed
+            )
+
+            if payload is None or not self.active:
+                continue
+            self.processed += 1
+            await self._send(payload)
+
+    def status(self) -> Dict:
+        return {
+            "active": self.active,
+            "received": self.received,
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "avg_process_ms": round(self.avg_process_time * 1000.0, 2),
+        }
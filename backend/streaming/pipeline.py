@@ -0,0 +1,178 @@
+# backend/streaming/pipeline.py
+"""
+Threaded capture -> inference -> encode pipeline for detection streaming.
+
+Each stage runs in its own thread and hands work to the next through a
+bounded latest-wins queue, so a slow stage drops stale frames instead of
+building up latency. Finished results are handed to a publish callback;
+the asyncio event loop never runs camera, model or encoding work.
+"""
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+def _put_latest(q: queue.Queue, item):
+    """Put an item, discarding the oldest entry if the queue is full."""
+    while True:
+        try:
+            q.put_nowait(item)
+            return
+        except queue.Full:
+            try:
+                q.get_nowait()
+            except queue.Empty:
+                pass
+
+
+class DetectionPipeline:
+    """
+    Three-stage detection pipeline.
+
+    Args:
+        capture: returns the next frame, or None if no frame is available
+        infer:   turns a frame into an analysis object
+        encode:  turns an analysis object into a JSON-serializable result
+        is_active: capture only runs while this returns True
+        frame_interval: minimum seconds between captured frames (~30 FPS)
+        queue_size: capacity of the queues between stages
+    """
+
+    def __init__(
+        self,
+        capture: Callable[[], Any],
+        infer: Callable[[Any], Any],
+        encode: Callable[[Any], Optional[Dict]],
+        is_active: Callable[[], bool],
+        frame_interval: float = 0.033,
+        idle_interval: float = 0.1,
+        retry_interval: float = 0.05,
+        queue_size: int = 1,
+    ):
+        self._capture = capture
+        self._infer = infer
+        self._encode = encode
+        self._is_active = is_active
+        self.frame_interval = frame_interval
+        self.idle_interval = idle_interval
+        self.retry_interval = retry_interval
+        self.queue_size = queue_size
+
+        self._stop_event: Optional[threading.Event] = None
+        self._frames: Optional[queue.Queue] = None
+        self._analyses: Optional[queue.Queue] = None
+        self.stats = {"captured": 0, "inferred": 0, "encoded": 0, "errors": 0}
+
+    @property
+    def running(self) -> bool:
+        return self._stop_event is not None and not self._stop_event.is_set()
+
+    def start(self, publish: Callable[[Dict], None]):
+        """Start the stage threads. `publish` is called from the encode thread."""
+        if self.running:
+            return
+
+        # Each run gets its own stop event and queues so threads from a
+        # previous run that are still winding down cannot leak frames in.
+        stop_event = threading.Event()
+        frames: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        analyses: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        self._stop_event = stop_event
+        self._frames = frames
+        self._analyses = analyses
+
+        for name, target, args in (
+            ("capture", self._capture_loop, (stop_event, frames)),
+            ("inference", self._inference_loop, (stop_event, frames, analyses)),
+            ("encode", self._encode_loop, (stop_event, analyses, publish)),
+        ):
+            threading.Thread(
+                target=target, args=args, name=f"detection-{name}", daemon=True
+            ).start()
+        print("Detection pipeline started")
+
+    def stop(self):
+        """Signal all stage threads to exit."""
+        if self._stop_event is not None and not self._stop_event.is_set():
+            self._stop_event.set()
+            print(f"Detection pipeline stopped. Stats: {self.stats}")
+
+    def queue_depths(self) -> Dict[str, int]:
+        return {
+            "frames": self._frames.qsize() if self._frames is not None else 0,
+            "analyses": self._analyses.qsize() if self._analyses is not None else 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Stage loops
+    # ------------------------------------------------------------------
+
+    def _capture_loop(self, stop_event: threading.Event, frames: queue.Queue):
+        next_frame_at = 0.0
+        while not stop_event.is_set():
+            if not self._is_active():
+                stop_event.wait(self.idle_interval)
+                continue
+
+            delay = next_frame_at - time.monotonic()
+            if delay > 0:
+                stop_event.wait(delay)
+                continue
+
+            try:
+                frame = self._capture()
+            except Exception as e:
+                print(f"Capture stage error: {e}")
+                self.stats["errors"] += 1
+                frame = None
+
+            if frame is None:
+                stop_event.wait(self.retry_interval)
+                continue
+
+            next_frame_at = time.monotonic() + self.frame_interval
+            self.stats["captured"] += 1
+            _put_latest(frames, frame)
+
+    def _inference_loop(self, stop_event: threading.Event, frames: queue.Queue, analyses: queue.Queue):
+        while not stop_event.is_set():
+            try:
+                frame = frames.get(timeout=self.idle_interval)
+            except queue.Empty:
+                continue
+
+            try:
+                analysis = self._infer(frame)
+            except Exception as e:
+                print(f"Inference stage error: {e}")
+                self.stats["errors"] += 1
+                continue
+
+            if analysis is not None:
+                self.stats["inferred"] += 1
+                _put_latest(analyses, analysis)
+
+    def _encode_loop(self, stop_event: threading.Event, analyses: queue.Queue, publish: Callable[[Dict], None]):
+        while not stop_event.is_set():
+            try:
+                analysis = analyses.get(timeout=self.idle_interval)
+            except queue.Empty:
+                continue
+
+            try:
+                result = self._encode(analysis)
+            except Exception as e:
+                print(f"Encode stage error: {e}")
+                self.stats["errors"] += 1
+                continue
+
+            if result is None or stop_event.is_set():
+                continue
+
+            self.stats["encoded"] += 1
+            try:
+                publish(result)
+            except Exception as e:
+                print(f"Publish error: {e}")
+                self.stats["errors"] += 1
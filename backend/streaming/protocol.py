@@ -0,0 +1,141 @@
+# backend/streaming/protocol.py
+"""
+Wire formats for detection stream messages.
+
+JSON mode (default, backwards compatible):
+    text message {"type": "detection", "data": {"frame": <base64 JPEG>, ...}}
+
+Binary mode (negotiated per client):
+    binary message = header + metadata + JPEG bytes
+    header   = struct "!BBI": version, metadata encoding, metadata length
+    metadata = MessagePack (or compact JSON when msgpack is not installed)
+               of {"type": "detection", "seq": n, "quality": tier, "results",
+               "sentiment", "twin_state", ["model_pipeline"]}
+
+Results-only messages (client-side capture) use the same layout with an
+empty JPEG section.
+
+model_pipeline is the bulkiest part of the metadata, so binary clients can
+ask for it only every N frames. The JPEG itself is encoded per quality tier
+(see flow_control), once per tier per frame.
+"""
+import base64
+import json
+import struct
+import threading
+from typing import Any, Callable, Dict, Tuple, Union
+
+from backend.streaming.flow_control import QUALITY_TIERS, TIERS_BY_NAME, QualityTier
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+PROTOCOL_JSON = "json"
+PROTOCOL_BINARY = "binary"
+PROTOCOLS = (PROTOCOL_JSON, PROTOCOL_BINARY)
+
+META_JSON = "json"
+META_MSGPACK = "msgpack"
+_META_CODES = {META_JSON: 0, META_MSGPACK: 1}
+
+BINARY_VERSION = 1
+_HEADER = struct.Struct("!BBI")
+
+# (protocol, metadata encoding, include model_pipeline, quality tier name)
+WireFormat = Tuple[str, str, bool, str]
+
+
+def default_meta_encoding() -> str:
+    return META_MSGPACK if msgpack is not None else META_JSON
+
+
+def resolve_meta_encoding(requested: str = None) -> str:
+    """Pick a metadata encoding the server can actually produce."""
+    if requested == META_JSON:
+        return META_JSON
+    return default_meta_encoding()
+
+
+def _pack_meta(meta: Dict, encoding: str) -> bytes:
+    if encoding == META_MSGPACK and msgpack is not None:
+        return msgpack.packb(meta, use_bin_type=True)
+    return json.dumps(meta, separators=(",", ":")).encode("utf-8")
+
+
+class FramePacket:
+    """
+    One annotated detection frame plus its metadata.
+
+    JPEG bytes are produced per quality tier by `encoder(image, tier)` and
+    each wire format is built at most once; both are cached, so any number
+    of clients sharing a tier and format cost a single encode.
+    """
+
+    def __init__(self, image: Any, meta: Dict, encoder: Callable[[Any, QualityTier], bytes]):
+        self.image = image
+        self.meta = meta
+        self.seq = 0
+        self._encoder = encoder
+        self._jpeg: Dict[str, bytes] = {}
+        self._cache: Dict[WireFormat, Union[str, bytes]] = {}
+        self._lock = threading.Lock()
+
+    def jpeg(self, tier_name: str = None) -> bytes:
+        """JPEG bytes for a quality tier (default: best tier)."""
+        tier = TIERS_BY_NAME.get(tier_name, QUALITY_TIERS[0])
+        data = self._jpeg.get(tier.name)
+        if data is None:
+            with self._lock:
+                data = self._jpeg.get(tier.name)
+                if data is None:
+                    data = self._encoder(self.image, tier)
+                    self._jpeg[tier.name] = data
+        return data
+
+    def to_dict(self, tier_name: str = None) -> Dict:
+        """Legacy JSON payload with the frame as base64."""
+        data = {"frame": base64.b64encode(self.jpeg(tier_name)).decode("utf-8")}
+        data.update(self.meta)
+        return data
+
+    def is_encoded(self, wire_format: WireFormat) -> bool:
+        return wire_format in self._cache
+
+    def encode(self, wire_format: WireFormat) -> Union[str, bytes]:
+        """Return the message for a wire format, building it on first use."""
+        cached = self._cache.get(wire_format)
+        if cached is None:
+            cached = self._build(wire_format)
+            self._cache[wire_format] = cached
+        return cached
+
+    def _build(self, wire_format: WireFormat) -> Union[str, bytes]:
+        protocol, meta_encoding, include_pipeline, tier_name = wire_format
+        if protocol != PROTOCOL_BINARY:
+            return json.dumps({"type": "detection", "data": self.to_dict(tier_name)})
+
+        meta = {"type": "detection", "seq": self.seq, "quality": tier_name}
+        for key, value in self.meta.items():
+            if key == "model_pipeline" and not include_pipeline:
+                continue
+            meta[key] = value
+
+        packed = _pack_meta(meta, meta_encoding)
+        header = _HEADER.pack(BINARY_VERSION, _META_CODES[meta_encoding], len(packed))
+        return header + packed + self.jpeg(tier_name)
+
+
+def encode_results_message(payload: Dict, protocol: str, meta_encoding: str) -> Union[str, bytes]:
+    """
+    Results-only message (no frame), used when the client captured the
+    frame itself. In binary mode the JPEG section is simply empty.
+    """
+    if protocol != PROTOCOL_BINARY:
+        return json.dumps({"type": "detection", "data": payload})
+
+    meta = {"type": "detection"}
+    meta.update(payload)
+    packed = _pack_meta(meta, meta_encoding)
+    return _HEADER.pack(BINARY_VERSION, _META_CODES[meta_encoding], len(packed)) + packed
@@ -10,7 +10,8 @@ import StateAnalysis from './components/StateAnalysis';
 import AnalyticsDashboard from './components/AnalyticsDashboard';
 import Charts from './components/Charts';
 import useWebSocket from './hooks/useWebSocket';
-import { API_BASE } from './config';
+import useBrowserCapture from './hooks/useBrowserCapture';
+import { API_BASE, CAPTURE_SOURCE } from './config';
 
 function App() {
   const [isDetecting, setIsDetecting] = useState(false);
@@ -29,7 +30,7 @@ function App() {
     setDetectionData(null);
   }, []);
 
-  const { connect, disconnect, sendMessage } = useWebSocket({
+  const { connect, disconnect, sendMessage, sendFrame } = useWebSocket({
     onMessage: (data) => {
       if (data.type === 'detection') {
         setDetectionData(data.data);
@@ -61,7 +62,13 @@ function App() {
         }, 1000);
       }
     },
-    shouldAutoStart: isDetecting
+    shouldAutoStart: isDetecting,
+    source: CAPTURE_SOURCE
+  });
+
+  const browserVideoRef = useBrowserCapture({
+    enabled: CAPTURE_SOURCE === 'client' && isDetecting,
+    onFrame: sendFrame
   });
 
   // Connect WebSocket on mount, send start/stop commands
@@ -138,7 +145,11 @@ function App() {
         <div className="grid">
           <VideoFeed
             isDetecting={isDetecting}
-            frameData={detectionData?.frame}
+            frameSrc={
+              detectionData?.frame_url ||
+              (detectionData?.frame ? `data:image/jpeg;base64,${detectionData.frame}` : null)
+            }
+            videoRef={CAPTURE_SOURCE === 'client' ? browserVideoRef : undefined}
           />
 
           <DetectionInfo
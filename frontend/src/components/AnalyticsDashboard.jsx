@@ -206,11 +206,26 @@ const AnalyticsDashboard = ({ liveData }) => {
   const downloadExcelReport = async () => {
     setLoading(true);
     try {
-      const response = await fetch(`${API_BASE}/api/analytics/export-excel`);
+      // Built by a background job; poll until the file is ready
+      const submit = await fetch(`${API_BASE}/api/jobs/`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ kind: 'report', params: { format: 'xlsx' } }),
+      });
+      let job = (await submit.json()).data;
+      if (!job) { setMessage('Failed to start report.'); return; }
+      while (job.status === 'queued' || job.status === 'running') {
+        setMessage(`Generating report… ${Math.round(job.progress.fraction * 100)}%`);
+        await new Promise(r => setTimeout(r, 1000));
+        const json = await (await fetch(`${API_BASE}/api/jobs/${job.id}`)).json();
+        if (!json.success) { setMessage(`Failed to generate report: ${json.message}`); return; }
+        job = json.data;
+      }
+      if (job.status !== 'done') { setMessage(`Failed to generate report: ${job.error}`); return; }
+
+      const response = await fetch(`${API_BASE}${job.download_url}`);
       if (response.ok) {
-        const cd  = response.headers.get('Content-Disposition');
-        let fname = `syntwin_report_${new Date().toISOString().slice(0,19).replace(/:/g,'-')}.xlsx`;
-        if (cd) { const m = cd.match(/filename="?(.+?)"?$/i); if (m) fname = m[1]; }
+        const fname = job.artifact;
         const blob = await response.blob();
         const url  = window.URL.createObjectURL(blob);
         const a    = document.createElement('a');
@@ -219,7 +234,7 @@ const AnalyticsDashboard = ({ liveData }) => {
         setTimeout(() => { window.URL.revokeObjectURL(url); document.body.removeChild(a); }, 100);
         setMessage(`✓ Downloaded: ${fname}`);
       } else {
-        setMessage(`Failed to generate report: ${await response.text()}`);
+        setMessage(`Failed to download report: ${await response.text()}`);
       }
     } catch (e) { setMessage(`Error: ${e.message}`); }
     finally { setLoading(false); }
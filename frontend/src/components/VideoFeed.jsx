@@ -1,13 +1,31 @@
 import './VideoFeed.css';
 
-const VideoFeed = ({ isDetecting, frameData }) => {
+const VideoFeed = ({ isDetecting, frameSrc, videoRef }) => {
+  // Browser capture: show the local camera preview
+  if (videoRef) {
+    return (
+      <div className="card">
+        <h2>Live Video Feed</h2>
+        <video
+          ref={videoRef}
+          autoPlay
+          muted
+          playsInline
+          className="video-feed"
+          style={{ display: isDetecting ? 'block' : 'none' }}
+        />
+        {!isDetecting && <div className="video-placeholder">Camera Off</div>}
+      </div>
+    );
+  }
+
   return (
     <div className="card">
       <h2>Live Video Feed</h2>
-      {isDetecting && frameData ? (
+      {isDetecting && frameSrc ? (
         <img
           id="videoFeed"
-          src={`data:image/jpeg;base64,${frameData}`}
+          src={frameSrc}
           alt="Video feed"
           className="video-feed"
         />
@@ -1,2 +1,5 @@
 export const API_BASE = 'http://localhost:8000';
 export const WS_BASE = 'ws://localhost:8000';
+// 'server' streams the backend's camera; 'client' captures in the browser
+// and uploads frames, receiving detection results only
+export const CAPTURE_SOURCE = 'server';
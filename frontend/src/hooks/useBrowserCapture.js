@@ -0,0 +1,72 @@
+import { useEffect, useRef } from 'react';
+
+/**
+ * Captures the browser camera and hands JPEG blobs to onFrame at `fps`.
+ * A new frame is only grabbed after the previous one has been encoded,
+ * so a slow device simply captures less often.
+ */
+const useBrowserCapture = ({ enabled, onFrame, fps = 10, quality = 0.7, width = 640 }) => {
+  const videoRef = useRef(null);
+  const onFrameRef = useRef(onFrame);
+  onFrameRef.current = onFrame;
+
+  useEffect(() => {
+    if (!enabled) {
+      return undefined;
+    }
+
+    let stream = null;
+    let timer = null;
+    let cancelled = false;
+    const canvas = document.createElement('canvas');
+
+    const grab = () => {
+      const video = videoRef.current;
+      if (cancelled) {
+        return;
+      }
+      if (!video || video.readyState < 2) {
+        timer = setTimeout(grab, 1000 / fps);
+        return;
+      }
+      const scale = Math.min(1, width / video.videoWidth);
+      canvas.width = Math.round(video.videoWidth * scale);
+      canvas.height = Math.round(video.videoHeight * scale);
+      canvas.getContext('2d').drawImage(video, 0, 0, canvas.width, canvas.height);
+      canvas.toBlob((blob) => {
+        if (blob && !cancelled) {
+          onFrameRef.current(blob);
+        }
+        timer = setTimeout(grab, 1000 / fps);
+      }, 'image/jpeg', quality);
+    };
+
+    navigator.mediaDevices.getUserMedia({ video: { width: { ideal: width } }, audio: false })
+      .then((mediaStream) => {
+        if (cancelled) {
+          mediaStream.getTracks().forEach((track) => track.stop());
+          return;
+        }
+        stream = mediaStream;
+        if (videoRef.current) {
+          videoRef.current.srcObject = mediaStream;
+        }
+        grab();
+      })
+      .catch((error) => {
+        console.error('Failed to access browser camera:', error);
+      });
+
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+      if (stream) {
+        stream.getTracks().forEach((track) => track.stop());
+      }
+    };
+  }, [enabled, fps, quality, width]);
+
+  return videoRef;
+};
+
+export default useBrowserCapture;
@@ -1,15 +1,74 @@
 import { useRef, useCallback } from 'react';
 import { WS_BASE } from '../config';
 
-const useWebSocket = ({ onMessage, onClose, shouldAutoStart = false }) => {
+// Binary stream frames: [u8 version][u8 meta encoding][u32 meta length][meta][JPEG]
+const BINARY_HEADER_SIZE = 6;
+const META_JSON = 0;
+// model_pipeline is only sent every N frames in binary mode
+const PIPELINE_EVERY = 10;
+// Skip uploading a captured frame while this much is still unsent
+const MAX_UPLOAD_BACKLOG = 256 * 1024;
+
+const useWebSocket = ({ onMessage, onClose, shouldAutoStart = false, protocol = 'binary', source = 'server' }) => {
   const wsRef = useRef(null);
+  const frameUrlsRef = useRef([]);
+  const lastPipelineRef = useRef(null);
+
+  const decodeBinaryFrame = useCallback((buffer) => {
+    const view = new DataView(buffer);
+    const metaEncoding = view.getUint8(1);
+    const metaLength = view.getUint32(2);
+    if (metaEncoding !== META_JSON) {
+      throw new Error(`Unsupported metadata encoding ${metaEncoding}`);
+    }
+
+    const metaBytes = new Uint8Array(buffer, BINARY_HEADER_SIZE, metaLength);
+    const { type, seq, ...meta } = JSON.parse(new TextDecoder().decode(metaBytes));
+    const jpegBytes = new Uint8Array(buffer, BINARY_HEADER_SIZE + metaLength);
+
+    // Results-only messages (browser capture) carry no JPEG
+    let frameUrl = null;
+    if (jpegBytes.length > 0) {
+      // Keep the previous frame URL alive until the <img> has switched over
+      frameUrl = URL.createObjectURL(new Blob([jpegBytes], { type: 'image/jpeg' }));
+      frameUrlsRef.current.push(frameUrl);
+      while (frameUrlsRef.current.length > 2) {
+        URL.revokeObjectURL(frameUrlsRef.current.shift());
+      }
+    }
+
+    if (meta.model_pipeline) {
+      lastPipelineRef.current = meta.model_pipeline;
+    }
+
+    return {
+      type,
+      data: {
+        ...meta,
+        seq,
+        frame_url: frameUrl,
+        model_pipeline: meta.model_pipeline || lastPipelineRef.current
+      }
+    };
+  }, []);
 
   const connect = useCallback(() => {
     if (wsRef.current?.readyState === WebSocket.OPEN) {
       return;
     }
 
-    wsRef.current = new WebSocket(`${WS_BASE}/api/stream/ws`);
+    const params = new URLSearchParams();
+    if (protocol === 'binary') {
+      params.set('protocol', 'binary');
+      params.set('meta', 'json');
+      params.set('pipeline_every', PIPELINE_EVERY);
+    }
+    if (source === 'client') {
+      params.set('source', 'client');
+    }
+    const query = params.toString() ? `?${params}` : '';
+    wsRef.current = new WebSocket(`${WS_BASE}/api/stream/ws${query}`);
+    wsRef.current.binaryType = 'arraybuffer';
 
     wsRef.current.onopen = () => {
       console.log('WebSocket connected');
@@ -19,8 +78,14 @@ const useWebSocket = ({ onMessage, onClose, shouldAutoStart = false }) => {
     };
 
     wsRef.current.onmessage = (event) => {
-      const data = JSON.parse(event.data);
-      onMessage(data);
+      try {
+        const data = typeof event.data === 'string'
+          ? JSON.parse(event.data)
+          : decodeBinaryFrame(event.data);
+        onMessage(data);
+      } catch (error) {
+        console.error('Failed to decode stream message:', error);
+      }
     };
 
     wsRef.current.onerror = (error) => {
@@ -33,13 +98,15 @@ const useWebSocket = ({ onMessage, onClose, shouldAutoStart = false }) => {
         onClose(event);
       }
     };
-  }, [onMessage, onClose, shouldAutoStart]);
+  }, [onMessage, onClose, shouldAutoStart, protocol, source, decodeBinaryFrame]);
 
   const disconnect = useCallback(() => {
     if (wsRef.current) {
       wsRef.current.close();
       wsRef.current = null;
     }
+    frameUrlsRef.current.forEach((url) => URL.revokeObjectURL(url));
+    frameUrlsRef.current = [];
   }, []);
 
   const sendMessage = useCallback((message) => {
@@ -48,10 +115,19 @@ const useWebSocket = ({ onMessage, onClose, shouldAutoStart = false }) => {
     }
   }, []);
 
+  // Upload a captured frame; dropped if the socket is still draining older ones
+  const sendFrame = useCallback((blob) => {
+    const ws = wsRef.current;
+    if (ws?.readyState === WebSocket.OPEN && ws.bufferedAmount < MAX_UPLOAD_BACKLOG) {
+      ws.send(blob);
+    }
+  }, []);
+
   return {
     connect,
     disconnect,
-    sendMessage
+    sendMessage,
+    sendFrame
   };
 };
 